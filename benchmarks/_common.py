@@ -0,0 +1,35 @@
+"""
+Shared set-up of the benchmark and check scripts. Importing this module
+puts the repository root first on sys.path, so that the scripts run
+against the working tree rather than an installed package; it also has
+the timing helpers they use.
+"""
+
+import os
+import sys
+import time
+import timeit
+
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, root)
+
+def best_time(fn, number=1, repeat=5):
+    """ Best time per call of fn in seconds, over repeat runs of number calls. """
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+def time_call(fn, min_time, repeat=5):
+    """ Best time per call of fn, over repeats lasting at least min_time. """
+    fn()  # warm up
+    t0 = time.perf_counter()
+    fn()
+    once = time.perf_counter() - t0
+    number = max(1, int(min_time / max(once, 1e-9)))
+    if once > min_time:
+        repeat = 1
+    best = once
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        for j in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+"""
+Check that repeated conversions into a preallocated out= array make no
+allocations proportional to the input size, and compare their speed with the
+allocating calls.
+
+Memory is traced with tracemalloc (which sees numpy's data buffers): after a
+warm-up call, the peak traced memory of each call with out= is measured at
+two input sizes, N and 4N. It must not grow with the size, and must stay
+within a fixed number of evaluation blocks (function_types._block_size
+elements each), also when out= or the input are strided views, and when the reference
+junction temperature is given per reading. The script
+exits with an error if not.
+
+Run from the repository root:
+    python benchmarks/bench_alloc.py
+"""
+
+import sys
+import tracemalloc
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples
+from thermocouples_reference.function_types import _block_size
+
+N = 2*10**5
+SIZES = [N, 4*N]
+
+# The inverse search keeps a few dozen block-sized temporaries alive.
+LIMIT = 48 * _block_size * 8
+
+# Growth of the peak from N to 4N within one block is not counted: the
+# inverse search keeps more temporaries on blocks that take more iterations.
+SLACK = _block_size * 8
+
+def peak_bytes(fn):
+    fn()  # warm up (caches, lazily built indices)
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def cases(tc, n):
+    """ List of (name, call with out=, allocating call) for n values. """
+    T = np.linspace(tc.minT_C + 30., tc.maxT_C - 1., n)
+    TF = T*1.8 + 32.
+    emf = tc.emf_mVC(T)
+    emfK = tc.emf_mVK(T + 273.15, 300.)
+    # a slowly drifting cold junction, one temperature per reading
+    Tref = np.linspace(20., 30., n)
+    emfref = tc.emf_mVC(T, Tref)
+    out64 = np.empty(n)
+    out32 = np.empty(n, dtype=np.float32)
+    # every other element of a bigger array, and a transposed one
+    strided = np.empty(2*n)[::2]
+    T2 = T.reshape(-1, 2).T
+    out2 = np.empty(T2.shape[::-1]).T
+    return [
+        ("func(T, out=)",
+            lambda: tc.func(T, out=out64),
+            lambda: tc.func(T)),
+        ("func(T, out=float32)",
+            lambda: tc.func(T, out=out32),
+            lambda: tc.func(T, dtype=np.float32)),
+        ("emf_mVC(T, 25, out=)",
+            lambda: tc.emf_mVC(T, 25., out=out64),
+            lambda: tc.emf_mVC(T, 25.)),
+        ("emf_mVF(T, 77, out=)",
+            lambda: tc.emf_mVF(TF, 77., out=out64),
+            lambda: tc.emf_mVF(TF, 77.)),
+        ("emf_mVC(T.T, out=T.T)",
+            lambda: tc.emf_mVC(T2, out=out2),
+            lambda: tc.emf_mVC(T2)),
+        ("inverse_CmV(out=)",
+            lambda: tc.inverse_CmV(emf, out=out64),
+            lambda: tc.inverse_CmV(emf)),
+        ("inverse_CmV(out=[::2])",
+            lambda: tc.inverse_CmV(emf, out=strided),
+            lambda: tc.inverse_CmV(emf)),
+        ("emf_mVC(T, Tref[], out=)",
+            lambda: tc.emf_mVC(T, Tref, out=out64),
+            lambda: tc.emf_mVC(T, Tref)),
+        ("inverse_CmV(Tref[], out=)",
+            lambda: tc.inverse_CmV(emfref, Tref, out=out64),
+            lambda: tc.inverse_CmV(emfref, Tref)),
+        ("inverse_KmV(out=)",
+            lambda: tc.inverse_KmV(emfK, 300., out=out64),
+            lambda: tc.inverse_KmV(emfK, 300.)),
+        ]
+
+def main():
+    failures = []
+    print("{:<6s} {:<26s} {:>12s} {:>12s} {:>12s} {:>12s}".format(
+        "type", "call", "peak N (kB)", "peak 4N (kB)", "out= (ms)", "alloc (ms)"))
+    for key in ['B', 'E', 'K', 'T']:
+        tc = thermocouples[key]
+        small, large = [cases(tc, n) for n in SIZES]
+        for (name, with_out, without_out), (name, with_out4, w) in zip(small, large):
+            peaks = [peak_bytes(with_out), peak_bytes(with_out4)]
+            print("{:<6s} {:<26s} {:>12.1f} {:>12.1f} {:>12.2f} {:>12.2f}".format(
+                key, name, peaks[0]/1e3, peaks[1]/1e3,
+                1e3*best_time(with_out, 3, 3), 1e3*best_time(without_out, 3, 3)))
+            if peaks[1] > peaks[0] + SLACK or max(peaks) > LIMIT:
+                failures.append((key, name, peaks))
+    if failures:
+        for key, name, peaks in failures:
+            print("FAIL: type {} {} allocated {} and {} bytes for {} and {} "
+                  "values (limit {})".format(key, name, peaks[0], peaks[1],
+                  SIZES[0], SIZES[1], LIMIT))
+        sys.exit(1)
+    print("OK: no call with out= allocated more than {} bytes, or more for "
+          "{} values than for {}".format(LIMIT, SIZES[1], SIZES[0]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python
+"""
+Check and time the safeguarded bracketed search that inverse lookup falls
+back on when Halley's method fails. For every thermocouple, voltages over
+each monotonic branch are solved by the bracketed search alone, from the
+middle of the branch, and the worst emf error and iteration count are
+reported; then the fallback is forced in inverse() itself, with a hopeless
+starting temperature. The script exits with an error if any solution is off
+by more than Vtol, or if scipy was imported along the way.
+
+Run from the repository root:
+    python benchmarks/bench_bracketed.py
+"""
+
+import sys
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples
+
+VTOL = 1e-6
+
+def main():
+    print("{:<12s} {:>10s} {:>10s} {:>12s} {:>14s}".format(
+        "type", "max error", "mean iter", "max iter", "fallback (us)"))
+    failed = False
+    for key in sorted(thermocouples):
+        func = thermocouples[key].func
+        worst = 0.
+        counts = []
+        for tlo, thi, vlo, vhi, inc in func.branches:
+            T = np.linspace(tlo, thi, 10001)
+            V = func(T)
+            n = V.size
+            c = np.zeros(n, int)
+            Ts = func._inverse_bracketed(V, VTOL, np.full(n, tlo), np.full(n, thi),
+                                         np.full(n, inc), counts=c)
+            worst = max(worst, np.abs(func(Ts) - V).max())
+            counts.append(c)
+        counts = np.concatenate(counts)
+        # Scalar inverse with the fallback forced.
+        tlo, thi = func.branches[-1][:2]
+        v = float(func(0.5*(tlo + thi)))
+        t_fallback = best_time(lambda: func.inverse(v, Tstart=1e9), 100, 1)
+        print("{:<12s} {:>10.1e} {:>10.2f} {:>12d} {:>14.1f}".format(
+            key, worst, counts.mean(), counts.max(), 1e6*t_fallback))
+        failed |= worst > VTOL
+    if 'scipy' in sys.modules:
+        print("FAIL: scipy was imported")
+        sys.exit(1)
+    if failed:
+        print("FAIL: solutions off by more than Vtol")
+        sys.exit(1)
+    print("OK: all solutions within Vtol, without scipy")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/python
+"""
+Benchmark of Channel_Map against converting a samples x channels block
+column by column, for a rack of mixed thermocouple types with one cold
+junction temperature per channel. Also shows how the time depends on the
+number of channels, at a fixed total number of samples. Finally, the peak
+memory of a conversion with out= and a cold junction temperature per
+channel must not grow with the number of samples, for channel groups that
+are adjacent and spread out (the script exits with an error if it does).
+
+Run from the repository root:
+    python benchmarks/bench_channels.py
+"""
+
+import sys
+import tracemalloc
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples, Channel_Map
+
+TYPES = ['K', 'J', 'T', 'N']
+
+def block(channels, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    keys = [TYPES[i % len(TYPES)] for i in range(channels)]
+    T = rng.uniform(0., 350., (samples, channels))
+    cjc = rng.uniform(20., 30., channels)
+    emf = np.empty_like(T)
+    for i, key in enumerate(keys):
+        emf[:, i] = thermocouples[key].emf_mVC(T[:, i], cjc[i])
+    return keys, emf, cjc, T
+
+def per_column(keys, emf, cjc, out):
+    for i, key in enumerate(keys):
+        out[:, i] = thermocouples[key].inverse_CmV(emf[:, i], cjc[i])
+    return out
+
+def peak_bytes(fn):
+    fn()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def check_memory():
+    """\
+    Peak memory of out= conversions at two block sizes, with one cold
+    junction temperature per channel.
+    """
+    keys = ['K', 'K', 'J', 'J', 'K', 'T', 'N', 'K']
+    chans = Channel_Map(keys)
+    cjc = np.linspace(20., 30., len(keys))
+    peaks = []
+    for samples in [10**5, 4*10**5]:
+        T = np.random.default_rng(0).uniform(0., 350., (samples, len(keys)))
+        out = np.empty_like(T)
+        emf = chans.convert(T, Tref=cjc)
+        peaks.append([peak_bytes(lambda: chans.convert(T, Tref=cjc, out=out)),
+                      peak_bytes(lambda: chans.inverse(emf, Tref=cjc, out=out))])
+    print("peak memory with out= (kB): convert {:.0f} -> {:.0f}, inverse "
+          "{:.0f} -> {:.0f}, for 4x the samples".format(
+          peaks[0][0]/1e3, peaks[1][0]/1e3, peaks[0][1]/1e3, peaks[1][1]/1e3))
+    # allow a few blocks of float64 of noise
+    if any(p4 > p + 3*8*8192 for p, p4 in zip(*peaks)):
+        print("FAIL: peak memory grows with the number of samples")
+        sys.exit(1)
+
+def main():
+    total = 2*10**5
+    print("{:>8s} {:>8s} {:>14s} {:>14s} {:>8s}".format(
+        "channels", "samples", "columns (s)", "Channel_Map (s)", "speedup"))
+    for channels in [1, 4, 16, 64, 256]:
+        samples = total // channels
+        keys, emf, cjc, T = block(channels, samples)
+        chans = Channel_Map(keys)
+        out = np.empty_like(emf)
+        result = chans.inverse(emf, Tref=cjc, out=out)
+        assert np.allclose(result, T, atol=1e-6)
+        assert np.allclose(result, per_column(keys, emf, cjc, np.empty_like(emf)),
+                           atol=1e-9)
+        t_cols = best_time(lambda: per_column(keys, emf, cjc, out), 3, 3)
+        t_map = best_time(lambda: chans.inverse(emf, Tref=cjc, out=out), 3, 3)
+        print("{:>8d} {:>8d} {:>14.3e} {:>14.3e} {:>7.2f}x".format(
+            channels, samples, t_cols, t_map, t_cols/t_map))
+    check_memory()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/python
+"""
+Benchmark of the thermocouples-convert CSV tool (csv_convert.convert_csv):
+a logger file with a timestamp, four thermocouple voltage columns of mixed
+types and a cold junction column is converted, reporting rows/s and the
+time split between parsing, converting and writing. The results are
+checked against the temperatures the file was made from. A small file with
+runs of blank lines is also converted one row per chunk, and must give
+all its rows, and the reference junction of a column specification must
+be read from a column given by index, or fixed with =VALUE. Voltages out
+of range must be written as nan without losing the rows after them, or
+with on_error='raise' be reported with their line number; so must empty,
+missing and non-numeric fields.
+
+Run from the repository root:
+    python benchmarks/bench_csv.py [rows]
+"""
+
+import io
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.csv_convert import convert_csv, parse_column_spec
+
+TYPES = ['K', 'J', 'T', 'N']
+
+def make_csv(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(0., 350., (rows, len(TYPES)))
+    cjc = rng.uniform(20., 25., rows)
+    emf = np.column_stack([thermocouples[key].emf_mVC(T[:, i], cjc)
+                           for i, key in enumerate(TYPES)])
+    lines = ["time," + ",".join("V%d"%i for i in range(len(TYPES))) + ",cjc\n"]
+    fmt = "%d," + ",".join(["%.7f"]*len(TYPES)) + ",%.4f\n"
+    lines.extend(fmt%((i,) + tuple(e) + (c,)) for i, (e, c) in enumerate(zip(emf.tolist(), cjc)))
+    return "".join(lines), T
+
+def check_blank_lines():
+    """ Blank lines are skipped, even when a whole chunk is blank. """
+    text = "V,cjc\n1.0,20\n\n\n2.0,20\n\n3.0,21\n\n"
+    for chunk_rows in [1, 2, 3, 100]:
+        out = io.StringIO()
+        stats = convert_csv(io.StringIO(text), out, [("V", "K", "cjc")],
+                            chunk_rows=chunk_rows)
+        lines = out.getvalue().splitlines()
+        if stats['rows'] != 3 or len(lines) != 4 or lines[3][:8] != "3.0,21,9":
+            print("FAIL: blank lines with chunk_rows=%d: %r"%(chunk_rows, lines))
+            sys.exit(1)
+
+def check_column_specs():
+    """ A numeric CJC is a column index; fixed temperatures are =VALUE. """
+    text = "V,cjc\n1.0,20\n"
+    expected = [("V:K:1", 20.), ("V:K:cjc", 20.), ("0:K:1", 20.),
+                ("V:K:=1", 1.), ("V:K:=-2.5", -2.5), ("V:K", 0.)]
+    for spec, Tref in expected:
+        out = io.StringIO()
+        convert_csv(io.StringIO(text), out, [parse_column_spec(spec)])
+        T = float(out.getvalue().splitlines()[1].split(',')[-1])
+        if abs(T - thermocouples['K'].inverse_CmV(1.0, Tref)) > 1e-4:
+            print("FAIL: column specification %s gave %g degC"%(spec, T))
+            sys.exit(1)
+    for spec in ["V:K:=", "V:K:=x", "V:K:", "V"]:
+        try:
+            parse_column_spec(spec)
+        except ValueError:
+            continue
+        print("FAIL: column specification %s accepted"%(spec,))
+        sys.exit(1)
+
+def check_out_of_range():
+    """ Unconvertible voltages give nan; the other values and rows don't. """
+    text = "V,W,cjc\n1.0,1.0,20\n\n99.0,1.0,20\n2.0,nan,21\n3.0,1.0,21\n"
+    columns = [("V", "K", "cjc"), ("W", "T", "cjc")]
+    for chunk_rows in [1, 2, 100]:
+        out = io.StringIO()
+        stats = convert_csv(io.StringIO(text), out, columns,
+                            chunk_rows=chunk_rows)
+        T = np.genfromtxt(io.StringIO(out.getvalue()), delimiter=',',
+                          skip_header=1, usecols=(3, 4))
+        good = ~np.isnan(T)
+        if (T.shape != (4, 2) or good.sum() != 6 or good[1, 0] or good[2, 1]
+                or stats['nan'] != 2 or stats['first_nan_line'] != 4
+                or abs(T[3, 0] - thermocouples['K'].inverse_CmV(3.0, 21.)) > 1e-4):
+            print("FAIL: out of range voltages with chunk_rows=%d: %r, %r"
+                  %(chunk_rows, T, stats))
+            sys.exit(1)
+        try:
+            convert_csv(io.StringIO(text), io.StringIO(), columns,
+                        chunk_rows=chunk_rows, on_error='raise')
+        except ValueError as e:
+            if "line 4" in e.args[0]:
+                continue
+        print("FAIL: out of range voltage not reported on line 4")
+        sys.exit(1)
+
+def check_bad_fields():
+    """\
+    Empty, missing and non-numeric fields give nan like out of range
+    voltages, or with on_error='raise' an error on their line of the file.
+    """
+    text = "V,cjc\n1.0,20\n2.0,20\n,20\nabc,21\n3.0,\n4.0\n5.0,x\n6.0,21\n"
+    for chunk_rows in [1, 2, 3, 100]:
+        out = io.StringIO()
+        stats = convert_csv(io.StringIO(text), out, [("V", "K", "cjc")],
+                            chunk_rows=chunk_rows)
+        # (the temperature is the last field, also of the short row)
+        T = np.array([float(l.split(',')[-1])
+                      for l in out.getvalue().splitlines()[1:]])
+        good = ~np.isnan(T)
+        if (T.shape != (8,) or list(np.flatnonzero(good)) != [0, 1, 7]
+                or stats['nan'] != 5 or stats['first_nan_line'] != 4
+                or abs(T[7] - thermocouples['K'].inverse_CmV(6.0, 21.)) > 1e-4):
+            print("FAIL: bad fields with chunk_rows=%d: %r, %r"
+                  %(chunk_rows, T, stats))
+            sys.exit(1)
+        try:
+            convert_csv(io.StringIO(text), io.StringIO(), [("V", "K", "cjc")],
+                        chunk_rows=chunk_rows, on_error='raise')
+        except ValueError as e:
+            if "line 4" in e.args[0]:
+                continue
+        print("FAIL: empty field not reported on line 4")
+        sys.exit(1)
+
+def main():
+    check_blank_lines()
+    check_column_specs()
+    check_out_of_range()
+    check_bad_fields()
+    rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else 2*10**5
+    text, T = make_csv(rows)
+    columns = [("V%d"%i, key, "cjc") for i, key in enumerate(TYPES)]
+    out = io.StringIO()
+    stats = convert_csv(io.StringIO(text), out, columns, fmt='%.6f')
+    result = np.loadtxt(io.StringIO(out.getvalue()), delimiter=',', skiprows=1,
+                        usecols=range(len(TYPES) + 2, 2*len(TYPES) + 2))
+    err = np.abs(result - T).max()
+    total = stats['total']
+    print("{} rows ({:.1f} MB) in {:.3f} s: {:.3e} rows/s".format(
+        stats['rows'], len(text)/1e6, total, stats['rows']/total))
+    for key in ['parse', 'convert', 'write']:
+        print("  {:<8s} {:8.3f} s  {:5.1f}%".format(key, stats[key], 100.*stats[key]/total))
+    print("max error {:.1e} degC (voltages written with 0.1 nV resolution)".format(err))
+    if err > 1e-3:
+        print("FAIL: wrong temperatures")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+"""
+Before/after benchmark of Polynomial_Gaussian_Piecewise_Function.__call__.
+
+"before" is the original evaluation scheme, reproduced below: every piece is
+evaluated over the whole input and np.choose picks the results. "after" is
+the current __call__, which evaluates each piece only on its own samples.
+Empty inputs are checked to give empty results, from __call__ and from
+derivatives().
+
+Run from the repository root:
+    python benchmarks/bench_evaluate.py
+"""
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples
+
+def choose_call(func, T, derivative=0):
+    """ The original all-pieces + np.choose evaluation (extrapolating). """
+    T = np.asarray(T)
+    emf_choices = [None]
+    selector = (T >= func.minT)*1
+    for tmin, tmax, coefs, ec in func.table:
+        selector += (T > tmax)
+        emf = np.polyval(np.polyder(coefs, derivative), T)
+        if ec:
+            dT = T - ec[2]
+            gauss = ec[0] * np.exp(ec[1] * dT**2)
+            if derivative == 0:
+                emf += gauss
+            elif derivative == 1:
+                emf += 2. * ec[1] * gauss * dT
+            elif derivative == 2:
+                emf += 2. * ec[1] * gauss * (2. * ec[1] * dT**2 + 1.)
+            else:
+                emf += 4. * ec[1] * ec[1] * gauss * dT * (2. * ec[1] * dT**2 + 3.)
+        emf_choices.append(emf)
+    emf_choices.append(None)
+    emf_choices[0] = emf_choices[1]
+    emf_choices[-1] = emf_choices[-2]
+    return np.choose(selector, emf_choices)
+
+def check_empty(func):
+    """ Empty inputs must give empty results of the same shape. """
+    for T in [np.array([]), np.zeros((0, 3))]:
+        assert func(T).shape == T.shape
+        assert func(T, out_of_range="nan").shape == T.shape
+        assert all(r.shape == T.shape for r in func.derivatives(T, order=3))
+
+def main():
+    print("{:<12s} {:>4s} {:>10s} {:>12s} {:>12s} {:>8s}".format(
+        "type", "segs", "samples", "before (s)", "after (s)", "speedup"))
+    for key in sorted(thermocouples):
+        func = thermocouples[key].func
+        check_empty(func)
+        for n, number in [(1, 2000), (10**6, 3)]:
+            T = np.linspace(func.minT, func.maxT, n) if n > 1 else np.array(0.5*(func.minT+func.maxT))
+            ref = choose_call(func, T)
+            new = func(T, out_of_range="extrapolate")
+            assert np.allclose(ref, new, rtol=1e-12, atol=1e-12), key
+            t_before = best_time(lambda: choose_call(func, T), number)
+            t_after = best_time(lambda: func(T, out_of_range="extrapolate"), number)
+            print("{:<12s} {:>4d} {:>10d} {:>12.3e} {:>12.3e} {:>7.2f}x".format(
+                key, len(func.table), n, t_before, t_after, t_before/t_after))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python
+"""
+Benchmark of package import time, with the lazy thermocouple registry
+against building every thermocouple up front (as importing the package used
+to do).
+
+Each measurement runs in a fresh interpreter, after numpy has been imported
+(numpy's own import time is reported separately, as it is paid anyway).
+
+Run from the repository root:
+    python benchmarks/bench_import.py
+"""
+
+import subprocess
+import sys
+
+from _common import root
+
+snippet = """
+import sys, time
+sys.path.insert(0, %r)
+t0 = time.perf_counter()
+import numpy
+t1 = time.perf_counter()
+import thermocouples_reference
+t2 = time.perf_counter()
+thermocouples_reference.thermocouples['K']
+t3 = time.perf_counter()
+for key in thermocouples_reference.thermocouples:
+    thermocouples_reference.thermocouples[key]
+t4 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2, t4 - t3)
+""" % root
+
+def measure(repeat=7):
+    runs = []
+    for i in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', snippet])
+        runs.append([float(x) for x in out.split()])
+    return [min(col)*1e3 for col in zip(*runs)]
+
+def main():
+    t_numpy, t_import, t_first, t_rest = measure()
+    print("import numpy:                        {:8.2f} ms".format(t_numpy))
+    print("import thermocouples_reference:      {:8.2f} ms".format(t_import))
+    print("  then thermocouples['K']:           {:8.2f} ms".format(t_first))
+    print("  then building all other types:     {:8.2f} ms".format(t_rest))
+    print("lazy, using type K only:             {:8.2f} ms".format(t_import + t_first))
+    print("eager, building every type:          {:8.2f} ms".format(t_import + t_first + t_rest))
+
+if __name__ == '__main__':
+    main()
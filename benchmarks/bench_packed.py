@@ -0,0 +1,111 @@
+#!/usr/bin/python
+"""
+Benchmark of mixed-type evaluation with Packed_Curves: a stream of readings
+where every element has its own thermocouple type (drawn from the first
+ntypes curves) is converted to emfs in one packed call, and with one
+emf_mVC call per type on that type's elements (selected by mask, with the
+results scattered back). The results of both must agree, also for
+out_of_range="nan" and "raise" with a reference junction temperature outside
+some of the curves. emf_mVC with out= must not allocate anything of the
+size of the input, with a scalar or a per-element Tref.
+
+Run from the repository root:
+    python benchmarks/bench_packed.py
+"""
+
+import sys
+import tracemalloc
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference.function_types import _block_size
+from thermocouples_reference.packed import Packed_Curves
+
+def per_type(packed, T, curve, Tref):
+    E = np.empty(T.shape)
+    for i, tc in enumerate(packed.thermocouples):
+        sel = (curve == i)
+        if np.any(sel):
+            E[sel] = tc.emf_mVC(T[sel], Tref)
+    return E
+
+def check_reference_range(packed):
+    """ out_of_range applies to Tref as in Thermocouple_Reference.convert. """
+    i = packed.keys.index('AuFe 0.07')
+    tc = packed.thermocouples[i]
+    T = np.array([tc.minT_C, 0.5*(tc.minT_C + tc.maxT_C)])
+    # (AuFe 0.07 only goes up to 7 K above the freezing point of water)
+    for Tref in [25., np.array([25., 0.])]:
+        ref = tc.emf_mVC(T, Tref, out_of_range="nan")
+        new = packed.emf_mVC(T, i, Tref, out_of_range="nan")
+        if not np.array_equal(np.isnan(ref), np.isnan(new)):
+            print("FAIL: out_of_range='nan' with Tref=%r: %r, not %r"%(Tref, new, ref))
+            sys.exit(1)
+        try:
+            packed.emf_mVC(T, i, Tref)
+        except ValueError:
+            continue
+        print("FAIL: Tref=%r out of range not raised"%(Tref,))
+        sys.exit(1)
+
+def peak_bytes(fn):
+    fn()  # warm up
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def check_out_allocations(packed):
+    """ emf_mVC(out=) works block by block, also subtracting the reference. """
+    limit = 32 * _block_size * 8
+    for Tref in ['scalar', 'array']:
+        peaks = []
+        for n in [2*10**5, 8*10**5]:
+            curve = np.arange(n) % len(packed.keys)
+            T = 0.5*(packed.minT + packed.maxT).take(curve)
+            ref = 25. if Tref == 'scalar' else np.full(n, 25.)
+            out = np.empty(n)
+            peaks.append(peak_bytes(lambda: packed.emf_mVC(
+                T, curve, ref, out_of_range="nan", out=out)))
+            expect = packed.emf_mVC(T, curve, ref, out_of_range="nan")
+            if not np.array_equal(out, expect, equal_nan=True):
+                print("FAIL: emf_mVC(out=) with %s Tref differs"%(Tref,))
+                sys.exit(1)
+        print("emf_mVC(out=), %s Tref: peak %.1f kB and %.1f kB"%(
+            Tref, peaks[0]/1e3, peaks[1]/1e3))
+        if max(peaks) > limit:
+            print("FAIL: emf_mVC(out=) with %s Tref allocated %d bytes"%(
+                Tref, max(peaks)))
+            sys.exit(1)
+
+def main():
+    packed = Packed_Curves()
+    check_reference_range(packed)
+    check_out_allocations(packed)
+    rng = np.random.default_rng(0)
+    print("{:>8s} {:>9s} {:>14s} {:>14s} {:>8s}".format(
+        "types", "n", "per type (s)", "packed (s)", "speedup"))
+    for ntypes in [1, 4, len(packed.keys)]:
+        for n in [100, 10**4, 10**6]:
+            curve = rng.integers(0, ntypes, n)
+            lo = packed.minT.take(curve)
+            hi = packed.maxT.take(curve)
+            T = lo + (hi - lo)*rng.uniform(0., 1., n)
+            Tref = 0.
+            ref = per_type(packed, T, curve, Tref)
+            new = packed.emf_mVC(T, curve, Tref)
+            err = np.abs(new - ref).max()
+            if err > 1e-12:
+                print("FAIL: packed results differ by %g mV"%(err,))
+                sys.exit(1)
+            number = max(1, 10**5 // n)
+            t_old = best_time(lambda: per_type(packed, T, curve, Tref), number)
+            t_new = best_time(lambda: packed.emf_mVC(T, curve, Tref), number)
+            print("{:>8d} {:>9d} {:>14.3e} {:>14.3e} {:>7.2f}x".format(
+                ntypes, n, t_old, t_new, t_old/t_new))
+
+if __name__ == '__main__':
+    main()
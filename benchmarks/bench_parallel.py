@@ -0,0 +1,76 @@
+#!/usr/bin/python
+"""
+Scaling benchmark of Parallel_Converter: inverse lookup of a large type K
+array in one process, and with pools of 1, 2, 4, ... workers (up to twice
+the number of CPUs). Times include copying the data in and out of shared
+memory, but not starting the pool. Results are checked against the single
+process conversion. Finally, a float32 conversion between arrays made with
+Parallel_Converter.empty() must make no copy of the data (the script exits
+with an error if it does).
+
+Run from the repository root:
+    python benchmarks/bench_parallel.py [samples]
+"""
+
+import multiprocessing
+import sys
+import tracemalloc
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples
+from thermocouples_reference.parallel import Parallel_Converter
+
+def main():
+    N = int(float(sys.argv[1])) if len(sys.argv) > 1 else 4*10**6
+    tc = thermocouples['K']
+    T = np.random.default_rng(0).uniform(-200., 1300., N)
+    emf = tc.emf_mVC(T, 25.)
+    out = np.empty(N)
+
+    t_single = best_time(lambda: tc.inverse_CmV(emf, 25., out=out), 1, 3)
+    reference = out.copy()
+    print("{} samples, {} CPUs".format(N, multiprocessing.cpu_count()))
+    print("{:>8s} {:>10s} {:>14s} {:>8s}".format("workers", "time (s)", "samples/s", "speedup"))
+    print("{:>8s} {:>10.3f} {:>14.3e} {:>7.2f}x".format(
+        "single", t_single, N/t_single, 1.))
+    workers = 1
+    while workers <= 2*multiprocessing.cpu_count():
+        with Parallel_Converter('K', workers, chunk_size=1<<18) as conv:
+            conv.inverse(emf[:1000], Tref=25.)  # warm up the workers
+            t = best_time(lambda: conv.inverse(emf, Tref=25., out=out), 1, 3)
+        if not np.array_equal(out, reference):
+            print("FAIL: results differ from the single process conversion")
+            sys.exit(1)
+        print("{:>8d} {:>10.3f} {:>14.3e} {:>7.2f}x".format(
+            workers, t, N/t, t_single/t))
+        workers *= 2
+    check_in_place(tc, T)
+
+def check_in_place(tc, T):
+    """ float32 input and out= in shared memory: no copies, no upcast. """
+    N = T.size
+    with Parallel_Converter('K', 2, chunk_size=1<<18) as conv:
+        emf = conv.empty(N, np.float32)
+        emf[...] = tc.emf_mVC(T, 25.)
+        out = conv.empty(N, np.float32)
+        conv.inverse(emf[:1000], Tref=25.)  # warm up the workers
+        tracemalloc.start()
+        try:
+            conv.inverse(emf, Tref=25., out=out)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        err = np.abs(out - T).max()
+    print("in place, float32: peak {:.1f} kB traced for {:.1f} MB of data, "
+          "max error {:.1e} degC".format(peak/1e3, 2*emf.nbytes/1e6, err))
+    if peak > emf.nbytes // 10:
+        print("FAIL: the shared memory arrays were copied")
+        sys.exit(1)
+    if err > 0.1:
+        print("FAIL: wrong temperatures")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
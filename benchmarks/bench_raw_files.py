@@ -0,0 +1,85 @@
+#!/usr/bin/python
+"""
+Benchmark of out-of-core raw file conversion (raw_files.convert_raw_file):
+int16 ADC code files of increasing size are converted to float32
+temperature files, reporting throughput and the peak traced memory, which
+must not grow with the file size. Empty input files, flat or .npy, must give
+empty outputs. The script exits with an error if the memory grows, or if
+the results are wrong.
+
+Run from the repository root:
+    python benchmarks/bench_raw_files.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.raw_files import convert_raw_file
+
+SCALE = 0.0025  # mV per ADC code
+CHUNK = 1<<18
+
+def check_empty(tc, tmp):
+    """ Empty inputs (which cannot be memory mapped) give empty outputs. """
+    flat = os.path.join(tmp, 'empty.bin')
+    open(flat, 'wb').close()
+    npy = os.path.join(tmp, 'empty.npy')
+    np.save(npy, np.empty(0, 'int16'))
+    for infile in [flat, npy]:
+        for name in ['temps.npy', 'temps.bin']:
+            outfile = os.path.join(tmp, name)
+            stats = convert_raw_file(infile, outfile, tc, 'int16', SCALE)
+            size = (np.load(outfile).size if name.endswith('.npy')
+                    else os.path.getsize(outfile))
+            if stats['samples'] != 0 or size != 0:
+                print("FAIL: {} to {}: {} samples, output size {}".format(
+                    os.path.basename(infile), name, stats['samples'], size))
+                sys.exit(1)
+
+def main():
+    tc = thermocouples['K']
+    tmp = tempfile.mkdtemp()
+    try:
+        check_empty(tc, tmp)
+        peaks = []
+        print("{:>10s} {:>10s} {:>14s} {:>12s}".format(
+            "samples", "file (MB)", "samples/s", "peak (kB)"))
+        for N in [10**6, 4*10**6, 16*10**6]:
+            infile = os.path.join(tmp, 'log.bin')
+            outfile = os.path.join(tmp, 'temps.npy')
+            # Write the input in pieces, to keep this script's memory low too.
+            with open(infile, 'wb') as f:
+                for start in range(0, N, 10**6):
+                    T = 20. + 900.*(np.arange(start, min(start + 10**6, N)) % 1000)/1000.
+                    np.round(tc.emf_mVC(T, 23.)/SCALE).astype('<i2').tofile(f)
+            tracemalloc.start()
+            stats = convert_raw_file(infile, outfile, tc, 'int16', SCALE,
+                                     Tref=23., chunk_size=CHUNK)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            peaks.append(peak)
+            result = np.load(outfile, mmap_mode='r')
+            expected = 20. + 900.*(np.arange(1000) % 1000)/1000.
+            # ADC quantization of 2.5 uV is about 0.1 degC.
+            if np.abs(result[:1000] - expected).max() > 0.2:
+                print("FAIL: wrong temperatures")
+                sys.exit(1)
+            del result
+            print("{:>10d} {:>10.1f} {:>14.3e} {:>12.1f}".format(
+                N, N*2/1e6, stats['samples_per_s'], peak/1e3))
+        if max(peaks) > 2*min(peaks):
+            print("FAIL: peak memory grows with the file size")
+            sys.exit(1)
+        print("OK: peak memory does not depend on the file size")
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    main()
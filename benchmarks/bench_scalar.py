@@ -0,0 +1,45 @@
+#!/usr/bin/python
+"""
+Microbenchmark of single-reading conversions with Python floats, which take
+the scalar fast path, against the same conversions on 1-element arrays.
+
+Latency targets for the scalar path on a modern CPU:
+    emf_mVC(float)      under 10 us per call
+    inverse_CmV(float)  under 50 us per call
+
+Run from the repository root:
+    python benchmarks/bench_scalar.py
+"""
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples
+
+target_emf_us = 10.
+target_inverse_us = 50.
+
+def main():
+    print("{:<12s} {:>12s} {:>12s} {:>12s}".format(
+        "type", "emf (us)", "emf arr(us)", "inv (us)"))
+    worst_emf = worst_inv = 0.
+    for key in sorted(thermocouples):
+        tc = thermocouples[key]
+        # a reading in the upper part of the range (type B is not
+        # invertible near 0 degC)
+        T = tc.minT_C + 0.7*(tc.maxT_C - tc.minT_C)
+        Tref = min(max(25., tc.minT_C), tc.maxT_C)
+        emf = tc.emf_mVC(T, Tref=Tref)
+        Tarr = np.array([T])
+        t_emf = 1e6*best_time(lambda: tc.emf_mVC(T, Tref=Tref), 2000)
+        t_emf_arr = 1e6*best_time(lambda: tc.func(Tarr) - tc.func(Tarr*0 + Tref), 2000)
+        t_inv = 1e6*best_time(lambda: tc.inverse_CmV(emf, Tref=Tref), 500)
+        worst_emf = max(worst_emf, t_emf)
+        worst_inv = max(worst_inv, t_inv)
+        print("{:<12s} {:>12.2f} {:>12.2f} {:>12.2f}".format(
+            key, t_emf, t_emf_arr, t_inv))
+    print("worst scalar emf_mVC:     {:.2f} us (target {:.0f} us)".format(worst_emf, target_emf_us))
+    print("worst scalar inverse_CmV: {:.2f} us (target {:.0f} us)".format(worst_inv, target_inverse_us))
+
+if __name__ == '__main__':
+    main()
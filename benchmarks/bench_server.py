@@ -0,0 +1,80 @@
+#!/usr/bin/python
+"""
+Benchmark of the conversion service (thermocouples_reference.server): many
+concurrent clients, each sending single-reading requests one after the
+other over TCP, with micro-batching off (window=None) and on. Results are
+checked against direct calls, and the batching metrics are printed.
+
+Run from the repository root:
+    python benchmarks/bench_server.py
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.server import serve
+
+CLIENTS = 200
+REQUESTS = 25
+TYPES = ['K', 'J', 'T', 'N']
+
+async def client(port, n):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    key = TYPES[n % len(TYPES)]
+    worst = 0.
+    for i in range(REQUESTS):
+        T = 20. + n + 0.1*i
+        emf = thermocouples[key].emf_mVC(T, 23.)
+        writer.write((json.dumps({'id': i, 'op': 'inverse', 'type': key,
+                                  'values': emf, 'Tref': 23.}) + '\n').encode())
+        response = json.loads(await reader.readline())
+        assert response['id'] == i, response
+        worst = max(worst, abs(response['result'] - T))
+    writer.close()
+    await writer.wait_closed()
+    return worst
+
+async def run(window):
+    server, batcher = await serve(port=0, window=window)
+    port = server.sockets[0].getsockname()[1]
+    t0 = time.perf_counter()
+    worst = max(await asyncio.gather(*[client(port, n) for n in range(CLIENTS)]))
+    elapsed = time.perf_counter() - t0
+
+    # An out of range request in a batch must only fail by itself.
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i, value in enumerate([1.0, 1e3, 2.0]):
+        writer.write((json.dumps({'id': i, 'op': 'inverse', 'type': 'K',
+                                  'values': value}) + '\n').encode())
+    responses = sorted([json.loads(await reader.readline()) for i in range(3)],
+                       key=lambda r: r['id'])
+    assert 'result' in responses[0] and 'error' in responses[1] \
+            and 'result' in responses[2], responses
+    writer.write(b'{"op": "metrics"}\n')
+    metrics = json.loads(await reader.readline())['result']
+    writer.close()
+    await writer.wait_closed()
+    await asyncio.sleep(0.01)  # let the server see the connections close
+    server.close()
+    await server.wait_closed()
+    return elapsed, worst, metrics
+
+def main():
+    n = CLIENTS*REQUESTS
+    for window in [None, 0., 0.002]:
+        elapsed, worst, metrics = asyncio.run(run(window))
+        print("window={!s:<6s} {:8.3f} s, {:8.0f} requests/s, max error {:.1e} degC".format(
+            window, elapsed, n/elapsed, worst))
+        print("    batches {batches}, mean batch size {mean_batch_size:.1f}, "
+              "max batch size {max_batch_size}, max queue depth {max_queue_depth}, "
+              "vectorized calls {calls}".format(**metrics))
+        if worst > 1e-6:
+            print("FAIL: wrong temperatures")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/python
+"""
+Inverse lookup statistics (enable_stats) for every thermocouple: voltages
+spread over each curve's range are solved, one float at a time and as an
+array, and the iterations per value, fallbacks and time are reported, with
+the slowest branch of each curve. The cost of the bookkeeping on a scalar
+inverse, enabled and disabled, is printed last.
+
+Run from the repository root:
+    python benchmarks/bench_stats.py
+"""
+
+import numpy as np
+
+from _common import best_time
+from thermocouples_reference import thermocouples
+
+def main():
+    print("{:<12s} {:>8s} {:>10s} {:>10s} {:>10s}   {}".format(
+        "type", "values", "iter/value", "fallbacks", "us/value", "slowest branch (mV)"))
+    for key in sorted(thermocouples):
+        tc = thermocouples[key]
+        func = tc.func
+        vmin = min(v for br in func.branches for v in br[2:4])
+        vmax = max(v for br in func.branches for v in br[2:4])
+        V = np.linspace(vmin, vmax, 10002)[1:-1]
+        tc.enable_stats()
+        for v in V[::100].tolist():
+            tc.inverse_CmV(v)
+        tc.inverse_CmV(V)
+        stats = tc.stats
+        tc.enable_stats(False)
+        per_branch = stats['branch_iterations']
+        b = int(np.argmax(per_branch))
+        tlo, thi, vlo, vhi, inc = func.branches[b]
+        print("{:<12s} {:>8d} {:>10.2f} {:>10d} {:>10.2f}   {:.4g} to {:.4g}".format(
+            key, stats['values'], stats['iterations']/stats['values'],
+            stats['fallbacks'], 1e6*stats['seconds']/stats['values'],
+            min(vlo, vhi), max(vlo, vhi)))
+
+    func = thermocouples['K'].func
+    times = []
+    for enable in [False, True]:
+        func.enable_stats(enable)
+        times.append(best_time(lambda: func.inverse(10.), 10000))
+    func.enable_stats(False)
+    print("scalar inverse: {:.2f} us without statistics, {:.2f} us with".format(
+        1e6*times[0], 1e6*times[1]))
+
+if __name__ == '__main__':
+    main()
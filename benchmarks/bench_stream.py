@@ -0,0 +1,80 @@
+#!/usr/bin/python
+"""
+Benchmark of Stream_Converter on a long, slowly varying type K signal fed
+in chunks from a generator: throughput with and without warm starting, and
+the peak traced memory, which must stay bounded by the chunk size rather
+than grow with the length of the stream. It also streams single samples of
+a mixed-type Channel_Map, checking that the warm start is kept per channel.
+The script exits with an error if the memory is not bounded, or if the
+results are wrong.
+
+Run from the repository root:
+    python benchmarks/bench_stream.py
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples, Channel_Map
+from thermocouples_reference.streaming import Stream_Converter
+
+CHUNK = 10**4
+CHUNKS = 300
+
+def feed(tc):
+    """ A furnace near 1200 degC, with the cold junction drifting slowly. """
+    for i in range(CHUNKS):
+        t = np.arange(i*CHUNK, (i + 1)*CHUNK) * 1e-4
+        cjc = 23. + 0.01*i
+        yield tc.emf_mVC(1200. + 5.*np.sin(t), cjc), cjc
+
+def run(tc, warm_start):
+    stream = Stream_Converter(tc)
+    worst = 0.
+    t0 = time.perf_counter()
+    for i, T in enumerate(stream.inverse(feed(tc), warm_start)):
+        t = np.arange(i*CHUNK, (i + 1)*CHUNK) * 1e-4
+        worst = max(worst, np.abs(T - (1200. + 5.*np.sin(t))).max())
+    return time.perf_counter() - t0, worst
+
+def main():
+    tc = thermocouples['K']
+    samples = CHUNK*CHUNKS
+    for warm_start in [False, True]:
+        elapsed, worst = run(tc, warm_start)
+        print("warm_start={!s:<5s}: {:8.3f} s for {} samples ({:.2e} samples/s), max error {:.1e} degC".format(
+            warm_start, elapsed, samples, samples/elapsed, worst))
+        if worst > 1e-6:
+            print("FAIL: wrong temperatures")
+            sys.exit(1)
+
+    channels = Channel_Map(['K', 'B', 'T', 'S'])
+    T0 = np.array([500., 1200., 100., 900.])
+    stream = Stream_Converter(channels)
+    for i, T in enumerate(stream.inverse(channels.convert(T0 + 0.01*i)
+                                         for i in range(100))):
+        pass
+    print("one sample per chunk on {}: Tlast = {}".format(channels, stream.Tlast))
+    if np.shape(stream.Tlast) != T0.shape or not np.allclose(
+            stream.Tlast, T0 + 0.01*i, rtol=0, atol=1e-6):
+        print("FAIL: warm start not kept per channel")
+        sys.exit(1)
+
+    tracemalloc.start()
+    for T in Stream_Converter(tc).inverse(feed(tc)):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    limit = 64 * CHUNK * 8
+    print("peak traced memory: {:.1f} kB for a {:.1f} MB stream".format(
+        peak/1e3, samples*8/1e6))
+    if peak > limit:
+        print("FAIL: peak memory above {} bytes".format(limit))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
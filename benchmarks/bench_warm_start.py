@@ -0,0 +1,51 @@
+#!/usr/bin/python
+"""
+Benchmark of Warm_Start_Inverse on slowly varying multi-channel signals,
+read one sample (of every channel) at a time, as in a control loop: mean
+iterations and time per call, with and without warm starting.
+
+Run from the repository root:
+    python benchmarks/bench_warm_start.py
+"""
+
+import time
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.warm_start import Warm_Start_Inverse
+
+def signals(samples, channels):
+    t = np.linspace(0., 60., samples)[:, None]
+    base = np.linspace(100., 1250., channels)[None, :]
+    return base + 3.*np.sin(t + np.arange(channels)) + 0.01*t
+
+def run(tc, emf, T, warm):
+    inv = Warm_Start_Inverse(tc)
+    t0 = time.perf_counter()
+    for row in emf:
+        if not warm:
+            inv.reset()
+        result = inv(row, Tref=25.)
+    elapsed = time.perf_counter() - t0
+    assert np.allclose(result, T[-1], atol=1e-6)
+    return inv.mean_iterations, elapsed / len(emf)
+
+def main():
+    print("{:<6s} {:>8s} {:>10s} {:>10s} {:>12s} {:>12s}".format(
+        "type", "channels", "iters cold", "iters warm", "cold (us)", "warm (us)"))
+    for key in ['K', 'N', 'B']:
+        tc = thermocouples[key]
+        for channels in [1, 16]:
+            T = signals(2000, channels)
+            if key == 'B':
+                T += 400.
+            emf = tc.emf_mVC(T, 25.)
+            cold = run(tc, emf, T, False)
+            warm = run(tc, emf, T, True)
+            print("{:<6s} {:>8d} {:>10.2f} {:>10.2f} {:>12.1f} {:>12.1f}".format(
+                key, channels, cold[0], warm[0], cold[1]*1e6, warm[1]*1e6))
+
+if __name__ == '__main__':
+    main()
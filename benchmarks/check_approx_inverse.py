@@ -0,0 +1,61 @@
+#!/usr/bin/python
+"""
+Check that the maximum errors stated by the approximate inverses (see
+Polynomial_Gaussian_Piecewise_Function.inverse_approx) are upper bounds of
+the errors actually made, for every thermocouple and a few max_error
+settings.
+
+The approximations are compared with the temperatures they came from on a
+grid of a few million points over the invertible range. Temperatures whose
+emf falls within one of the tiny jumps where the pieces of the emf function
+meet are left out: those voltages have two solutions, one on each side of
+the breakpoint. The script exits with an error if any stated bound is
+exceeded.
+
+Run from the repository root:
+    python benchmarks/check_approx_inverse.py
+"""
+
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.validation import invertible_range
+
+POINTS = 4*10**6
+
+def measured_error(func, approx):
+    tlo, thi = invertible_range(func)
+    T = np.linspace(tlo, thi, POINTS)
+    V = func(T)
+    keep = np.ones(T.size, bool)
+    for i, b in enumerate(func._breaks):
+        va = func._eval_piece(i, np.array(b), 0)
+        vb = func._eval_piece(i+1, np.array(b), 0)
+        keep &= ~((V >= min(va, vb)) & (V <= max(va, vb)))
+    return np.nanmax(np.abs(approx(V[keep], out_of_range="nan") - T[keep]))
+
+def main():
+    failures = []
+    print("{:<12s} {:>10s} {:>12s} {:>12s}".format(
+        "type", "target", "stated", "measured"))
+    for key in sorted(thermocouples):
+        func = thermocouples[key].func
+        for target in [1e-2, 1e-3, 1e-4]:
+            approx = func.approx_inverse(target)
+            err = measured_error(func, approx)
+            print("{:<12s} {:>10.0e} {:>12.4e} {:>12.4e}".format(
+                key, target, approx.max_error, err))
+            if err > approx.max_error:
+                failures.append((key, target, approx.max_error, err))
+    if failures:
+        for key, target, stated, err in failures:
+            print("FAIL: type {} max_error={:g}: stated {:.4e}, measured "
+                  "{:.4e}".format(key, target, stated, err))
+        sys.exit(1)
+    print("OK: every stated maximum error is an upper bound")
+
+if __name__ == '__main__':
+    main()
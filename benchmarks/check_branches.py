@@ -0,0 +1,109 @@
+#!/usr/bin/python
+"""
+Check the index of monotonic branches and the branch= policy of inverse
+lookup (see Polynomial_Gaussian_Piecewise_Function.branches and inverse).
+
+For every thermocouple, the branches must cover the function's range
+without gaps, and the emf must be monotonic on each, in the stated
+direction. On type B, whose emf has a minimum near 21 degC, voltages
+between that minimum and 0 mV have two solutions: branch='high' must
+return the one above the minimum, branch='low' the one below, and
+branch='raise' must raise ValueError, for arrays and single values alike.
+Voltages with one solution must give the same temperature under all three
+policies, on every curve, and voltages below the minimum must raise. The
+script exits with an error if not.
+
+Run from the repository root:
+    python benchmarks/check_branches.py
+"""
+
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+
+VTOL = 1e-6
+
+def raises(fn):
+    try:
+        fn()
+    except ValueError:
+        return True
+    return False
+
+def branch_differences(tc):
+    """ Yield a description of each problem with the branches of tc. """
+    func = tc.func
+    branches = func.branches
+    if branches[0][0] != func.minT or branches[-1][1] != func.maxT:
+        yield "branches do not cover %g to %g"%(func.minT, func.maxT)
+    for (tlo, thi, vlo, vhi, inc), nxt in zip(branches, branches[1:] + [None]):
+        if nxt is not None and nxt[0] != thi:
+            yield "gap between branches at %g and %g"%(thi, nxt[0])
+        V = func(np.linspace(tlo, thi, 1001))
+        dV = np.diff(V) if inc else -np.diff(V)
+        if np.any(dV < -1e-12):
+            yield "branch %g to %g is not monotonic"%(tlo, thi)
+
+def policy_differences(tc):
+    """ Voltages with one solution: the same answer whatever the policy. """
+    func = tc.func
+    T = np.linspace(func.minT, func.maxT, 501)
+    if tc.type == 'Type B':
+        # (one solution only where the emf is above 0, from about 42 degC)
+        T = T[T > 50.]
+    V = func(T)
+    results = [tc.inverse_CmV(V, branch=b) for b in ['high', 'low', 'raise']]
+    if not (np.array_equal(results[0], results[1]) and
+            np.array_equal(results[0], results[2])):
+        yield "branch policies disagree on voltages with one solution"
+    below = min(br[2] for br in func.branches) - 1e-3
+    for b in ['high', 'low', 'raise']:
+        if not raises(lambda: tc.inverse_CmV(below, branch=b)):
+            yield "branch=%r: no error below the range"%(b,)
+
+def type_B_differences():
+    """ The two solutions between type B's minimum and 0 mV. """
+    tc = thermocouples['B']
+    func = tc.func
+    (tlo, tmin, v0, vmin, inc), = [br for br in func.branches if not br[4]]
+    V = vmin + (v0 - vmin)*np.linspace(0.05, 0.95, 19)
+    for b, lo, hi in [('high', tmin, 50.), ('low', 0., tmin)]:
+        for name, T in [('array', tc.inverse_CmV(V, branch=b)),
+                        ('scalar', np.array([tc.inverse_CmV(v, branch=b)
+                                             for v in V.tolist()]))]:
+            bad = np.flatnonzero(~((T > lo) & (T < hi)))
+            if bad.size:
+                yield "branch=%r, %s: %d temperatures not within %g to %g, e.g. %r"%(
+                    b, name, bad.size, lo, hi, T[bad[0]])
+            err = np.abs(func(T) - V).max()
+            if err > VTOL:
+                yield "branch=%r, %s: emf off by %g"%(b, name, err)
+    if not raises(lambda: tc.inverse_CmV(V, branch='raise')):
+        yield "branch='raise', array: no error"
+    for v in V.tolist():
+        if not raises(lambda: tc.inverse_CmV(v, branch='raise')):
+            yield "branch='raise', scalar: no error for %g mV"%(v,)
+            break
+
+def main():
+    failures = []
+    for key in sorted(thermocouples):
+        tc = thermocouples[key]
+        for msg in branch_differences(tc):
+            failures.append((key, msg))
+        for msg in policy_differences(tc):
+            failures.append((key, msg))
+    for msg in type_B_differences():
+        failures.append(('B', msg))
+    if failures:
+        for key, msg in failures:
+            print("FAIL: type {} {}".format(key, msg))
+        sys.exit(1)
+    print("OK: branch index and branch policies correct for all {} types".format(
+        len(thermocouples)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+"""
+Check the fused evaluation of the function and its derivatives (see
+Polynomial_Gaussian_Piecewise_Function.derivatives) against separate calls
+with derivative=0..3, and those against the scalar path and against finite
+differences of the next lower order, for every thermocouple.
+
+The temperatures span each function's range, including its breakpoints.
+The script exits with an error if the fused and separate results differ by
+more than RTOL of the largest value on the curve, or if a derivative does
+not match its finite difference.
+
+Run from the repository root:
+    python benchmarks/check_derivatives.py
+"""
+
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+
+# The fused recurrence rounds differently from Horner's scheme on the
+# differentiated coefficients; on the high degree polynomials of some curves
+# (T, AuFe) the results differ by up to about 1e-10 of the curve's scale.
+RTOL = 1e-9
+
+def differences(tc):
+    """ Yield a description of each disagreement, for thermocouple tc. """
+    func = tc.func
+    T = np.concatenate([np.linspace(func.minT, func.maxT, 2001), func._breaks])
+    fused = func.derivatives(T, 3)
+    separate = [func(T, d) for d in range(4)]
+    for d in range(4):
+        scale = np.abs(separate[d]).max() + 1e-300
+        err = np.abs(fused[d] - separate[d]).max()
+        if err > RTOL*scale:
+            yield "derivative %d: fused differs by %g (scale %g)"%(d, err, scale)
+        scalar = np.array([func.eval_scalar(t, d) for t in T[::50].tolist()])
+        err = np.abs(scalar - separate[d][::50]).max()
+        if err > RTOL*scale:
+            yield "derivative %d: scalar path differs by %g"%(d, err)
+    if not np.array_equal(tc.emf_mVC(T, derivative=1), separate[1]):
+        yield "emf_mVC(derivative=1) differs from func(T, 1)"
+
+    # Central differences, away from the breakpoints and the ends, where the
+    # pieces are smooth.
+    h = 1e-3
+    Tc = np.linspace(func.minT, func.maxT, 203)[1:-1]
+    near = np.abs(Tc[:, None] - np.append(func._breaks, [func.minT, func.maxT])).min(axis=1)
+    Tc = Tc[near > 10*h]
+    for d in range(1, 4):
+        lower = func(Tc + h, d-1, "extrapolate") - func(Tc - h, d-1, "extrapolate")
+        lower /= 2*h
+        value = func(Tc, d)
+        tol = 1e-5*np.abs(value).max() + 1e-9*np.abs(func(Tc, d-1)).max()/h
+        err = np.abs(lower - value).max()
+        if err > tol:
+            yield "derivative %d: finite difference differs by %g > %g"%(d, err, tol)
+
+def main():
+    failures = []
+    for key in sorted(thermocouples):
+        for msg in differences(thermocouples[key]):
+            failures.append((key, msg))
+    if failures:
+        for key, msg in failures:
+            print("FAIL: type {} {}".format(key, msg))
+        sys.exit(1)
+    print("OK: fused, separate and scalar derivatives agree for all {} types".format(
+        len(thermocouples)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+"""
+Check the round trip of inverse lookup (see
+Polynomial_Gaussian_Piecewise_Function.inverse) for every thermocouple:
+the emfs of a grid of temperatures spanning the whole range are converted
+back, as one array (bigger than an evaluation block, so that it is solved
+block by block) and one value at a time.
+
+Every result must give back its emf to within Vtol, for a few Vtol
+settings and also with a given Tstart far from the solution. On the
+range where the inverse is unique (see validation.invertible_range) the
+array and scalar results must also agree with the original temperatures,
+to within the temperature step that Vtol allows. The script exits with an
+error if not.
+
+Run from the repository root:
+    python benchmarks/check_inverse.py
+"""
+
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.function_types import _block_size
+from thermocouples_reference.validation import invertible_range
+
+POINTS = 3*_block_size + 1
+
+def differences(tc):
+    """ Yield a description of each failed round trip, for thermocouple tc. """
+    func = tc.func
+    T = np.linspace(func.minT, func.maxT, POINTS)
+    V = func(T)
+    tlo, thi = invertible_range(func)
+    unique = (T >= tlo) & (T <= thi)
+    S = np.abs(func(T, 1)) + 1e-300
+    for Vtol in [1e-6, 1e-9]:
+        # Temperatures within Vtol of the emf, plus rounding of T.
+        Ttol = 2*Vtol/S + 1e-9*np.abs(T).max()
+        for name, Tstart in [("", None),
+                             (", Tstart", np.full(T.shape, func.maxT))]:
+            T2 = tc.inverse_CmV(V, Tstart=Tstart, Vtol=Vtol)
+            err = np.abs(func(T2, out_of_range="extrapolate") - V).max()
+            if err > Vtol:
+                yield "array%s, Vtol=%g: emf off by %g"%(name, Vtol, err)
+            bad = np.flatnonzero(unique & (np.abs(T2 - T) > Ttol))
+            if bad.size:
+                yield "array%s, Vtol=%g: %d temperatures off, e.g. %r for %r"%(
+                    name, Vtol, bad.size, T2[bad[0]], T[bad[0]])
+        sub = slice(None, None, 97)
+        T1 = np.array([tc.inverse_CmV(v, Vtol=Vtol) for v in V[sub].tolist()])
+        err = np.abs(func(T1, out_of_range="extrapolate") - V[sub]).max()
+        if err > Vtol:
+            yield "scalar, Vtol=%g: emf off by %g"%(Vtol, err)
+        bad = np.flatnonzero(unique[sub] & (np.abs(T1 - T[sub]) > Ttol[sub]))
+        if bad.size:
+            yield "scalar, Vtol=%g: %d temperatures off, e.g. %r for %r"%(
+                Vtol, bad.size, T1[bad[0]], T[sub][bad[0]])
+
+def main():
+    failures = []
+    for key in sorted(thermocouples):
+        for msg in differences(thermocouples[key]):
+            failures.append((key, msg))
+    if failures:
+        for key, msg in failures:
+            print("FAIL: type {} {}".format(key, msg))
+        sys.exit(1)
+    print("OK: inverse lookup gives back every emf within Vtol, for all {} "
+          "types".format(len(thermocouples)))
+
+if __name__ == '__main__':
+    main()
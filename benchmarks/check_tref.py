@@ -0,0 +1,92 @@
+#!/usr/bin/python
+"""
+Check per-reading reference junction temperatures (array Tref arguments of
+emf_mVC and inverse_CmV) against a loop of calls with a scalar Tref, for
+every thermocouple.
+
+The reference temperatures come in runs of equal values (which are looked up
+once per run in the memo of reference emfs), or change at every reading
+(which are evaluated as an array), or are given per row of a 2-d array of
+readings. The arrays are bigger than an evaluation block, and are also
+converted with out=. The emfs must agree with the loop to a few ulps, and
+the temperatures to within the step that Vtol allows. The script exits with
+an error if not.
+
+Run from the repository root:
+    python benchmarks/check_tref.py
+"""
+
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.function_types import _block_size
+from thermocouples_reference.validation import invertible_range
+
+N = _block_size + 1000
+VTOL = 1e-6
+
+def cases(func):
+    """ List of (name, T, Tref), with Tref an array broadcast against T. """
+    tlo, thi = invertible_range(func)
+    rng = np.random.default_rng(0)
+    T = rng.uniform(tlo, thi, N)
+    # a cold junction in the lower tenth of the range
+    cjc = tlo + 0.1*(thi - tlo)*rng.uniform(0., 1., N)
+    runs = np.repeat(cjc[:4], N//4 + 1)[:N]
+    return [("runs", T, runs),
+            ("varying", T, cjc),
+            ("per row", T.reshape(-1, 8)[:N//8], cjc[:N//8, None])]
+
+def differences(tc):
+    """ Yield a description of each disagreement, for thermocouple tc. """
+    func = tc.func
+    for name, T, Tref in cases(func):
+        Tb, Trefb = np.broadcast_arrays(T, Tref)
+        emf = np.array([tc.emf_mVC(t, r) for t, r in
+                        zip(Tb.ravel().tolist(), Trefb.ravel().tolist())]
+                       ).reshape(Tb.shape)
+        tol = 1e-13*np.abs(emf).max()
+        out = np.empty(Tb.shape)
+        tc.emf_mVC(T, Tref, out=out)
+        for how, E in [("", tc.emf_mVC(T, Tref)), (", out=", out)]:
+            err = np.abs(E - emf).max()
+            if err > tol:
+                yield "emf_mVC, %s Tref%s: differs from the loop by %g"%(
+                    name, how, err)
+
+        loop = np.array([tc.inverse_CmV(e, r, Vtol=VTOL) for e, r in
+                         zip(emf.ravel().tolist(), Trefb.ravel().tolist())]
+                        ).reshape(Tb.shape)
+        Ttol = 2*VTOL/np.abs(func(Tb, 1)) + 1e-9*np.abs(Tb).max()
+        try:
+            T2 = tc.inverse_CmV(emf, Tref, Vtol=VTOL)
+            tc.inverse_CmV(emf, Tref, Vtol=VTOL, out=out)
+        except ValueError as e:
+            yield "inverse_CmV, %s Tref: %s"%(name, e.args[0])
+            continue
+        for how, T2 in [("", T2), (", out=", out)]:
+            bad = np.flatnonzero(np.abs(T2 - loop) > Ttol)
+            if bad.size:
+                yield "inverse_CmV, %s Tref%s: %d temperatures differ from the loop"%(
+                    name, how, bad.size)
+            err = np.abs(tc.emf_mVC(T2, Tref) - emf).max()
+            if err > VTOL + tol:
+                yield "inverse_CmV, %s Tref%s: emf off by %g"%(name, how, err)
+
+def main():
+    failures = []
+    for key in sorted(thermocouples):
+        for msg in differences(thermocouples[key]):
+            failures.append((key, msg))
+    if failures:
+        for key, msg in failures:
+            print("FAIL: type {} {}".format(key, msg))
+        sys.exit(1)
+    print("OK: array Tref agrees with a loop over scalar Tref for all {} "
+          "types".format(len(thermocouples)))
+
+if __name__ == '__main__':
+    main()
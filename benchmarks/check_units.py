@@ -0,0 +1,96 @@
+#!/usr/bin/python
+"""
+Check conversions in other units (see Thermocouple_Reference.convert and
+inverse, whose unit conversions are folded into the polynomial coefficients)
+against the same conversions in degC and mV, scaled by hand, for every
+thermocouple.
+
+For every temperature unit (C, F, K, R) and voltage unit (V, mV, uV), the
+emfs with the default and with a given reference junction temperature, and
+the Seebeck coefficients, must agree with the degC/mV ones to within 1e-9
+mV (scaled to the voltage unit); the emf_mV* and inverse_*mV shortcuts must
+give the same results as convert and inverse. Inverse lookups in every
+unit, with the default Vtol (1 nV, scaled), must give back the emfs to
+within that Vtol, and the temperatures to within the step it allows except
+at the breakpoints of the curves: where the pieces meet, the emf jumps by a
+tiny amount, and voltages within the jump have a solution on each side. The
+script exits with an error if not.
+
+Run from the repository root:
+    python benchmarks/check_units.py
+"""
+
+import sys
+
+import numpy as np
+
+import _common  # puts the repository root on sys.path
+from thermocouples_reference import thermocouples
+from thermocouples_reference.validation import invertible_range
+
+# Temperature in each unit is mul*T + add, T in degC.
+TUNITS = {'C': (1., 0.), 'F': (1.8, 32.), 'K': (1., 273.15), 'R': (1.8, 491.67)}
+# Voltage in each unit is scale*V, V in mV.
+VUNITS = {'V': 1e-3, 'mV': 1., 'uV': 1e3}
+
+TOL = 1e-9  # mV
+VTOL = 1e-6  # mV, the default tolerance of inverse lookup
+
+def differences(tc):
+    """ Yield a description of each disagreement, for thermocouple tc. """
+    tlo, thi = invertible_range(tc.func)
+    T = np.linspace(tlo, thi, 2001)
+    Tref = 0.5*(tlo + thi)
+    emf0 = tc.emf_mVC(T)
+    emf = tc.emf_mVC(T, Tref)
+    seebeck = tc.emf_mVC(T, derivative=1)
+    breaks = np.append(tc.func._breaks, np.inf)
+    smooth = np.abs(np.subtract.outer(T, breaks)).min(axis=1) > 1e-3
+    for Tunit, (mul, add) in sorted(TUNITS.items()):
+        Tu = mul*T + add
+        for Vunit, scale in sorted(VUNITS.items()):
+            for what, new, ref in [
+                    ("emf", tc.convert(Tu, Tunit, Vunit), emf0*scale),
+                    ("emf with Tref", tc.convert(Tu, Tunit, Vunit, mul*Tref + add),
+                     emf*scale),
+                    ("derivative", tc.convert(Tu, Tunit, Vunit, derivative=1),
+                     seebeck*scale/mul)]:
+                err = np.abs(new - ref).max()
+                if err > TOL*scale:
+                    yield "%s in %s, %s: differs by %g %s"%(
+                        what, Tunit, Vunit, err, Vunit)
+
+            V = emf*scale
+            T2 = tc.inverse(V, Tunit, Vunit, mul*Tref + add)
+            err = np.abs(tc.convert(T2, Tunit, Vunit, mul*Tref + add) - V).max()
+            if err > (VTOL + TOL)*scale:
+                yield "inverse in %s, %s: emf off by %g %s"%(Tunit, Vunit, err, Vunit)
+            Ttol = mul*(2*VTOL/(np.abs(seebeck) + 1e-300)) + 1e-9*np.abs(Tu).max()
+            bad = np.flatnonzero(smooth & (np.abs(T2 - Tu) > Ttol))
+            if bad.size:
+                yield "inverse in %s, %s: %d temperatures off, e.g. %r for %r"%(
+                    Tunit, Vunit, bad.size, T2[bad[0]], Tu[bad[0]])
+
+        # the shortcuts
+        Tr = mul*Tref + add
+        emf_mV = getattr(tc, 'emf_mV' + Tunit)
+        inverse_mV = getattr(tc, 'inverse_' + Tunit + 'mV')
+        if not np.array_equal(emf_mV(Tu, Tr), tc.convert(Tu, Tunit, 'mV', Tr)):
+            yield "emf_mV%s differs from convert"%(Tunit,)
+        if not np.array_equal(inverse_mV(emf, Tr), tc.inverse(emf, Tunit, 'mV', Tr)):
+            yield "inverse_%smV differs from inverse"%(Tunit,)
+
+def main():
+    failures = []
+    for key in sorted(thermocouples):
+        for msg in differences(thermocouples[key]):
+            failures.append((key, msg))
+    if failures:
+        for key, msg in failures:
+            print("FAIL: type {} {}".format(key, msg))
+        sys.exit(1)
+    print("OK: conversions in every unit agree with degC and mV for all {} "
+          "types".format(len(thermocouples)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/python
+"""
+Benchmark suite for the thermocouple reference functions. For every key in
+thermocouples_reference.thermocouples, it times:
+
+- forward evaluation (emf_mVC) at derivative orders 0 to 3
+- emf_mVC with each out_of_range mode
+- every unit variant, emf_mV[CFKR] and inverse_[CFKR]mV
+- inverse lookup of a Python float, and of arrays of each size
+- and, once, the package import time and the first thermocouple lookup.
+
+Array sizes are given as powers of ten (--sizes, default 0,2,4,6; use
+--sizes 0,1,2,3,4,5,6,7 for the full range, which takes a while). Each
+case is timed as the best of several repeats of enough calls to last
+--min-time seconds, and reported in seconds per call.
+
+Results are written as JSON (--output), and can be compared with a
+baseline file written by an earlier run (--baseline): cases slower than the
+baseline by more than --tolerance are listed, and the script then exits with
+status 1. Baselines only make sense on the machine they were made on, so
+keep one per release machine, for example:
+
+    python benchmarks/suite.py --output baseline.json
+    ... change function_types.py ...
+    python benchmarks/suite.py --baseline baseline.json
+
+A run with the default sizes takes about three minutes. Run from the
+repository root.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from _common import root, time_call
+from thermocouples_reference import thermocouples
+
+# Conversions from degrees Celsius, as in thermocouples_reference.units.
+UNITS = {'C': lambda T: T,
+         'F': lambda T: T*1.8 + 32.,
+         'K': lambda T: T + 273.15,
+         'R': lambda T: T*1.8 + 491.67}
+
+def cases(key, sizes):
+    """ Yield (name, function) of the benchmark cases of thermocouple key. """
+    tc = thermocouples[key]
+    lo, hi = tc.minT_C, tc.maxT_C
+    span = hi - lo
+    Tref_C = min(max(0., lo), hi)
+    for n in sizes:
+        # Temperatures within the range, and their emfs from Tref_C.
+        T = np.linspace(lo + 1e-3*span, hi - 1e-3*span, n)
+        for d in range(4):
+            yield ("%s.emf_mVC.d%d.n%d"%(key, d, n),
+                   lambda T=T, d=d: tc.emf_mVC(T, Tref_C, derivative=d))
+        for mode in ["raise", "nan", "extrapolate"]:
+            yield ("%s.emf_mVC.%s.n%d"%(key, mode, n),
+                   lambda T=T, mode=mode: tc.emf_mVC(T, Tref_C, out_of_range=mode))
+        for unit, to_unit in sorted(UNITS.items()):
+            Tu = to_unit(T)
+            Tref = to_unit(Tref_C)
+            emf = getattr(tc, 'emf_mV' + unit)(Tu, Tref)
+            yield ("%s.emf_mV%s.n%d"%(key, unit, n),
+                   lambda Tu=Tu, Tref=Tref, unit=unit: getattr(tc, 'emf_mV' + unit)(Tu, Tref))
+            yield ("%s.inverse_%smV.n%d"%(key, unit, n),
+                   lambda emf=emf, Tref=Tref, unit=unit: getattr(tc, 'inverse_%smV'%unit)(emf, Tref))
+    Tmid = 0.5*(lo + hi)
+    emf = float(tc.emf_mVC(Tmid, Tref_C))
+    yield ("%s.emf_mVC.scalar"%(key,), lambda: tc.emf_mVC(Tmid, Tref_C))
+    yield ("%s.inverse_CmV.scalar"%(key,), lambda: tc.inverse_CmV(emf, Tref_C))
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, %r)
+t0 = time.perf_counter()
+import thermocouples_reference
+t1 = time.perf_counter()
+thermocouples_reference.thermocouples['K']
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+def import_times(repeat=5):
+    """ Best package import and first lookup times, in fresh interpreters. """
+    # numpy is imported first, as its import time is paid anyway.
+    snippet = "import numpy\n" + IMPORT_SNIPPET % os.path.abspath(root)
+    runs = []
+    for i in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', snippet])
+        runs.append([float(x) for x in out.split()])
+    return [min(col) for col in zip(*runs)]
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=root,
+                    stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, tolerance):
+    """ Print the comparison with a baseline; return the regressed cases. """
+    regressions = []
+    improvements = 0
+    common = sorted(set(results) & set(baseline))
+    for name in common:
+        ratio = results[name] / baseline[name]
+        if ratio > 1. + tolerance:
+            regressions.append((name, ratio))
+        elif ratio < 1./(1. + tolerance):
+            improvements += 1
+    print("compared %d cases with the baseline: %d slower, %d faster "
+          "(by more than %d%%)"%(len(common), len(regressions), improvements,
+                                 round(100*tolerance)))
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print("%d baseline cases were not run"%(len(missing),))
+    for name, ratio in sorted(regressions, key=lambda r: -r[1]):
+        print("  SLOWER %-40s %10.3e s  (baseline %10.3e s, %.2fx)"%(
+            name, results[name], baseline[name], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--keys', default=None,
+                        help="comma separated thermocouple keys (default: all)")
+    parser.add_argument('--sizes', default='0,2,4,6',
+                        help="array sizes, as comma separated powers of ten")
+    parser.add_argument('--min-time', type=float, default=0.02,
+                        help="minimum duration of each timing, in seconds")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare with this JSON results file")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="relative slowdown counted as a regression")
+    parser.add_argument('--no-import', action='store_true',
+                        help="skip the import time measurement")
+    args = parser.parse_args(argv)
+
+    keys = args.keys.split(',') if args.keys else sorted(thermocouples)
+    sizes = [10**int(p) for p in args.sizes.split(',')]
+    results = {}
+    t_start = time.perf_counter()
+    if not args.no_import:
+        results['import.package'], results['import.first_lookup'] = import_times()
+    for key in keys:
+        t0 = time.perf_counter()
+        for name, fn in cases(key, sizes):
+            results[name] = time_call(fn, args.min_time)
+        print("%-12s %4d cases  %6.1f s"%(key, sum(1 for n in results
+              if n.startswith(key + '.')), time.perf_counter() - t0))
+        sys.stdout.flush()
+    print("%d cases in %.1f s"%(len(results), time.perf_counter() - t_start))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': {
+                          'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                          'revision': git_revision(),
+                          'python': platform.python_version(),
+                          'numpy': np.__version__,
+                          'platform': platform.platform(),
+                          'machine': platform.machine(),
+                          'sizes': sizes,
+                          'min_time': args.min_time,
+                          },
+                       'results': results}, f, indent=1, sort_keys=True)
+        print("results written to %s"%(args.output,))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline['results'], args.tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/python
 # -*- coding: iso-8859-15 -*-
 """
-This module creates python code for thermocouple tables.
+This module creates the coefficient store for thermocouple tables.
 
 This module uses thermocouple reference functions,
 taken from the coefficient tables downloaded from
@@ -9,7 +9,9 @@ taken from the coefficient tables downloaded from
 the NIST Standard Reference Database 60, Version 2.0 (Web Version)
     (see http://srdata.nist.gov/its90/main/ for more information)
 
-The output of this file, but not this file itself, is distributed with the package.
+Usage: python create_tables_NIST.py thermocouples_reference/source_NIST.npy
+The output of this file (see store_tables.py), but not this file itself, is
+distributed with the package, and loaded by thermocouples_reference/source_NIST.py.
 
 Disclaimers:
 (Author) I make no warranties as to the accuracy of this module, and shall
@@ -19,13 +21,14 @@ Disclaimers:
 __author__    = "User:Nanite @ wikipedia"
 __copyright__ = "public domain"
 
-import numpy as np
+import sys
+from store_tables import write_coefficient_store
 
 source = "NIST SRD 60"
 cal = "ITS-90"
 
 def Thermocouple_from_NIST_text(text):
-    """ Helper function for turning NIST table text into Thermocouple object. """
+    """ Helper function for turning NIST table text into store entry. """
     lines = text.splitlines()
     ttype = '?'
     family = 'None'
@@ -43,9 +46,9 @@ def Thermocouple_from_NIST_text(text):
 #            emfunits = l[2]
         elif l[0] == "range:":
             num = int(l[3])
-            entry = [l[1].rstrip(','),
-                     l[2].rstrip(','),
-                     lines[i+num+1:i:-1], 'None']
+            entry = [float(l[1].rstrip(',')),
+                     float(l[2].rstrip(',')),
+                     [float(c) for c in lines[i+num+1:i:-1]], None]
             table.append(entry)
             i += num
         elif l[0] == "exponential:":
@@ -57,29 +60,15 @@ def Thermocouple_from_NIST_text(text):
             a2str, a2 = lines[i+3].split('=')
             if a0str.strip() != 'a0' or a1str.strip() != 'a1' or a2str.strip() != 'a2':
                 raise ValueError("Invalid exponential entry")
-            a0 = a0.strip().lower()
-            a1 = a1.strip().lower()
-            a2 = a2.strip().lower()
-            table[-1][-1] = '['+a0+','+a1+','+a2+']'
+            table[-1][-1] = [float(a0), float(a1), float(a2)]
             i += 3
         i+=1
     
-    outstring = "Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([\n"
-    for tmin, tmax, numlist, expo in table:
-        outstring += "  ["+tmin+", "+tmax+", np.array([\n"
-        for num in numlist:
-            num = num.strip().lower()
-            if num[0] != '-':
-                num = ' '+num
-            outstring += (" "*8)+num+",\n"
-        outstring += "  ]), "+expo+"],\n"
-    outstring += "  ],'C','mV',\n"
-    outstring += "       calibration='{}',\n".format(cal)
-    outstring += "       source='{}, type {}'),\n".format(source,ttype)
-    outstring += "     ttype='Type {}',\n".format(ttype)
-    outstring += "     composition='{}')".format(comps[ttype])
-
-    return ttype, outstring
+    return dict(name=ttype, table=table, Tunits='C', Vunits='mV',
+                calibration=cal,
+                source='{}, type {}'.format(source,ttype),
+                ttype='Type {}'.format(ttype),
+                composition=comps[ttype])
 
 comps = {
     'B': '70Pt,30Rh - 94Pt,6Rh',
@@ -317,47 +306,6 @@ range: 0.000, 400.000, 8
  -0.275129016730E-19
 """]
 
-output = '''\
-"""
-This module contains thermocouple reference functions for types
-B,E,J,K,N,R,S,T.
-
-You can access the lookup table objects like so:
-    typeK = <this module>.thermocouples['K']
-
-This module contains the NIST ITS-90 thermocouple reference functions.
-
-Disclaimers
------------
-(Author) I make no warranties as to the accuracy of this module, and shall
-        not be liable for any damage that may result from errors or omissions.
-(NIST) The National Institute of Standards and Technology (NIST) uses its
-        best efforts to produce a Database of high quality and to verify that
-        the data contained therein have been selected on the basis of sound
-        scientific judgement. However, NIST makes no warranties to that effect,
-        and NIST shall not be liable for any damage that may result from errors
-        or omissions in the Database.
-
-(Note: This module is generated code from create_tables_NIST.py.)
-"""
-
-__copyright__ = "public domain"
-
-import numpy as np
-from .function_types import Thermocouple_Reference, Polynomial_Gaussian_Piecewise_Function
-
-thermocouples = {
-
-'''
-
-for text in nist_texts:
-    ttype, maker = Thermocouple_from_NIST_text(text)
-    output += "'"+ttype+"': "+maker+",\n\n"
-
-output += '''}
-
-#end of module'''
-
-print(output)
-
-
+if __name__ == '__main__':
+    write_coefficient_store(sys.argv[1],
+        [Thermocouple_from_NIST_text(text) for text in nist_texts])
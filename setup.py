@@ -5,9 +5,9 @@ from setuptools import setup
 def read(fname):
     return open(os.path.join(os.path.dirname(__file__), fname)).read()
 
-if not all(os.path.exists('thermocouples_reference/source_%s.py'%s)
+if not all(os.path.exists('thermocouples_reference/source_%s.npy'%s)
            for s in ['OMEGA', 'NIST']):
-    raise RuntimeError('Missing source files! Please run `make` from this directory.')
+    raise RuntimeError('Missing coefficient files! Please run `make` from this directory.')
 
 setup(name='thermocouples_reference',
     version='0.20',
@@ -17,6 +17,7 @@ setup(name='thermocouples_reference',
     license='public domain',
     url='https://pypi.python.org/pypi/thermocouples_reference',
     packages=['thermocouples_reference'],
+    package_data={'thermocouples_reference': ['*.npy']},
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Science/Research',
@@ -42,8 +43,11 @@ setup(name='thermocouples_reference',
     install_requires=[
         'numpy',
     ],
-    extras_require = {
-        'inverse_lookup':  ['scipy'],
+    entry_points = {
+        'console_scripts': [
+            'thermocouples-convert = thermocouples_reference.csv_convert:main',
+            'thermocouples-convert-raw = thermocouples_reference.raw_files:main',
+        ],
     },
     zip_safe=True)
 
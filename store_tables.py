@@ -0,0 +1,59 @@
+#!/usr/bin/python
+"""
+Helper for the create_tables_*.py scripts: writes thermocouple reference
+functions to a coefficient store, the .npy file that is distributed with the
+package and read by thermocouples_reference.function_types.load_coefficient_store.
+
+The store is a single numpy structured array (so it can be read in one go,
+or memory mapped), with one record for each piece of each piecewise
+function. The pieces of a thermocouple are consecutive records with the same
+name, and each record has the fields:
+    name, ttype, composition, source, calibration, Tunits, Vunits : str
+        thermocouple and function information
+    tmin, tmax : float -- temperature limits of the piece
+    degree     : int   -- polynomial degree
+    coefs      : float array -- coefficients in np.polyval() order, padded
+                                with zeros on the left to the maximum degree
+    gauss      : float array of 3 -- exponential coefs, NaN if none
+
+Disclaimers:
+(Author) I make no warranties as to the accuracy of this module, and shall
+        not be liable for any damage that may result from errors or omissions.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+
+string_fields = ['name', 'ttype', 'composition', 'source', 'calibration',
+                 'Tunits', 'Vunits']
+
+def write_coefficient_store(filename, thermocouples):
+    """\
+    Write thermocouples to the coefficient store filename. thermocouples is
+    a list of dicts with keys 'name', 'ttype', 'composition', 'source',
+    'calibration', 'Tunits', 'Vunits' and 'table', where table is formatted
+    as for Polynomial_Gaussian_Piecewise_Function.
+    """
+    maxdeg = max(len(pc) - 1 for tc in thermocouples
+                 for tmin, tmax, pc, ec in tc['table'])
+    dtype = np.dtype(
+        [(key, '<U%d'%max(len(tc[key]) for tc in thermocouples))
+            for key in string_fields] +
+        [('tmin', '<f8'), ('tmax', '<f8'), ('degree', '<i4'),
+         ('coefs', '<f8', (maxdeg + 1,)), ('gauss', '<f8', (3,))])
+    records = np.zeros(sum(len(tc['table']) for tc in thermocouples), dtype)
+    i = 0
+    for tc in thermocouples:
+        for tmin, tmax, pc, ec in tc['table']:
+            r = records[i]
+            for key in string_fields:
+                r[key] = tc[key]
+            r['tmin'] = tmin
+            r['tmax'] = tmax
+            r['degree'] = len(pc) - 1
+            r['coefs'][maxdeg + 1 - len(pc):] = pc
+            r['gauss'] = np.nan if ec is None else ec
+            i += 1
+    np.save(filename, records, allow_pickle=False)
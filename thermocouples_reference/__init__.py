@@ -32,9 +32,15 @@ from . import source_NIST
 from . import source_ASTM
 from . import source_OMEGA
 
-# assemble thermocouples list.
+# assemble thermocouples list. Like the source modules' lists, this is a
+# Thermocouple_Registry, so each thermocouple is only built on first use.
 # note the order: type G from OMEGA source is replaced by the ASTM one.
-thermocouples = dict()
-thermocouples.update(source_OMEGA.thermocouples)
-thermocouples.update(source_NIST .thermocouples)
-thermocouples.update(source_ASTM .thermocouples)
+thermocouples = function_types.Thermocouple_Registry()
+thermocouples.include(source_OMEGA.thermocouples)
+thermocouples.include(source_NIST .thermocouples)
+thermocouples.include(source_ASTM .thermocouples)
+
+from .channels import Channel_Map
+from .streaming import Stream_Converter
+from .warm_start import Warm_Start_Inverse
+from .packed import Packed_Curves
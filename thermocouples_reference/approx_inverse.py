@@ -0,0 +1,148 @@
+"""
+Python module for fast approximate inverse lookup of thermocouple emf
+functions, without any numerical search.
+
+The inverse function T(emf) of each monotonic piece of the emf function is
+fitted with Chebyshev polynomials, splitting pieces as needed until each fit
+reaches the requested temperature accuracy. Lookup is then a piece search
+plus a polynomial evaluation. Usually you would get these objects from
+Polynomial_Gaussian_Piecewise_Function.inverse_approx(), which builds them
+when first needed.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+from numpy.polynomial import chebyshev
+
+# The stated error of a fit is its maximum on a grid of this many points
+# between each pair of sample points, increased by this fraction to cover
+# maxima that fall between the grid points.
+_check_points = 16
+_error_margin = 0.01
+
+class Approximate_Inverse(object):
+    """\
+    Piecewise Chebyshev approximation of the inverse of an emf function.
+
+    Main methods:
+     approx(V)             # approximate temperatures for voltages V
+     approx(V, newton=True) # the same, plus one exact Newton correction
+    
+    The fits are stored in .pieces, a list sorted by voltage of tuples
+        (minimum V, maximum V, chebyshev coefs, maximum T error)
+    where the chebyshev coefs apply to V mapped linearly onto [-1, 1]. The
+    maximum T error is measured against the exact function on a dense grid
+    (over ten thousand points per piece), with a small margin on top, so
+    that it is an upper bound; .max_error is the largest of them.
+    The requested accuracy may not be reached in the immediate vicinity of
+    an extremum of the emf function (type B, near 21 degC), where the inverse
+    has infinite slope; the stated errors are the achieved ones.
+    """
+    def __init__(self, func, max_error=1e-3, max_degree=12, max_depth=16):
+        """
+        func is the Polynomial_Gaussian_Piecewise_Function to invert, and
+        max_error is the desired maximum temperature error (in func.Tunits).
+        """
+        self.func = func
+        self.target_error = max_error
+        self.max_degree = max_degree
+        self.max_depth = max_depth
+
+        # Only the last chain of increasing pieces, which covers the highest
+        # temperature solution of every attainable voltage, is fitted.
+        pieces = []
+        for tlo, thi, vlo, vhi, increasing in func.branches:
+            if increasing and pieces and pieces[-1][1] == tlo:
+                pieces.append((tlo, thi))
+            else:
+                pieces = [(tlo, thi)] if increasing else []
+
+        self.pieces = []
+        for tlo, thi in pieces:
+            self._fit(tlo, thi, 0)
+        self.max_error = max(p[3] for p in self.pieces)
+        self._Vbreaks = np.array([p[1] for p in self.pieces[:-1]])
+        self.minV = self.pieces[0][0]
+        self.maxV = self.pieces[-1][1]
+
+    def __repr__(self):
+        return "<approximate inverse, %d pieces, max error %.2g %s>"%(
+            len(self.pieces), self.max_error, self.func.Tunits)
+
+    def _fit(self, tlo, thi, depth):
+        """ Fit T(V) on [tlo, thi], splitting in half until accurate. """
+        func = self.func
+        # Chebyshev-distributed sample temperatures, denser at the ends.
+        T = 0.5*(tlo + thi) - 0.5*(thi - tlo)*np.cos(np.linspace(0., np.pi, 801))
+        V = func(T, out_of_range="extrapolate")
+        Tcheck = 0.5*(T[1:] + T[:-1])
+        Vcheck = func(Tcheck, out_of_range="extrapolate")
+        vlo, vhi = V[0], V[-1]
+        x = (2.*V - (vlo + vhi)) / (vhi - vlo)
+        xcheck = (2.*Vcheck - (vlo + vhi)) / (vhi - vlo)
+        for deg in range(3, self.max_degree+1):
+            coefs = chebyshev.chebfit(x, T, deg)
+            err = np.max(np.abs(chebyshev.chebval(xcheck, coefs) - Tcheck))
+            if err <= self.target_error:
+                break
+        Tdense = (T[:-1, None] + np.diff(T)[:, None]*
+                  (np.arange(1., _check_points)/_check_points)).ravel()
+        xdense = (2.*func(Tdense, out_of_range="extrapolate") - (vlo + vhi)) / (vhi - vlo)
+        err = max(err, np.max(np.abs(chebyshev.chebval(xdense, coefs) - Tdense)))
+        err *= 1. + _error_margin
+        if err > self.target_error and depth < self.max_depth:
+            tmid = 0.5*(tlo + thi)
+            self._fit(tlo, tmid, depth+1)
+            self._fit(tmid, thi, depth+1)
+            return
+        self.pieces.append((vlo, vhi, coefs, err))
+
+    def __call__(self, V, newton=False, out_of_range="raise"):
+        """\
+        Approximate inverse lookup.
+
+        Parameters
+        ----------
+        V : array_like
+            Voltage or array of voltages.
+        newton : bool, optional
+            If True, finish with one Newton step on the exact function. Since
+            the approximation is already close, this brings the result to
+            within a tiny fraction of the usual Vtol of the exact inverse.
+        out_of_range : {'raise', 'nan'}, optional
+            Determines behaviour for voltages outside the fitted range: raise
+            a ValueError, or return NaN.
+
+        Returns
+        -------
+        T : array_like
+            Temperatures.
+        """
+        if out_of_range not in ["raise", "nan"]:
+            raise ValueError("invalid out_of_range parameter",out_of_range)
+
+        V = np.asarray(V, dtype=float)
+        bad = ~((V >= self.minV) & (V <= self.maxV))
+        if out_of_range == "raise" and np.any(bad):
+            raise ValueError("Voltage not within in allowed range.", np.extract(bad, V))
+
+        piece = np.searchsorted(self._Vbreaks, V)
+        T = np.empty(V.shape)
+        for i, (vlo, vhi, coefs, err) in enumerate(self.pieces):
+            sel = (piece == i)
+            if not np.any(sel):
+                continue
+            x = (2.*V[sel] - (vlo + vhi)) / (vhi - vlo)
+            T[sel] = chebyshev.chebval(x, coefs)
+
+        if newton:
+            f0, f1 = self.func.derivatives(T, 1, out_of_range="extrapolate")
+            T -= (f0 - V) / f1
+        # Keep results near the ends of the range within the range.
+        np.clip(T, self.func.minT, self.func.maxT, out=T)
+        T[bad] = np.nan
+        return T[()]
+
+#end of module
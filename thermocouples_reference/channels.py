@@ -0,0 +1,207 @@
+"""
+Python module for converting blocks of readings from several thermocouple
+channels at once, where each channel may be of a different type.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+
+from .function_types import Thermocouple_Reference, _prepare_out, _block_size
+
+class Channel_Map(object):
+    """\
+    Thermocouple types of a set of channels, for converting whole blocks of
+    readings (samples x channels arrays, as delivered by data acquisition
+    hardware) in one call:
+
+     chans = Channel_Map(['K', 'K', 'J', 'T', 'AuFe 0.07'])
+     T = chans.inverse(emf_block, Tref=cjc)      # emf_block.shape == (n, 5)
+     emf = chans.convert(T, Tref=cjc)
+
+    Internally, the channels are grouped by thermocouple type, and each
+    group is converted with a single vectorized call on all its samples, so
+    the cost grows with the total number of samples rather than with the
+    number of channels. Channels of one type that are next to each other are
+    worked on as views, without copying; channels of one type that are
+    spread out are gathered a block of rows at a time.
+
+    The entries of the channel list are keys into thermocouples_reference.
+    thermocouples (or into the registry given as thermocouples=), or
+    Thermocouple_Reference objects.
+
+    Attributes:
+     .keys          # the channel list, as given
+     .thermocouples # Thermocouple_Reference of each channel
+     .groups        # list of (Thermocouple_Reference, channel indices)
+    """
+    def __init__(self, keys, thermocouples=None):
+        if thermocouples is None:
+            from . import thermocouples
+        self.keys = list(keys)
+        self.thermocouples = [k if isinstance(k, Thermocouple_Reference)
+                              else thermocouples[k] for k in self.keys]
+        if not self.thermocouples:
+            raise ValueError("a Channel_Map needs at least one channel.")
+
+        # Group channels by thermocouple, in order of first appearance. A
+        # group of adjacent channels is indexed by a slice, so that it gives
+        # views of the data arrays.
+        order = []
+        columns = {}
+        for i, tc in enumerate(self.thermocouples):
+            if id(tc) not in columns:
+                order.append(tc)
+                columns[id(tc)] = []
+            columns[id(tc)].append(i)
+        self.groups = []
+        for tc in order:
+            cols = columns[id(tc)]
+            if cols[-1] - cols[0] == len(cols) - 1:
+                index = slice(cols[0], cols[-1] + 1)
+            else:
+                index = np.array(cols)
+            self.groups.append((tc, index))
+
+    def __len__(self):
+        return len(self.thermocouples)
+
+    def __repr__(self):
+        return "<channel map of %d channels: %s>"%(
+                len(self), ", ".join(repr(str(k)) if not
+                isinstance(k, Thermocouple_Reference) else k.type
+                for k in self.keys))
+
+    def convert(self,T,Tunit='C',Vunit='mV',Tref=None,derivative=0,
+                out_of_range="raise",out=None,dtype=None):
+        """\
+        Compute the emfs of a block of temperatures, as
+        Thermocouple_Reference.convert does for one channel.
+
+        Parameters
+        ----------
+        T : array_like
+            Temperatures (in Tunit), with the channels along the last axis:
+            usually of shape (samples, channels).
+        Tunit, Vunit, derivative, out_of_range :
+            As for Thermocouple_Reference.convert.
+        Tref : array_like, optional
+            Reference junctions' temperatures (in Tunit), broadcast against
+            T: a scalar, one per channel, or one per sample and channel.
+            Defaults to the freezing point of water.
+        out : ndarray, optional
+            Array of the same shape as T to write the result into, which is
+            then returned.
+        dtype : floating point dtype, optional
+            Type of the result, by default out.dtype if out is given, else
+            float64.
+
+        Returns
+        -------
+        emf : ndarray
+            computed emfs (in Vunit), of the same shape as T
+        """
+        return self._map(lambda tc, T, Tref, Tstart, out, dtype: tc.convert(
+                    T, Tunit, Vunit, Tref, derivative, out_of_range, out, dtype),
+                T, Tref, None, out, dtype)
+
+    def inverse(self,emf,Tunit='C',Vunit='mV',Tref=None,Tstart=None,Vtol=None,
+                branch="high",out=None,dtype=None):
+        """\
+        Inverse lookup for a block of measured voltages, as
+        Thermocouple_Reference.inverse does for one channel.
+
+        Parameters
+        ----------
+        emf : array_like
+            Measured voltages (in Vunit), with the channels along the last
+            axis: usually of shape (samples, channels).
+        Tunit, Vunit, Vtol, branch :
+            As for Thermocouple_Reference.inverse.
+        Tref : array_like, optional
+            Reference junctions' temperatures (in Tunit), broadcast against
+            emf: a scalar, one per channel (e.g. each channel's cold junction
+            sensor), or one per sample and channel. Defaults to the freezing
+            point of water.
+        Tstart : array_like, optional
+            Suggested starting temperatures, broadcast against emf like Tref.
+        out : ndarray, optional
+            Array of the same shape as emf to write the result into, which
+            is then returned.
+        dtype : floating point dtype, optional
+            Type of the result, by default out.dtype if out is given, else
+            float64.
+
+        Returns
+        -------
+        T : ndarray
+            Junction temperatures (in Tunit), of the same shape as emf
+        """
+        return self._map(lambda tc, emf, Tref, Tstart, out, dtype: tc.inverse(
+                    emf, Tunit, Vunit, Tref, Tstart, Vtol, branch, out, dtype),
+                emf, Tref, Tstart, out, dtype)
+
+    def _map(self, fn, X, Tref, Tstart, out, dtype):
+        """\
+        Apply fn(tc, X, Tref, Tstart, out, dtype) to each group of channels
+        of X, writing the results into one array.
+
+        A group of adjacent channels is a view of X and of out, which is
+        written to directly (through block-sized buffers when it is strided,
+        see function_types._blockwise). The channels of other groups cannot
+        be viewed together, so they are gathered and scattered back in
+        blocks of rows holding about _block_size of their values, and no copy of the size
+        of X is made in either case.
+        """
+        X = np.asarray(X)
+        if X.ndim == 0 or X.shape[-1] != len(self):
+            raise ValueError("last axis must have one entry per channel",
+                             X.shape, len(self))
+        out, dtype = _prepare_out(X.shape, out, dtype)
+        for tc, index in self.groups:
+            if isinstance(index, slice):
+                fn(tc, X[..., index], self._columns(Tref, index),
+                   self._columns(Tstart, index), out[..., index], dtype)
+                continue
+            for blk in self._row_blocks(X.shape, len(index)):
+                out[blk][..., index] = fn(tc, X[blk][..., index],
+                        self._columns(self._rows(Tref, X.shape, blk), index),
+                        self._columns(self._rows(Tstart, X.shape, blk), index),
+                        None, dtype)
+        return out
+
+    def _row_blocks(self, shape, channels):
+        """\
+        Indices of blocks of rows of an array of the given shape (with the
+        channels along the last axis), with about _block_size values in the
+        given number of channels.
+        """
+        if len(shape) == 1:
+            return [()]
+        rows = max(1, _block_size // channels)
+        return [i + (slice(r, r + rows),) for i in np.ndindex(*shape[:-2])
+                for r in range(0, shape[-2], rows)]
+
+    def _rows(self, A, shape, blk):
+        """\
+        Block blk of the rows of A broadcast to shape, if A has rows at all
+        (None, scalars and one value per channel are returned as they are).
+        """
+        if A is None or np.ndim(A) < 2:
+            return A
+        return np.broadcast_to(A, shape)[blk]
+
+    def _columns(self, A, index):
+        """ The channels index of A (None, a scalar or an array). """
+        if A is None or np.ndim(A) == 0:
+            return A
+        A = np.asarray(A)
+        if A.shape[-1] == 1:
+            return A
+        if A.shape[-1] != len(self):
+            raise ValueError("last axis must have one entry per channel",
+                             A.shape, len(self))
+        return A[..., index]
+
+#end of module
@@ -0,0 +1,301 @@
+"""
+Python module for converting voltage columns of large delimited text files
+(CSV, TSV) to temperatures, streaming: the file is read, converted and
+written in chunks of rows, and never loaded as a whole.
+
+From the command line:
+
+    thermocouples-convert log.csv -o temps.csv -c V1:K:cjc -c V2:J:cjc -c V3:T:=23.5
+
+appends to each row the temperature of column V1 (type K), V2 (type J)
+and V3 (type T), with reference junction temperatures from column cjc, or
+fixed at 23.5 degrees. See thermocouples-convert --help.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from .channels import Channel_Map
+from .units import Tunits_mat
+
+def parse_column_spec(spec):
+    """\
+    Parse a column specification "COLUMN:TYPE[:CJC]" into (column, type,
+    cjc), where CJC is a column, or a fixed temperature written =VALUE
+    (returned as a float), and defaults to None (the freezing point of
+    water). Columns are names, or 0-based indices, so "V1:K:2" takes the
+    reference junction temperature from column 2, and "V1:K:=2" fixes it
+    at 2 degrees.
+    """
+    parts = spec.split(':')
+    if len(parts) not in (2, 3) or not parts[0] or not parts[1]:
+        raise ValueError("column specification must be COLUMN:TYPE[:CJC]", spec)
+    cjc = parts[2] if len(parts) == 3 else None
+    if cjc is not None and cjc.startswith('='):
+        try:
+            cjc = float(cjc[1:])
+        except ValueError:
+            raise ValueError("fixed reference temperature must be =VALUE", spec)
+    elif cjc == '':
+        raise ValueError("column specification must be COLUMN:TYPE[:CJC]", spec)
+    return parts[0], parts[1], cjc
+
+def _convert_column(tc, V, Tunit, Vunit, Tref):
+    """\
+    Temperatures of one channel's voltages V (1-d) with reference junction
+    temperatures Tref (scalar or 1-d), NaN where they cannot be converted:
+    voltages out of range or not numbers, or reference temperatures out of
+    range. The voltages that are plainly out of the function's range are
+    masked out in one go; any others that fail are retried one by one.
+    """
+    func = tc.func.in_units(Tunit, Vunit)
+    vlim = [v for tlo, thi, vlo, vhi, increasing in func.branches
+            for v in (vlo, vhi)]
+    slack = 1e-6*abs(max(vlim) - min(vlim))
+    Tref = np.broadcast_to(Tref, V.shape)
+    with np.errstate(invalid='ignore'):
+        total = V + tc.convert(Tref, Tunit, Vunit, out_of_range="nan")
+        ok = (total >= min(vlim) - slack) & (total <= max(vlim) + slack)
+    T = np.full(V.shape, np.nan)
+    try:
+        T[ok] = tc.inverse(V[ok], Tunit, Vunit, Tref[ok])
+    except ValueError:
+        for i in np.flatnonzero(ok):
+            try:
+                T[i] = tc.inverse(float(V[i]), Tunit, Vunit, float(Tref[i]))
+            except ValueError:
+                pass
+    return T
+
+def _parse_fields(lines, delimiter, usecols):
+    """\
+    The given columns of the lines as a 2-d float array, like np.loadtxt
+    but with nan for the fields that are missing or not numbers (empty,
+    text, ...), which the conversion then treats as unconvertible voltages.
+    """
+    data = np.full((len(lines), len(usecols)), np.nan)
+    for i, line in enumerate(lines):
+        fields = line.split(delimiter)
+        for j, c in enumerate(usecols):
+            try:
+                data[i, j] = float(fields[c])
+            except (IndexError, ValueError):
+                pass
+    return data
+
+def convert_csv(infile, outfile, columns, delimiter=',', header=True,
+                Tunit='C', Vunit='mV', chunk_rows=1<<16, fmt='%.4f',
+                on_error='nan'):
+    """\
+    Read delimited rows from infile, and write them to outfile with the
+    temperatures of the given voltage columns appended.
+
+    Parameters
+    ----------
+    infile, outfile : file objects
+        Text files to read and write.
+    columns : list of (column, type, cjc)
+        Voltage columns to convert (names from the header, or 0-based
+        indices), their thermocouple types (keys into thermocouples), and
+        their reference junction temperatures: a column (name or index), a
+        fixed temperature (a float), or None for the freezing point of
+        water.
+    delimiter : str, optional
+        Field delimiter, default ','.
+    header : bool, optional
+        If True (default), the first line is a header, which is written out
+        with the names of the new columns ("<voltage column>_T") appended.
+    Tunit, Vunit : optional
+        Units of the temperatures (and CJC columns) and of the voltages, as
+        for Thermocouple_Reference.inverse.
+    chunk_rows : int, optional
+        Number of rows converted at a time.
+    fmt : str, optional
+        Format of the temperatures written.
+    on_error : {'nan', 'raise'}, optional
+        What to do with voltages that cannot be converted (out of range, or
+        fields that are missing, empty or not numbers, or whose reference
+        temperature is out of range or not a number): write nan for them
+        and carry on (default), or raise a ValueError giving their line
+        number in the file. With 'raise', the rows before that line's chunk
+        have already been written.
+
+    Returns
+    -------
+    stats : dict
+        'rows' converted, and seconds spent in 'parse', 'convert' and
+        'write', and in 'total'; the number of values written as nan
+        ('nan') and the line number of the first of them ('first_nan_line',
+        None if there are none).
+    """
+    if on_error not in ('nan', 'raise'):
+        raise ValueError("invalid on_error parameter", on_error)
+    if Tunit not in Tunits_mat['C']['to']:
+        raise ValueError("invalid temperature unit", Tunit)
+    stats = {'rows': 0, 'parse': 0., 'convert': 0., 'write': 0.,
+             'nan': 0, 'first_nan_line': None}
+    t_start = time.perf_counter()
+    names = None
+    lineno = 0  # of the last line read
+    if header:
+        lineno += 1
+        line = infile.readline().rstrip('\r\n')
+        names = line.split(delimiter)
+
+    def index(column):
+        if names is not None and column in names:
+            return names.index(column)
+        try:
+            return int(column)
+        except ValueError:
+            raise ValueError("no such column", column)
+    vcols = [index(c) for c, t, cjc in columns]
+    if header:
+        outfile.write(line + delimiter +
+            delimiter.join("%s_T"%(names[i],) for i in vcols) + '\n')
+    ccols = [index(cjc) for c, t, cjc in columns
+             if cjc is not None and not isinstance(cjc, float)]
+    usecols = sorted(set(vcols + ccols))
+    position = dict((c, i) for i, c in enumerate(usecols))
+    chans = Channel_Map([t for c, t, cjc in columns])
+    # Reference temperature of each channel: fixed (the default one if not
+    # given), or read from the column at position cjc_pos[j].
+    default_Tref = Tunits_mat['C']['to'][Tunit][0][1]
+    fixed = np.array([cjc if isinstance(cjc, float) else default_Tref
+                      for c, t, cjc in columns])
+    cjc_pos = [None if cjc is None or isinstance(cjc, float)
+               else position[index(cjc)] for c, t, cjc in columns]
+
+    while True:
+        t0 = time.perf_counter()
+        lines = [l.rstrip('\r\n') for l in itertools.islice(infile, chunk_rows)]
+        if not lines:
+            break
+        # Blank lines are skipped, and a chunk of only blank lines is not
+        # the end of the file.
+        numbers = [lineno + 1 + i for i, l in enumerate(lines) if l.strip()]
+        lineno += len(lines)
+        lines = [l for l in lines if l.strip()]
+        if not lines:
+            continue
+        try:
+            data = np.loadtxt(lines, delimiter=delimiter, usecols=usecols,
+                              comments=None, ndmin=2)
+        except ValueError:
+            # Some field is missing or not a number: parse the chunk field
+            # by field instead.
+            data = _parse_fields(lines, delimiter, usecols)
+        t1 = time.perf_counter()
+        V = data[:, [position[c] for c in vcols]]
+        if ccols:
+            Tref = np.empty_like(V)
+            Tref[...] = fixed
+            for j, pos in enumerate(cjc_pos):
+                if pos is not None:
+                    Tref[:, j] = data[:, pos]
+        else:
+            Tref = fixed
+        try:
+            T = chans.inverse(V, Tunit, Vunit, Tref)
+        except ValueError:
+            # Some value of the chunk cannot be converted: convert channel by
+            # channel, with nan for those.
+            T = np.column_stack([_convert_column(tc, V[:, j], Tunit, Vunit,
+                                                 Tref[..., j])
+                                 for j, tc in enumerate(chans.thermocouples)])
+            bad = np.flatnonzero(np.isnan(T).any(axis=1))
+            if bad.size:
+                if on_error == 'raise':
+                    j = np.flatnonzero(np.isnan(T[bad[0]]))[0]
+                    raise ValueError("cannot convert line %d"%(numbers[bad[0]],),
+                                     columns[j][0], float(V[bad[0], j]))
+                stats['nan'] += int(np.isnan(T).sum())
+                if stats['first_nan_line'] is None:
+                    stats['first_nan_line'] = numbers[bad[0]]
+        t2 = time.perf_counter()
+        formatted = (delimiter.join([fmt]*len(columns)) + '\n') * len(lines)
+        formatted = (formatted % tuple(T.ravel().tolist())).split('\n')
+        outfile.write(''.join(l + delimiter + f + '\n'
+                              for l, f in zip(lines, formatted)))
+        t3 = time.perf_counter()
+        stats['rows'] += len(lines)
+        stats['parse'] += t1 - t0
+        stats['convert'] += t2 - t1
+        stats['write'] += t3 - t2
+    outfile.flush()
+    stats['total'] = time.perf_counter() - t_start
+    return stats
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Convert thermocouple voltage columns of a delimited "
+                    "text file to temperatures, streaming in chunks of rows. "
+                    "The temperatures are appended to each row.")
+    parser.add_argument('infile', nargs='?', default='-',
+                        help="input file (default: standard input)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file (default: standard output)")
+    parser.add_argument('-c', '--column', action='append', required=True,
+                        metavar='COLUMN:TYPE[:CJC]',
+                        help="voltage column (name or 0-based index), its "
+                             "thermocouple type, and optionally the column "
+                             "(name or index) of its reference junction "
+                             "temperature, or =VALUE for a fixed one; may "
+                             "be repeated")
+    parser.add_argument('-d', '--delimiter', default=None,
+                        help="field delimiter (default ',', or tab for .tsv files)")
+    parser.add_argument('--tsv', action='store_true', help="tab delimited")
+    parser.add_argument('--no-header', action='store_true',
+                        help="the first line is data, not column names")
+    parser.add_argument('--tunit', default='C', choices=['C', 'F', 'K', 'R'])
+    parser.add_argument('--vunit', default='mV', choices=['V', 'mV', 'uV'])
+    parser.add_argument('--chunk-rows', type=int, default=1<<16)
+    parser.add_argument('--format', default='%.4f',
+                        help="format of the temperatures (default %%.4f)")
+    parser.add_argument('--on-error', default='nan', choices=['nan', 'raise'],
+                        help="for voltages that cannot be converted (out of "
+                             "range, or fields that are empty or not numbers): "
+                             "write nan (default), or stop with the line number")
+    parser.add_argument('--stats', action='store_true',
+                        help="print rows/s and the time spent parsing, "
+                             "converting and writing to standard error")
+    args = parser.parse_args(argv)
+
+    delimiter = args.delimiter
+    if delimiter is None:
+        delimiter = '\t' if args.tsv or args.infile.endswith('.tsv') else ','
+    columns = [parse_column_spec(s) for s in args.column]
+    infile = sys.stdin if args.infile == '-' else open(args.infile)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        stats = convert_csv(infile, outfile, columns, delimiter,
+                            not args.no_header, args.tunit, args.vunit,
+                            args.chunk_rows, args.format, args.on_error)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    if stats['nan']:
+        sys.stderr.write("%d values could not be converted and were written "
+                         "as nan (first on line %d)\n"
+                         %(stats['nan'], stats['first_nan_line']))
+    if args.stats:
+        total = stats['total']
+        sys.stderr.write(
+            "%d rows in %.3f s (%.3g rows/s): parse %.3f s, convert %.3f s, "
+            "write %.3f s\n"%(stats['rows'], total,
+            stats['rows']/total if total > 0 else 0.,
+            stats['parse'], stats['convert'], stats['write']))
+
+if __name__ == '__main__':
+    main()
+
+#end of module
@@ -7,18 +7,110 @@ functions.
 __author__    = "User:Nanite @ wikipedia"
 __copyright__ = "public domain"
 
+import math
+import os
+import time
+from bisect import bisect_left
+try:
+    from collections.abc import MutableMapping
+except ImportError: # python 2
+    from collections import MutableMapping
 import numpy as np
 from .units import *
 
-# scipy.optimize will be imported when needed.
-optimize = None
-def ensure_import_optimize():
-    global optimize
-    if optimize == None:
-        try:
-            import scipy.optimize as optimize
-        except ImportError:
-            raise ImportError("Inverse lookup requires scipy.optimize module. Please install SciPy.")
+# Argument types that take the scalar fast path (np.float64 is a float).
+_scalar_types = (float, int)
+
+# Large arrays are processed in blocks of this many elements, so that the
+# temporary arrays stay small (and in cache) whatever the size of the input.
+_block_size = 8192
+
+# Number of reference junction emfs remembered by a Thermocouple_Reference.
+_ref_memo_size = 256
+
+# Clock for the inverse lookup statistics (time.perf_counter is Python 3 only).
+_timer = getattr(time, 'perf_counter', time.time)
+
+_out_of_range_msg = "Voltage not within in allowed range."
+
+def _new_stats(nbranches):
+    """ Zeroed inverse lookup statistics, see enable_stats. """
+    return {'calls': 0, 'values': 0, 'iterations': 0, 'fallbacks': 0,
+            'out_of_range': 0, 'seconds': 0.,
+            'branch_iterations': np.zeros(nbranches, dtype=np.int64)}
+
+def _prepare_out(shape, out, dtype):
+    """\
+    Check the out= and dtype= arguments of an array computation, allocating
+    the output array if none was given. Returns (out, dtype).
+    """
+    if dtype is None:
+        dtype = np.float64 if out is None else out.dtype
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise ValueError("dtype must be a floating point type", dtype)
+    if out is None:
+        return np.empty(shape, dtype), dtype
+    if not isinstance(out, np.ndarray):
+        raise TypeError("out must be a numpy array")
+    if out.shape != shape:
+        raise ValueError("out has the wrong shape", out.shape, shape)
+    if out.dtype != dtype:
+        raise ValueError("out has the wrong dtype", out.dtype, dtype)
+    return out, dtype
+
+def _blockwise(fn, out, *args):
+    """\
+    Fill out with fn(*args), computed in blocks of at most _block_size
+    elements. Each of args is either an array of the same shape as out, which
+    is split into 1-d blocks, or a scalar (or None) passed unchanged to every
+    call. Returns out.
+
+    The blocks are taken by np.nditer, in memory order, so that nothing of
+    the size of out is allocated even when out or the arguments are not
+    contiguous (strided views, broadcast arrays): those are copied through
+    block-sized buffers.
+    """
+    arrays = [i for i, a in enumerate(args) if np.ndim(a)]
+    # (as 1-element views when 0-d, which nditer would give as scalars)
+    ops = [a.reshape(-1) if a.ndim == 0 else a
+           for a in [out] + [np.asarray(args[i]) for i in arrays]]
+    call = list(args)
+    with np.nditer(ops, flags=['external_loop', 'buffered', 'zerosize_ok'],
+                   op_flags=[['writeonly']] + [['readonly']]*len(arrays),
+                   order='K', buffersize=_block_size) as it:
+        for blocks in it:
+            if len(ops) == 1:
+                blocks = (blocks,)
+            for i, b in zip(arrays, blocks[1:]):
+                call[i] = b
+            blocks[0][...] = fn(*call)
+    return out
+
+def _compose_affine(pc, mul, add, scale=1.):
+    """\
+    Coefficients (in np.polyval order) of scale * p(mul*x + add), where p has
+    coefficients pc. The expansion is done in exact rational arithmetic, so
+    that the only errors are in rounding the final coefficients.
+    """
+    from fractions import Fraction # only needed here; slow to import
+    mul, add = Fraction(float(mul)), Fraction(float(add))
+    q = []
+    for c in pc:
+        # Horner's scheme on polynomials: q = q*(mul*x + add) + c
+        q = ([a*mul for a in q[:1]] +
+             [a*mul + b*add for a, b in zip(q[1:], q)] +
+             [(q[-1]*add if q else 0) + Fraction(float(c))])
+    scale = Fraction(float(scale))
+    return np.array([float(a*scale) for a in q])
+
+def _subtract(a, b):
+    """ a - b, in place in a when a is an array that can hold the result. """
+    if (isinstance(a, np.ndarray) and a.ndim and
+            np.broadcast_shapes(a.shape, np.shape(b)) == a.shape):
+        a -= b
+        return a
+    return a - b
 
 class Polynomial_Gaussian_Piecewise_Function(object):
     """\
@@ -29,6 +121,11 @@ class Polynomial_Gaussian_Piecewise_Function(object):
      func(T)          # compute the function
      func.__call__(T) # synonym for func(T)
      func.inverse(F)  # perform inverse lookup
+     func.derivatives(T) # function and derivatives, in one pass
+     func.eval_scalar(T) # fast path for a single float temperature
+     func.inverse_approx(F) # fast approximate inverse lookup
+     func.in_units(Tunits, Vunits) # the same function, in other units
+     func.enable_stats() # start counting inverse lookup statistics
     
     The raw function parameters are stored in .table. The structure of .table
     is a list of tuples giving the different segments of the piecewise function,
@@ -44,6 +141,9 @@ class Polynomial_Gaussian_Piecewise_Function(object):
     
     .source and .calibration are strings containing information about where the
     function data comes from, and how it is calibrated.
+
+    .stats is None, or a dict of inverse lookup statistics if they have been
+    enabled (see enable_stats).
     """
     def __init__(self, table, Tunits, Vunits, source="", calibration=""):
         self.table       = table
@@ -60,6 +160,34 @@ class Polynomial_Gaussian_Piecewise_Function(object):
             if tmin != lastmax:
                 raise ValueError("Pieces' limits must be contiguous.")
             lastmax = tmax
+
+        # Sorted interior breakpoints: np.searchsorted on this array gives the
+        # index of the piece that applies to each temperature, with under- and
+        # over-range temperatures landing on the first and last piece.
+        self._breaks = np.array([tmax for tmin,tmax,pc,ec in table[:-1]], dtype=float)
+
+        # Polynomial coefficients of each piece for derivatives of order 0..3,
+        # computed once here rather than on every call.
+        self._dcoefs = [[np.polyder(pc, d) for d in range(4)]
+                        for tmin,tmax,pc,ec in table]
+
+        # The same data as plain Python floats, for the scalar fast path.
+        self._scalar_breaks = [float(b) for b in self._breaks]
+        self._scalar_coefs  = [[[float(c) for c in dc] for dc in dcs]
+                               for dcs in self._dcoefs]
+        self._scalar_gauss  = [tuple(float(e) for e in ec) if ec else None
+                               for tmin,tmax,pc,ec in table]
+        self._scalar_minT   = float(self.minT)
+        self._scalar_maxT   = float(self.maxT)
+
+        # Approximate_Inverse objects, built when first requested.
+        self._approx_inverses = {}
+
+        # Functions in other units (see in_units), built when first requested.
+        self._unit_functions = {}
+
+        # Inverse lookup statistics, when enabled; see enable_stats.
+        self.stats = None
     
     @property
     def minT(self):
@@ -74,7 +202,7 @@ class Polynomial_Gaussian_Piecewise_Function(object):
             Tunits_short[self.Tunits], Vunits_short[self.Vunits],
             self.calibration, self.source)
     
-    def __call__(self,T,derivative=0,out_of_range="raise"):
+    def __call__(self,T,derivative=0,out_of_range="raise",out=None,dtype=None):
         """\
         Calculate reference function at given temperature.
 
@@ -90,6 +218,14 @@ class Polynomial_Gaussian_Piecewise_Function(object):
             "raise": raises an ValueError exception. (default)
             "nan":   values replaced by nans.
             "extrapolate": extrapolates from closest range. Do not trust this!
+        out: ndarray, optional
+            Array of the same shape as T to write the result into, which is
+            then returned. Repeated calls with the same out make no large
+            allocations, since big arrays are worked on in small blocks.
+        dtype: floating point dtype, optional
+            Type to compute and return the result in, by default out.dtype
+            if out is given, else float64. Computing in float32 is faster
+            but, of course, less precise.
         
         Returns
         -------
@@ -97,139 +233,873 @@ class Polynomial_Gaussian_Piecewise_Function(object):
             computed emf function
         """
         
+        if (out is None and dtype is None and isinstance(T, _scalar_types)
+                and 0 <= derivative <= 3):
+            return self.eval_scalar(T, derivative, out_of_range)
+
         if out_of_range not in ["raise", "nan", "extrapolate"]:
             raise ValueError("invalid out_of_range parameter",out_of_range)
 
-        T = np.array(T, copy=False, order='A')
-        emf_choices = [None]
-
-        # We go through the table, determining the selector which is used
-        # to choose which piece of the piecewise function to use.
-        # selector = 0 where T is underrange,
-        # selector = 1 where T is in first range,
-        #  ...
-        # selector = N where T is in last (Nth) range,
-        # selector = N+1 where T is overrange.
-        tmin = self.minT
-        selector = (T >= tmin)*1
-        for tmin, tmax, coefs, ec in self.table:
-            selector += (T > tmax)
-            # Here we go ahead and compute emf values using all ranges.
-            #   this is simple but perhaps a bit inefficient.
-            emf = np.polyval(np.polyder(coefs, derivative),T)
-            
-            if ec:
-                # Type K thermocouple has this annoying exponential addition term,
-                # corresponding to a little bump at 127 Celsius.
-                dT = T - ec[2]
-                gauss = ec[0] * np.exp(ec[1] * dT**2)
-                if derivative == 0:
-                    emf += gauss
-                elif derivative == 1:
-                    emf += 2. * ec[1] * gauss * dT
-                elif derivative == 2:
-                    emf += 2. * ec[1] * gauss * (2. * ec[1] * dT**2 + 1.)
-                elif derivative == 3:
-                    emf += 4. * ec[1] * ec[1] * gauss * dT * (2. * ec[1] * dT**2 + 3.)
-                else:
-                    raise ValueError("sorry, derivatives > 3 not supported for this type.")
-            emf_choices.append(emf)
-        emf_choices.append(None)
+        T = np.asarray(T)
+        if out_of_range == "raise":
+            self._check_range(T)
+
+        evaluate = lambda T: self._piecewise(T, out_of_range,
+                    lambda i, T: [self._eval_piece(i, T, derivative)])[0]
+        if out is None and dtype is None and T.size <= _block_size:
+            # float64 whatever the type of T, as for big arrays below
+            return evaluate(T.astype(np.float64, copy=False))
+        out, dtype = _prepare_out(T.shape, out, dtype)
+        return _blockwise(lambda T: evaluate(T.astype(dtype, copy=False)), out, T)
+
+    def eval_scalar(self,T,derivative=0,out_of_range="raise"):
+        """\
+        Calculate reference function at a single temperature, returning a
+        Python float. This is the fast path used by __call__ for float and
+        int arguments: it works on plain floats, finds the piece by bisection
+        over the breakpoints and runs a Horner loop, without creating any
+        numpy arrays. Expect on the order of a few microseconds per call
+        (the target is under 10 us; see benchmarks/bench_scalar.py).
+
+        Parameters are as for __call__, except that T must be a real number
+        and derivative must be from 0 to 3.
+        """
+        T = float(T)
+        if not self._scalar_minT <= T <= self._scalar_maxT:
+            if out_of_range == "raise":
+                self._check_range(np.asarray(T))
+            elif out_of_range == "nan":
+                return float('nan')
+            elif out_of_range != "extrapolate":
+                raise ValueError("invalid out_of_range parameter",out_of_range)
+        elif out_of_range not in ("raise", "nan", "extrapolate"):
+            raise ValueError("invalid out_of_range parameter",out_of_range)
+
+        i = bisect_left(self._scalar_breaks, T)
+        emf = 0.
+        for c in self._scalar_coefs[i][derivative]:
+            emf = emf*T + c
+
+        ec = self._scalar_gauss[i]
+        if ec:
+            dT = T - ec[2]
+            gauss = ec[0] * math.exp(ec[1] * dT*dT)
+            if derivative == 0:
+                emf += gauss
+            elif derivative == 1:
+                emf += 2. * ec[1] * gauss * dT
+            elif derivative == 2:
+                emf += 2. * ec[1] * gauss * (2. * ec[1] * dT*dT + 1.)
+            else:
+                emf += 4. * ec[1] * ec[1] * gauss * dT * (2. * ec[1] * dT*dT + 3.)
+        return emf
+
+    def _scalar_derivatives012(self, T):
+        """\
+        Scalar fused evaluation of the function and its first two derivatives
+        at float T (extrapolating out of range), for the scalar Newton search.
+        """
+        i = bisect_left(self._scalar_breaks, T)
+        coefs = self._scalar_coefs[i][0]
+        p0 = coefs[0]
+        p1 = p2 = 0.
+        for c in coefs[1:]:
+            p2 = p2*T + p1
+            p1 = p1*T + p0
+            p0 = p0*T + c
+        p2 *= 2.
+
+        ec = self._scalar_gauss[i]
+        if ec:
+            dT = T - ec[2]
+            gauss = ec[0] * math.exp(ec[1] * dT*dT)
+            p0 += gauss
+            p1 += 2. * ec[1] * gauss * dT
+            p2 += 2. * ec[1] * gauss * (2. * ec[1] * dT*dT + 1.)
+        return p0, p1, p2
+
+    def _inverse_scalar_halley(self, V, T, Vtol, maxiter=50, stats=None):
+        """\
+        Halley's method on plain floats, starting from T. Returns the solution
+        if it converges inside the function's range, else None. The
+        iterations are counted into stats, if given.
+        """
+        minT = self._scalar_minT
+        maxT = self._scalar_maxT
+        result = None
+        for it in range(maxiter):
+            f0, f1, f2 = self._scalar_derivatives012(T)
+            f0 -= V
+            denom = 2.*f1*f1 - f0*f2
+            if abs(f0) <= Vtol:
+                # One last step polishes the result to full precision. It is
+                # a Halley step rather than a Newton step, as that stays small
+                # near an extremum of the function (type B near 21 degC).
+                if denom != 0.:
+                    T -= 2.*f0*f1 / denom
+                if minT <= T <= maxT:
+                    result = T
+                break
+            if denom == 0.:
+                break
+            T -= 2.*f0*f1 / denom
+            if not -1e300 < T < 1e300:
+                # Diverged (or NaN).
+                break
+        if stats is not None:
+            stats['iterations'] += it + 1
+        return result
+
+    def _inverse_scalar_bracketed(self, V, Vtol, lo, hi, increasing, x,
+                                  maxiter=200, stats=None):
+        """\
+        The safeguarded search of _inverse_bracketed, on plain floats, within
+        the bracket [lo, hi] and starting from x. Raises ValueError if the
+        result is not within Vtol. The iterations are counted into stats, if
+        given.
+        """
+        x = min(max(x, lo), hi)
+        tiny = 4e-16*max(abs(lo), abs(hi))
+        dxold = hi - lo
+        T = None
+        for it in range(maxiter):
+            f0, f1, f2 = self._scalar_derivatives012(x)
+            f0 -= V
+            if (f0 < 0.) == increasing and f0 != 0.:
+                lo = x
+            else:
+                hi = x
+            if abs(f0) <= Vtol:
+                # Polish with a Halley step, kept inside the bracket.
+                denom = 2.*f1*f1 - f0*f2
+                T = x
+                if denom != 0.:
+                    Td = x - 2.*f0*f1 / denom
+                    if lo <= Td <= hi:
+                        T = Td
+                break
+            if hi - lo <= tiny:
+                # Collapsed on an end of the bracket, see _inverse_bracketed.
+                T = lo if (abs(self.eval_scalar(lo,0,"extrapolate") - V) <=
+                           abs(self.eval_scalar(hi,0,"extrapolate") - V)) else hi
+                break
+            dx = f0/f1 if f1 != 0. else float('inf')
+            if it < 100 and lo < x - dx < hi and abs(dx) <= 0.5*dxold:
+                x -= dx
+            else:
+                dx = x - 0.5*(lo + hi)
+                x = 0.5*(lo + hi)
+            dxold = abs(dx)
+        if stats is not None:
+            stats['iterations'] += it + 1
+        if T is None:
+            T = x
+        if not abs(self.eval_scalar(T,0,"nan") - V) <= Vtol:
+            raise ValueError("Did not converge within tolerance.")
+        return T
+
+    def derivatives(self,T,order=2,out_of_range="raise"):
+        """\
+        Calculate reference function and its derivatives at given temperature,
+        in a single pass. The Horner recurrences for all derivative orders run
+        together, and the gaussian term (if any) is exponentiated only once.
+
+        Parameters
+        ----------
+        T : array_like
+            Temperature or array of temperatures.
+        order: integer, optional
+            Highest derivative to compute, from 0 to 3. Default is 2.
+        out_of_range: string, optional
+            Determines behaviour for out of range temperatures, as in __call__.
+        
+        Returns
+        -------
+        derivs : list of array_like
+            [func(T), func(T,derivative=1), ...] up to the given order.
+        """
         
+        if out_of_range not in ["raise", "nan", "extrapolate"]:
+            raise ValueError("invalid out_of_range parameter",out_of_range)
+        if order not in (0, 1, 2, 3):
+            raise ValueError("order must be from 0 to 3",order)
+
+        T = np.asarray(T)
+        if out_of_range == "raise":
+            self._check_range(T)
+
+        return self._piecewise(T, out_of_range,
+                    lambda i, T: self._eval_piece_derivatives(i, T, order))
+
+    def _check_range(self, T):
+        """ Raise ValueError if any temperature is out of range (or NaN). """
+        # NaN temperatures are reported as under range.
+        if T.size == 0 or (np.min(T) >= self.minT and np.max(T) <= self.maxT):
+            return
+        unders = ~(T >= self.minT)
+        overs = T > self.maxT
+        if np.any(unders) or np.any(overs):
+            u_temps = np.extract(unders,T)
+            o_temps = np.extract(overs,T)
+            if u_temps.size == 0: u_temps = None
+            if o_temps.size == 0: o_temps = None
+            msg = "Temperatures ("+Tunits_short[self.Tunits]+") under or over range:"
+            raise ValueError(msg, u_temps, o_temps)
+
+    def _piecewise(self, T, out_of_range, piece_fn):
+        """\
+        Assemble results of the piecewise function. piece_fn(i, Tpiece) must
+        return a list of arrays computed with piece i at temperatures Tpiece.
+        Out of range temperatures are extrapolated from the nearest piece, or
+        replaced by NaN if out_of_range == "nan".
+        """
+        if len(self.table) == 1 or T.size == 0:
+            # (an empty T goes through a piece as well, for empty results of
+            # the right dtype)
+            results = piece_fn(0, T)
+        else:
+            # Find each temperature's piece once, then evaluate every piece
+            # only on its own temperatures, writing into a single output.
+            piece = np.searchsorted(self._breaks, T)
+            results = None
+            for i in range(len(self.table)):
+                sel = (piece == i)
+                n = np.count_nonzero(sel)
+                if n == 0:
+                    continue
+                if n == T.size:
+                    results = piece_fn(i, T)
+                    break
+                values = piece_fn(i, T[sel])
+                if results is None:
+                    results = [np.empty(T.shape, v.dtype) for v in values]
+                for r, v in zip(results, values):
+                    r[sel] = v
+
         if out_of_range == "nan":
-            emf_choices[0] = T*np.nan
-            emf_choices[-1] = emf_choices[0]
+            bad = ~((T >= self.minT) & (T <= self.maxT))
+            for r in results:
+                r[bad] = np.nan
+
+        return [r[()] for r in results]
+
+    def _eval_piece(self, i, T, derivative):
+        """\
+        Evaluate piece i of the function (polynomial plus gaussian) on all of
+        T, disregarding the piece's temperature limits. Returns a new array.
+        """
+        tmin, tmax, coefs, ec = self.table[i]
+        # Coefficients as Python floats, so that with dtype=float32 the
+        # evaluation stays in float32.
+        if 0 <= derivative < len(self._scalar_coefs[i]):
+            coefs = self._scalar_coefs[i][derivative]
         else:
-            emf_choices[0]  = emf_choices[1]
-            emf_choices[-1] = emf_choices[-2]
+            coefs = np.polyder(coefs, derivative).tolist()
+        # Horner's scheme, in place on the output array.
+        emf = np.full(T.shape, coefs[0],
+                      dtype=T.dtype if T.dtype.kind == 'f' else np.float64)
+        for c in coefs[1:]:
+            emf *= T
+            emf += c
 
-        if out_of_range == "raise":
-            unders = selector <= 0
-            overs = selector > len(self.table)
-            if np.any(unders) or np.any(overs):
-                u_temps = np.extract(unders,T)
-                o_temps = np.extract(overs,T)
-                if u_temps.size == 0: u_temps = None
-                if o_temps.size == 0: o_temps = None
-                msg = "Temperatures ("+Tunits_short[self.Tunits]+") under or over range:"
-                raise ValueError(msg, u_temps, o_temps)
-
-        return np.choose(selector, emf_choices)
-
-    def inverse(self,V,Tstart=None,Vtol=1e-6):
+        ec = self._scalar_gauss[i]
+        if ec:
+            # Type K thermocouple has this annoying exponential addition term,
+            # corresponding to a little bump at 127 Celsius.
+            dT = T - ec[2]
+            gauss = ec[0] * np.exp(ec[1] * dT**2)
+            if derivative == 0:
+                emf += gauss
+            elif derivative == 1:
+                emf += 2. * ec[1] * gauss * dT
+            elif derivative == 2:
+                emf += 2. * ec[1] * gauss * (2. * ec[1] * dT**2 + 1.)
+            elif derivative == 3:
+                emf += 4. * ec[1] * ec[1] * gauss * dT * (2. * ec[1] * dT**2 + 3.)
+            else:
+                raise ValueError("sorry, derivatives > 3 not supported for this type.")
+        return emf
+
+    def _eval_piece_derivatives(self, i, T, order):
+        """\
+        Evaluate piece i of the function and its derivatives up to the given
+        order (at most 3) on all of T. Returns a list of new arrays.
+        """
+        tmin, tmax, coefs, ec = self.table[i]
+        # Horner's scheme carried along for the derivatives; at the end
+        # p[k] holds the k-th derivative divided by k factorial.
+        p = [np.full(T.shape, coefs[0], dtype=float)]
+        p += [np.zeros(T.shape) for k in range(order)]
+        for c in coefs[1:]:
+            for k in range(order, 0, -1):
+                p[k] *= T
+                p[k] += p[k-1]
+            p[0] *= T
+            p[0] += c
+        for k in range(2, order+1):
+            p[k] *= (1., 1., 2., 6.)[k]
+
+        if ec:
+            dT = T - ec[2]
+            gauss = ec[0] * np.exp(ec[1] * dT**2)
+            p[0] += gauss
+            if order >= 1:
+                p[1] += 2. * ec[1] * gauss * dT
+            if order >= 2:
+                p[2] += 2. * ec[1] * gauss * (2. * ec[1] * dT**2 + 1.)
+            if order >= 3:
+                p[3] += 4. * ec[1] * ec[1] * gauss * dT * (2. * ec[1] * dT**2 + 3.)
+        return p
+
+    def inverse(self,V,Tstart=None,Vtol=1e-6,branch="high",out=None,dtype=None,
+                counts=None):
         """
         Find the temperature corresponding to a given voltage, via zero-finding.
         
         Parameters
         ----------
-        V: float
-            Measured voltage (in appropriate units) goes here.
-        Tstart: float
-            Suggested starting temperature for search. If not provided, uses midpoint
-            of range. You can speed the search convergence by providing a
-            good starting guess here. This function anyway tries its best to converge.
+        V: array_like
+            Measured voltage or array of voltages (in appropriate units) goes here.
+        Tstart: array_like
+            Suggested starting temperature for search, broadcast against V. If
+            not provided, a starting point is interpolated within the monotonic
+            branch of the function that contains V (see .branches). Normally
+            there is no need to provide this.
         Vtol: float
             Desired absolute tolerance of voltage value.
+        branch: {'high', 'low', 'raise'}, optional
+            Which solution to return for voltages that have more than one, on
+            non-monotonic functions: the highest temperature one (default),
+            the lowest temperature one, or raise a ValueError. Among the
+            standard thermocouple functions this only concerns type B, whose
+            emf has a minimum near 21 degC and so has two solutions for
+            voltages between about -2.6 uV and 0.
+        out: ndarray, optional
+            Array of the same shape as V to write the result into, which is
+            then returned. Repeated calls with the same out make no large
+            allocations, since big arrays are worked on in small blocks.
+        dtype: floating point dtype, optional
+            Type of the returned temperatures, by default out.dtype if out is
+            given, else float64. The search itself is always done in float64.
+        counts: dict, optional
+            If given, the 'values' solved for, and the 'iterations' and
+            'fallbacks' of the search (see enable_stats) in this call are
+            added to its entries, whether statistics are enabled or not.
         
         Returns
         -------
-        T: float
+        T: float or array_like
             Temperature T, such that func(T) = V
             Note that the result is checked before returning: if the solution
             would have |func(T) - V| > Vtol, an exception is raised instead.
 
         Note on implementation
         ----------------------
-        First this method tries to use scipy.optimize.newton;
-        failing that, it uses scipy.optimize.brentq.
-        
-        For non-monotonic emf functions this may fail. Among the standard thermocouple
-        functions such only occurs with type B in the range 0-50 degC. Anyway, since
-        these thermocouples are generally used for higher temperature you should be
-        able to avoid that situation.
-        
-        This function requires scipy to be installed. Upon the first instance
-        of calling this function, it attempts to import scipy.optimize.
-        This function might take a few milliseconds per call. If that's too
-        slow for you, you may want to roll your own solution.
+        The voltage is first located in the index of monotonic branches of the
+        function, which gives a tight bracket for the solution and a good
+        starting point inside it. Then this method tries Halley's method (a
+        Newton variant using the second derivative) on plain floats, which
+        typically takes a few microseconds. Failing that, it falls back on a
+        safeguarded search within the bracket: Newton steps, replaced by
+        bisection whenever they would leave the bracket or do not shrink
+        fast enough. That always converges, within a bounded number of
+        iterations.
+
+        Arrays of voltages are solved all together: Halley's method runs as one
+        batched iteration over the array, dropping each element as soon as it
+        has converged, and the elements where it fails are then found by the
+        same safeguarded search, batched, within their own brackets. The
+        results agree with the single-value search to within Vtol.
+
+        Only numpy is needed.
+
+        If statistics are enabled (see enable_stats), the calls, iterations
+        and fallbacks are counted in .stats.
         """
+        stats = self.stats
+        if counts is not None:
+            # counted on their own, then added to .stats as well
+            stats = _new_stats(len(self.branches))
+        if stats is None:
+            return self._inverse(V, Tstart, Vtol, branch, out, dtype)
+        t0 = _timer()
+        stats['calls'] += 1
+        stats['values'] += 1 if isinstance(V, _scalar_types) else np.size(V)
+        try:
+            return self._inverse(V, Tstart, Vtol, branch, out, dtype, stats)
+        except ValueError as e:
+            if e.args and e.args[0] == _out_of_range_msg:
+                stats['out_of_range'] += 1
+            raise
+        finally:
+            stats['seconds'] += _timer() - t0
+            if counts is not None:
+                for key in ['values', 'iterations', 'fallbacks']:
+                    counts[key] = counts.get(key, 0) + stats[key]
+                if self.stats is not None:
+                    for key, value in stats.items():
+                        self.stats[key] += value
+
+    def _inverse(self, V, Tstart, Vtol, branch, out, dtype, stats=None):
+        """ inverse() without the statistics bookkeeping, see there. """
+        if branch not in ["high", "low", "raise"]:
+            raise ValueError("invalid branch parameter",branch)
+        if (out is not None or dtype is not None or
+                not isinstance(V, _scalar_types) or not (
+                Tstart is None or isinstance(Tstart, _scalar_types))):
+            return self._inverse_array(V, Tstart, Vtol, branch, out, dtype, stats)
 
-        ensure_import_optimize()
-        
-        if Tstart == None:
-            Tstart = 0.5*(self.minT + self.maxT)
         V = float(V)
-        
-        # We use "extrapolate" here to allow Newton search to play outside the
-        # allowed range in the hope that it returns later on.
-        fun0 = lambda T: self(T,out_of_range="extrapolate") - V
-        fun1 = lambda T: self(T,derivative=1,out_of_range="extrapolate")
-        fun2 = lambda T: self(T,derivative=2,out_of_range="extrapolate")
+        b = self._scalar_find_branch(V, Vtol, branch)
+        tlo, thi, vlo, vhi, increasing = self.branches[b]
+        if Tstart is None:
+            Tstart = tlo + (V - vlo)*(thi - tlo)/(vhi - vlo)
+            Tstart = min(max(Tstart, tlo), thi)
+
+        # Try Halley's method first, on plain floats. The search may play
+        # outside the bracket (extrapolating) in the hope that it returns
+        # later on; the solution is accepted if it lies on the same monotonic
+        # run of branches.
+        if stats is not None:
+            iterations = stats['iterations']
+        T = self._inverse_scalar_halley(V, float(Tstart), Vtol, stats=stats)
+        rlo, rhi = self._branch_run_limits[b]
+        if T is None or not rlo <= T <= rhi:
+            # Any problems (range error, convergence, whatever), then use the
+            # safeguarded search within the bracket.
+            if stats is not None:
+                stats['fallbacks'] += 1
+            T = self._inverse_scalar_bracketed(V, Vtol, tlo, thi, increasing,
+                                               float(Tstart), stats=stats)
+        if stats is not None:
+            stats['branch_iterations'][b] += stats['iterations'] - iterations
+        return T
+
+    def enable_stats(self, enable=True):
+        """\
+        Start (or with enable=False, stop) counting inverse lookup statistics
+        in the .stats dict, which holds:
+
+        - 'calls': number of calls of inverse (a Thermocouple_Reference
+          solves big arrays block by block, with one call per block)
+        - 'values': number of voltages solved for
+        - 'iterations': Halley's method iterations, plus those of the
+          fallback search
+        - 'fallbacks': number of voltages for which Halley's method failed,
+          and the safeguarded search within the bracket was used
+        - 'out_of_range': number of calls that raised a ValueError because a
+          voltage was out of range
+        - 'seconds': total wall time spent in inverse
+        - 'branch_iterations': iterations spent in each branch of .branches,
+          which shows the voltage ranges that are slow to solve
+
+        When disabled (the default), .stats is None and inverse does no
+        bookkeeping at all. Functions later made by in_units inherit the
+        setting.
+        """
+        if not enable:
+            self.stats = None
+        elif self.stats is None:
+            self.stats = _new_stats(len(self.branches))
+
+    def reset_stats(self):
+        """ Zero the inverse lookup statistics, if enabled. """
+        if self.stats is not None:
+            self.stats.update(_new_stats(len(self.branches)))
+
+    def in_units(self, Tunits, Vunits):
+        """\
+        Return this function for temperatures in Tunits ('C', 'F', 'K' or
+        'R') and voltages in Vunits ('V', 'mV' or 'uV'), as another
+        Polynomial_Gaussian_Piecewise_Function.
+
+        The unit conversions are folded into the polynomial and gaussian
+        coefficients, so evaluating the new function costs exactly the same
+        as evaluating this one. Re-expanding the polynomials around another
+        zero of temperature costs a little precision: for the curves in this
+        package, the results agree to within 1e-9 mV.
+
+        Functions are built the first time they are requested, and then kept.
+        """
+        if (Tunits, Vunits) == (self.Tunits, self.Vunits):
+            return self
         try:
-            # Try newton's method first.
-            T = optimize.newton(fun0, Tstart, fprime=fun1, fprime2=fun2, tol=Vtol)
-            if abs(self(T)-V) > Vtol:
-                raise ValueError
-        except:
-            # Any problems (range error, convergence, whatever), then try brentq
-            #
-            # FIXME: we are assuming the emf function is monotonic here.
-            # for type B thermocouple that's not quite true, and so with that type
-            # we could raise exception if someone asks for a low V value.
-            # (anyway they should not ask such a thing, as type B is meant
-            #  for high temperatures.)
-            try:
-                T = optimize.brentq(fun0, self.minT, self.maxT)
-            except ValueError as e:
-                if e.args == ("f(a) and f(b) must have different signs",):
-                    raise ValueError("Voltage not within in allowed range.")
-                else:
-                    raise
-            if not abs(self(T,out_of_range="nan") - V) <= Vtol:
-                raise ValueError("Did not converge within tolerance.")
-        
+            return self._unit_functions[Tunits, Vunits]
+        except KeyError:
+            pass
+        if Tunits not in Tunits_long:
+            raise ValueError("unknown temperature unit", Tunits)
+        if Vunits not in Vunits_long:
+            raise ValueError("unknown voltage unit", Vunits)
+
+        # Temperatures in our units are mul*T + add, T in the new units.
+        mul, add = Tunits_mat[self.Tunits]['from'][Tunits][0]
+        imul, iadd = Tunits_mat[self.Tunits]['to'][Tunits][0]
+        scale = Vunits_scale[self.Vunits]['to'][Vunits]
+        table = []
+        for tmin,tmax,pc,ec in self.table:
+            pc = _compose_affine(pc, mul, add, scale)
+            if ec:
+                ec = [ec[0]*scale, ec[1]*mul*mul, (ec[2] - add)/mul]
+            table.append((tmin*imul + iadd, tmax*imul + iadd, pc, ec))
+        func = Polynomial_Gaussian_Piecewise_Function(table, Tunits, Vunits,
+                    source=self.source, calibration=self.calibration)
+        if self.stats is not None:
+            func.enable_stats()
+        self._unit_functions[Tunits, Vunits] = func
+        return func
+
+    def inverse_approx(self,V,newton=False,max_error=1e-3,out_of_range="raise"):
+        """\
+        Fast approximate inverse lookup, using piecewise Chebyshev fits of the
+        inverse function instead of a numerical search.
+
+        Parameters
+        ----------
+        V: array_like
+            Measured voltage or array of voltages.
+        newton: bool, optional
+            If True, finish with one Newton step on the exact function, which
+            makes the result agree with inverse() to well within its default
+            Vtol. Default is False.
+        max_error: float, optional
+            Desired maximum error of the approximation in temperature units,
+            defaults to 1e-3. The fits for each max_error are built the first
+            time they are needed (this takes some milliseconds) and then kept.
+        out_of_range: {'raise', 'nan'}, optional
+            Determines behaviour for voltages outside the function's range.
+
+        Returns
+        -------
+        T: array_like
+            Temperatures, such that func(T) is approximately V. The achieved
+            maximum error of the fits is given by
+            func.approx_inverse(max_error).max_error.
+
+        For non-monotonic functions (type B), the highest temperature solution
+        is returned.
+        """
+        return self.approx_inverse(max_error)(V, newton=newton,
+                                              out_of_range=out_of_range)
+
+    def approx_inverse(self, max_error=1e-3):
+        """ The Approximate_Inverse object used by inverse_approx(). """
+        try:
+            return self._approx_inverses[max_error]
+        except KeyError:
+            # imported here as numpy.polynomial is slow to import
+            from .approx_inverse import Approximate_Inverse
+            ai = Approximate_Inverse(self, max_error)
+            self._approx_inverses[max_error] = ai
+            return ai
+
+    @property
+    def branches(self):
+        """\
+        Index of the monotonic branches of the function: a list, sorted by
+        temperature, of tuples
+            (minimum T, maximum T, V at minimum T, V at maximum T, increasing)
+        The function is split into branches at the segment breakpoints and at
+        its extrema. This is computed when first needed.
+        """
+        try:
+            return self._branches
+        except AttributeError:
+            self._build_branch_index()
+            return self._branches
+
+    def _build_branch_index(self):
+        """\
+        Compute .branches, and group consecutive branches of the same direction
+        into runs, which are monotonic apart from the tiny discontinuities
+        where pieces meet. The inverse lookup first chooses a run, by voltage
+        and by the branch policy, and then the branch within the run.
+        """
+        branches = []
+        for i, (tmin, tmax, coefs, ec) in enumerate(self.table):
+            # Locate sign changes of the derivative on a fine grid, then
+            # refine each one by bisection.
+            T = np.linspace(tmin, tmax, 10001)
+            S = self._eval_piece(i, T, 1)
+            cuts = [tmin]
+            for j in np.flatnonzero(np.sign(S[1:]) * np.sign(S[:-1]) < 0):
+                lo, hi = T[j], T[j+1]
+                slo = S[j]
+                for it in range(60):
+                    mid = 0.5*(lo + hi)
+                    smid = self._eval_piece(i, np.array(mid), 1)
+                    if (smid > 0) == (slo > 0):
+                        lo = mid
+                    else:
+                        hi = mid
+                cuts.append(0.5*(lo + hi))
+            cuts.append(tmax)
+            for tlo, thi in zip(cuts[:-1], cuts[1:]):
+                vlo, vhi = self._eval_piece(i, np.array([tlo, thi]), 0)
+                branches.append((float(tlo), float(thi), float(vlo), float(vhi),
+                                 bool(vhi > vlo)))
+        self._branches = branches
+
+        # runs: (first branch, last branch, increasing, minimum V, maximum V,
+        #        boundary voltages between the run's branches)
+        runs = []
+        first = 0
+        for b in range(1, len(branches)+1):
+            if b == len(branches) or branches[b][4] != branches[first][4]:
+                inc = branches[first][4]
+                vs = [v for br in branches[first:b] for v in br[2:4]]
+                bounds = [br[3] for br in branches[first:b-1]]
+                if not inc:
+                    # negated, so that the run's lookup is always ascending
+                    bounds = [-v for v in bounds]
+                runs.append((first, b-1, inc, min(vs), max(vs), bounds))
+                first = b
+        self._runs = runs
+        self._branch_run_limits = []
+        for first, last, inc, vmin, vmax, bounds in runs:
+            self._branch_run_limits += [(branches[first][0], branches[last][1])]*(last-first+1)
+        self._branch_arrays = [np.array(col) for col in zip(*branches)]
+        self._policy_indices = {}
+
+    def _policy_index(self, branch):
+        """\
+        Sorted voltage edges, and the run to use between each pair of edges
+        under the given branch policy (-1 where ambiguous and branch='raise').
+        """
+        try:
+            return self._policy_indices[branch]
+        except AttributeError:
+            self._build_branch_index()
+            return self._policy_index(branch)
+        except KeyError:
+            pass
+        runs = self._runs
+        edges = sorted(set([r[3] for r in runs] + [r[4] for r in runs]))
+        choice = []
+        for vlo, vhi in zip(edges[:-1], edges[1:]):
+            vmid = 0.5*(vlo + vhi)
+            cands = [ri for ri, r in enumerate(runs) if r[3] <= vmid <= r[4]]
+            if not cands:
+                # a gap at a discontinuity; use the nearest run
+                cands = [min(range(len(runs)), key=lambda ri:
+                             min(abs(runs[ri][3] - vmid), abs(runs[ri][4] - vmid)))]
+            if len(cands) == 1:
+                choice.append(cands[0])
+            elif branch == "high":
+                choice.append(cands[-1])
+            elif branch == "low":
+                choice.append(cands[0])
+            else:
+                choice.append(-1)
+        if len(edges) == 1:
+            edges = edges*2
+            choice = [0]
+        index = (edges, choice, np.array(edges), np.array(choice))
+        self._policy_indices[branch] = index
+        return index
+
+    def _scalar_find_branch(self, V, Vtol, branch):
+        """ Index in .branches of the branch to search for float V. """
+        edges, choice, e, c = self._policy_index(branch)
+        if not edges[0] - Vtol <= V <= edges[-1] + Vtol:
+            raise ValueError(_out_of_range_msg)
+        k = min(max(bisect_left(edges, V) - 1, 0), len(choice) - 1)
+        ri = choice[k]
+        if ri < 0:
+            raise ValueError("Voltage has more than one solution (non-monotonic function), choose branch='high' or 'low'.")
+        first, last, inc, vmin, vmax, bounds = self._runs[ri]
+        return first + bisect_left(bounds, V if inc else -V)
+
+    def _find_branch(self, V, Vtol, branch):
+        """ Indices in .branches of the branches to search, for 1-d array V. """
+        edges, choice, e, c = self._policy_index(branch)
+        bad = ~((V >= e[0] - Vtol) & (V <= e[-1] + Vtol))
+        if np.any(bad):
+            raise ValueError(_out_of_range_msg, np.extract(bad, V))
+        k = np.searchsorted(e, V) - 1
+        np.clip(k, 0, len(choice) - 1, out=k)
+        r = c.take(k)
+        if np.any(r < 0):
+            raise ValueError("Voltage has more than one solution (non-monotonic function), choose branch='high' or 'low'.",
+                             np.extract(r < 0, V))
+        if len(self._runs) == 1 and not self._runs[0][5]:
+            return r
+        b = np.empty(V.shape, dtype=np.intp)
+        for ri, (first, last, inc, vmin, vmax, bounds) in enumerate(self._runs):
+            sel = (r == ri)
+            if np.any(sel):
+                b[sel] = first + np.searchsorted(bounds, V[sel] if inc else -V[sel])
+        return b
+
+    def _inverse_array(self, V, Tstart, Vtol, branch, out=None, dtype=None,
+                       stats=None):
+        """ Array version of inverse(), see there. """
+        V = np.asarray(V)
+        if Tstart is not None:
+            Tstart = np.asarray(Tstart, dtype=float)
+            if Tstart.ndim:
+                V, Tstart = np.broadcast_arrays(V, Tstart)
+        solve = lambda V, T0: self._inverse_block(
+                    V.astype(np.float64, copy=False), T0, Vtol, branch,
+                    stats=stats)
+        if out is None and dtype is None and V.size <= _block_size:
+            return solve(V.reshape(-1), Tstart).reshape(V.shape)[()]
+        out, dtype = _prepare_out(V.shape, out, dtype)
+        return _blockwise(solve, out, V, Tstart)
+
+    def _inverse_block(self, V, Tstart, Vtol, branch, maxiter=50, counts=None,
+                       stats=None):
+        """\
+        Solve for 1-d float array V, with Tstart None, a scalar or a 1-d
+        array. Returns a new array of temperatures. If counts is given (an
+        integer array like V), the number of iterations spent on each
+        element is added to it. Iterations and fallbacks are also counted
+        into stats, if given.
+        """
+        if stats is not None and counts is None:
+            counts = np.zeros(V.size, int)
+
+        # Brackets and starting points from the branch index.
+        b = self._find_branch(V, Vtol, branch)
+        tlo, thi, vlo, vhi, increasing = [col.take(b) for col in self._branch_arrays]
+        if Tstart is None:
+            with np.errstate(all='ignore'):
+                T0 = tlo + (V - vlo)*(thi - tlo)/(vhi - vlo)
+            T0 = np.clip(T0, tlo, thi)
+        else:
+            T0 = np.broadcast_to(Tstart, V.shape)
+        rlo, rhi = [np.array(col).take(b) for col in zip(*self._branch_run_limits)]
+
+        # Batched Halley's method. `active` holds the indices of elements not
+        # yet converged; their current guesses are in Ta and targets in Va.
+        T = np.full(V.shape, np.nan)
+        active = np.arange(V.size)
+        Ta = np.array(T0, dtype=float)
+        Va = V
+        with np.errstate(all='ignore'):
+            for it in range(maxiter):
+                if active.size == 0:
+                    break
+                if counts is not None:
+                    counts[active] += 1
+                f0, f1, f2 = self.derivatives(Ta,2,out_of_range="extrapolate")
+                f0 -= Va
+                done = np.abs(f0) <= Vtol
+                step = 2.*f0*f1/(2.*f1*f1 - f0*f2)
+                if np.any(done):
+                    # One last Halley step polishes the result to full
+                    # precision (see _inverse_scalar_halley). Solutions off
+                    # the chosen run of branches are rejected.
+                    ad = active[done]
+                    sd = step[done]
+                    Td = Ta[done] - np.where(np.isfinite(sd), sd, 0.)
+                    ok = (Td >= rlo[ad]) & (Td <= rhi[ad])
+                    T[ad[ok]] = Td[ok]
+                Ta = Ta - step
+                keep = ~done & np.isfinite(Ta)
+                active = active[keep]
+                Ta = Ta[keep]
+                Va = Va[keep]
+
+        failed = np.flatnonzero(np.isnan(T))
+        if failed.size:
+            fcounts = None if counts is None else np.zeros(failed.size, int)
+            T[failed] = self._inverse_bracketed(V[failed], Vtol,
+                            tlo[failed], thi[failed], increasing[failed],
+                            T0[failed], counts=fcounts)
+            if counts is not None:
+                counts[failed] += fcounts
+        if stats is not None:
+            stats['iterations'] += int(counts.sum())
+            stats['fallbacks'] += failed.size
+            np.add.at(stats['branch_iterations'], b, counts)
         return T
 
+    def _inverse_bracketed(self, V, Vtol, lo, hi, increasing, T0=None,
+                           maxiter=200, counts=None):
+        """\
+        Safeguarded Newton search for 1-d array V, within brackets [lo, hi]
+        on which the function is increasing or decreasing as given, starting
+        from T0 (default: the middle of the brackets). Iterations are counted
+        into counts as for _inverse_block.
+
+        Each element takes a Newton step if it lands inside its bracket and
+        is at most half the previous step, else it bisects; the brackets
+        shrink on every iteration. After 100 iterations only bisection is
+        used, so that every element has converged well within maxiter: to
+        |func(T) - V| <= Vtol, or to a bracket of a few ulps, which also
+        finds the nearest end of the bracket for voltages just beyond it.
+        """
+        T = np.empty(V.shape)
+        active = np.arange(V.size)
+        lo = np.array(lo, dtype=float)
+        hi = np.array(hi, dtype=float)
+        if T0 is None:
+            x = 0.5*(lo + hi)
+        else:
+            x = np.clip(np.asarray(T0, dtype=float), lo, hi)
+        tiny = 4e-16*np.maximum(np.abs(lo), np.abs(hi))
+        dxold = hi - lo
+        Va = V
+        with np.errstate(all='ignore'):
+            for it in range(maxiter):
+                if active.size == 0:
+                    break
+                if counts is not None:
+                    counts[active] += 1
+                f0, f1, f2 = self.derivatives(x,2,out_of_range="extrapolate")
+                f0 -= Va
+                # The root is above x where the function is still short of V.
+                above = np.where(increasing, f0 < 0., f0 > 0.)
+                lo = np.where(above, x, lo)
+                hi = np.where(above, hi, x)
+
+                converged = np.abs(f0) <= Vtol
+                done = converged | (hi - lo <= tiny)
+                if np.any(converged):
+                    # Polish with a Halley step, kept inside the bracket.
+                    xd = x[converged]
+                    step = 2.*f0[converged]*f1[converged]/(
+                        2.*f1[converged]**2 - f0[converged]*f2[converged])
+                    Td = xd - step
+                    ok = (Td >= lo[converged]) & (Td <= hi[converged])
+                    T[active[converged]] = np.where(ok, Td, xd)
+                narrow = done & ~converged
+                if np.any(narrow):
+                    # The bracket collapsed on one of its ends without
+                    # reaching V, which lies just beyond it, or on the other
+                    # side of a small discontinuity where pieces meet: take
+                    # the nearer end, evaluated on its own piece.
+                    l = lo[narrow]
+                    h = hi[narrow]
+                    Vn = Va[narrow]
+                    fl = np.abs(self(l,out_of_range="extrapolate") - Vn)
+                    fh = np.abs(self(h,out_of_range="extrapolate") - Vn)
+                    T[active[narrow]] = np.where(fl <= fh, l, h)
+
+                dx = f0/f1
+                xn = x - dx
+                newton = (xn > lo) & (xn < hi) & (np.abs(dx) <= 0.5*dxold)
+                if it >= 100:
+                    newton[:] = False
+                dx = np.where(newton, dx, x - 0.5*(lo + hi))
+                x = np.where(newton, xn, 0.5*(lo + hi))
+                dxold = np.abs(dx)
+
+                keep = ~done
+                active = active[keep]
+                x = x[keep]
+                lo = lo[keep]
+                hi = hi[keep]
+                tiny = tiny[keep]
+                dxold = dxold[keep]
+                Va = Va[keep]
+                increasing = increasing[keep]
+        T[active] = x
+
+        if not np.all(np.abs(self(T,out_of_range="nan") - V) <= Vtol):
+            raise ValueError("Did not converge within tolerance.")
+        return T
 
 
 def doc_emf(uT, uV):
@@ -250,9 +1120,9 @@ def doc_emf(uT, uV):
         ----------
         T : array_like
             Temperature or array of temperatures (in %s).
-        Tref : float, optional
-            Reference junctions' temperature (in %s),
-            defaults to %g.
+        Tref : array_like, optional
+            Reference junctions' temperature (in %s), or an array of them
+            broadcast against T, defaults to %g.
             If derivative != 0, Tref is irrelevant.
         derivative : integer, optional
             Use this parameter to evaluate the functional derivative of
@@ -262,6 +1132,13 @@ def doc_emf(uT, uV):
             Determines behaviour for out of range temperatures: raise an
             exception, return NaNs, or extrapolate using the nearest
             polynomial. Note - do not trust the extrapolation!
+        out : ndarray, optional
+            Array of the same shape as T to write the result into, which is
+            then returned. Repeated calls with the same out make no large
+            allocations.
+        dtype : floating point dtype, optional
+            Type to compute and return the result in, by default out.dtype
+            if out is given, else float64.
         
         Returns
         -------
@@ -287,32 +1164,44 @@ def doc_inverse(uT,uV):
         Inverse lookup: compute measurement junction temperature for a given
         measured voltage and given reference junctions temperature.
         
-        You must have SciPy installed to use this method.
-        (see documentation of .func.inverse for more notes on implementation)
+        (see documentation of .func.inverse for notes on implementation)
         
         This method uses %s temperature units and %s.
         
         Parameters
         ----------
-        emf : float
-            The measured voltage (in %s).
-        Tref : float, optional
-            The reference junctions' temperature (in %s).
+        emf : array_like
+            The measured voltage or array of voltages (in %s).
+        Tref : array_like, optional
+            The reference junctions' temperature (in %s), or an array of
+            them broadcast against emf, for example one per reading.
             This allows you to perform cold-junction compensation. Note that
             Tref = %g, the default, corresponds to the reference junctions
             being at the freezing point of water.
-        Tstart : float, optional
+        Tstart : array_like, optional
             Suggested starting temperature (in %s).
             You can hasten the search convergence by providing a good starting
-            guess here. If not provided, the midpoint of the entire temperature
-            range will be used.
+            guess here. If not provided, a starting point is interpolated
+            within the monotonic branch of the function that contains the
+            emf (see .func.branches), which is normally good enough.
         Vtol : float, optional
             Tolerance of voltage in search (in %s),
             defaults to %.3e.
+        branch : {'high', 'low', 'raise'}, optional
+            Which temperature to return when the emf function is not
+            monotonic and several temperatures match (type B near 0 degC):
+            the highest (default) or lowest one, or raise a ValueError.
+        out : ndarray, optional
+            Array of the same shape as emf to write the result into, which is
+            then returned. Repeated calls with the same out make no large
+            allocations.
+        dtype : floating point dtype, optional
+            Type of the returned temperatures, by default out.dtype if out
+            is given, else float64.
         
         Returns
         -------
-        T : float
+        T : float or array_like
             Junction temperature (in %s), such that:
               emf == func(T) - func(Tref)    (to within Vtol)
         """%(Tlong, Vlong, Vshort, Tshort, Tref_default, Tshort,
@@ -342,11 +1231,22 @@ class Thermocouple_Reference(object):
     degrees Rankine      .emf_mVR     .inverse_RmV
     ==================   ==========   ==============
     
+    These are shortcuts for the general methods ``.convert(T, Tunit, Vunit)``
+    and ``.inverse(emf, Tunit, Vunit)``, which also support voltages in
+    volts ('V') and microvolts ('uV').
+
     In each case it is possible (and desirable) to pass in the reference
     junction temperature by the keyword argument Tref. In practice, that
     junction is often not at the default water-ice point value, and these
     methods take care of the the cold junction compensation in the correct
-    way.
+    way. Tref may also be an array, e.g. one reference temperature per
+    reading; the emfs of recently used reference temperatures are
+    remembered, so that readings sharing a few reference temperatures only
+    pay for evaluating those once.
+
+    When called with a single Python float (or int), these methods take a
+    scalar fast path that avoids numpy array overhead and returns a float;
+    this is meant for control loops converting one reading at a time.
 
     The attribute .func gives access to the raw lookup function. Note that
     the units of this function are typically (but not always) Celsius, so
@@ -388,11 +1288,54 @@ class Thermocouple_Reference(object):
         self._mats_Tunits_from = Tunits_mat['C']['from']
         self.type        = ttype
         self.composition = composition
+
+        # Hermite_Lookup_Table objects, built when first requested.
+        self._lookup_tables = {}
+
+        # Recently used reference junction emfs, keyed on units and
+        # temperature; see _reference_emf.
+        self._ref_memo = {}
     
     def __repr__(self):
         rng = "%.1f to %.1f"%(self.func.minT,self.func.maxT)
         return "<%s thermocouple reference (%s %s)>"%(
                 self.type, rng, Tunits_short[self.func.Tunits])
+
+    def _unit_functions(self):
+        """ .func and the versions of it in other units built so far. """
+        return [self.func] + list(self.func._unit_functions.values())
+
+    def enable_stats(self, enable=True):
+        """\
+        Start (or with enable=False, stop) counting inverse lookup statistics
+        for this thermocouple, in all units. See
+        Polynomial_Gaussian_Piecewise_Function.enable_stats, and .stats.
+        """
+        for func in self._unit_functions():
+            func.enable_stats(enable)
+
+    def reset_stats(self):
+        """ Zero the inverse lookup statistics, if enabled. """
+        for func in self._unit_functions():
+            func.reset_stats()
+
+    @property
+    def stats(self):
+        """\
+        Inverse lookup statistics of this thermocouple, summed over all units
+        (a new dict, see Polynomial_Gaussian_Piecewise_Function.enable_stats),
+        or None if they are not enabled. The statistics of each unit are in
+        .func.in_units(Tunit, Vunit).stats.
+        """
+        if self.func.stats is None:
+            return None
+        total = _new_stats(len(self.func.branches))
+        for func in self._unit_functions():
+            if func.stats is None:
+                continue
+            for key, value in func.stats.items():
+                total[key] = total[key] + value
+        return total
     
     @property
     def minT_C(self):
@@ -403,97 +1346,326 @@ class Thermocouple_Reference(object):
         imul, iadd = self._mats_Tunits_to  ['C'][0]
         return self.func.maxT*imul + iadd
 
-    @doc_emf('C','mV')
-    def emf_mVC(self,T,Tref=0.,derivative=0,out_of_range="raise"):
-        #mul,add = self._mats_Tunits_from['C'][0]
-        #T = T*mul + add
-        f_T   = self.func(T   ,derivative=derivative,out_of_range=out_of_range)
+    def lookup_table(self, max_error=1e-4):
+        """\
+        Return a Hermite_Lookup_Table for this thermocouple, which answers
+        inverse_CmV queries by cubic Hermite interpolation in a table of the
+        inverse emf function and its derivative. The table grid is chosen so
+        that the interpolation error stays below max_error (in mV). Tables
+        are built the first time they are requested, and then kept.
+        """
+        try:
+            return self._lookup_tables[max_error]
+        except KeyError:
+            # imported here as lookup_table uses this module's helpers
+            from .lookup_table import Hermite_Lookup_Table
+            table = Hermite_Lookup_Table(self, max_error)
+            self._lookup_tables[max_error] = table
+            return table
+
+    def convert(self,T,Tunit='C',Vunit='mV',Tref=None,derivative=0,
+                out_of_range="raise",out=None,dtype=None):
+        """\
+        Compute electromotive force for given thermocouple measurement
+        junction temperature and given reference junctions temperature, in
+        any supported units. The emf_mV* methods are shortcuts for this.
+
+        Parameters
+        ----------
+        T : array_like
+            Temperature or array of temperatures (in Tunit).
+        Tunit : {'C', 'F', 'K', 'R'}, optional
+            Temperature unit: degrees Celsius (default), degrees Fahrenheit,
+            kelvins or degrees Rankine.
+        Vunit : {'V', 'mV', 'uV'}, optional
+            Voltage unit of the result: volts, millivolts (default) or
+            microvolts.
+        Tref : array_like, optional
+            Reference junctions' temperature (in Tunit), or an array of them
+            broadcast against T. Defaults to the freezing point of water.
+            If derivative != 0, Tref is irrelevant.
+        derivative : integer, optional
+            Use this parameter to evaluate the functional derivative of
+            the emf function at a given temperature (in Vunit / Tunit**
+            derivative). Defaults to derivative=0 (no derivative).
+        out_of_range : {'raise', 'nan', 'extrapolate'}, optional
+            Determines behaviour for out of range temperatures, as for
+            emf_mVC.
+        out : ndarray, optional
+            Array of the same shape as T to write the result into, which is
+            then returned.
+        dtype : floating point dtype, optional
+            Type to compute and return the result in, by default out.dtype
+            if out is given, else float64.
+
+        Returns
+        -------
+        emf : array_like
+            computed emfs (in Vunit)
+
+        Note on implementation
+        ----------------------
+        The unit conversions are not applied to the arrays, but folded into
+        the coefficients of the reference function (see .func.in_units),
+        once for each pair of units. So evaluating in degF or K costs the
+        same as in degC.
+        """
+        func = self.func.in_units(Tunit, Vunit)
+        if Tref is None:
+            Tref = self._mats_Tunits_to[Tunit][0][1]
+        if derivative == 0 and np.ndim(Tref) and (out is not None or
+                dtype is not None or np.broadcast(T, Tref).size > _block_size):
+            # Compensate block by block, so that neither the reference emfs
+            # nor the uncompensated ones are ever held in full.
+            shape = np.broadcast(T, Tref).shape
+            out, dtype = _prepare_out(shape, out, dtype)
+            return _blockwise(lambda T, Tref: _subtract(
+                        func(T,out_of_range=out_of_range,dtype=dtype),
+                        self._reference_emf(func, Tref, out_of_range)),
+                    out, np.broadcast_to(T, shape), np.broadcast_to(Tref, shape))
+        f_T = func(T,derivative=derivative,out_of_range=out_of_range,
+                   out=out,dtype=dtype)
         if derivative != 0:
-            return f_T # * (mul**derivative)
-        #Tref = Tref*mul + add
-        f_ref = self.func(Tref,derivative=derivative,out_of_range=out_of_range)
-        return f_T - f_ref
+            return f_T
+        f_ref = self._reference_emf(func, Tref, out_of_range)
+        if out is not None:
+            out -= f_ref
+            return out
+        return _subtract(f_T, f_ref)
+
+    def inverse(self,emf,Tunit='C',Vunit='mV',Tref=None,Tstart=None,Vtol=None,
+                branch="high",out=None,dtype=None):
+        """\
+        Inverse lookup: compute measurement junction temperature for a given
+        measured voltage and given reference junctions temperature, in any
+        supported units. The inverse_*mV methods are shortcuts for this.
+
+        Parameters
+        ----------
+        emf : array_like
+            The measured voltage or array of voltages (in Vunit).
+        Tunit : {'C', 'F', 'K', 'R'}, optional
+            Temperature unit of Tref, Tstart and the result: degrees Celsius
+            (default), degrees Fahrenheit, kelvins or degrees Rankine.
+        Vunit : {'V', 'mV', 'uV'}, optional
+            Voltage unit of emf and Vtol: volts, millivolts (default) or
+            microvolts.
+        Tref : array_like, optional
+            The reference junctions' temperature (in Tunit), or an array of
+            them broadcast against emf. Defaults to the freezing point of
+            water.
+        Tstart : array_like, optional
+            Suggested starting temperature (in Tunit), normally not needed.
+        Vtol : float, optional
+            Tolerance of voltage in search (in Vunit), defaults to 1 nV.
+        branch : {'high', 'low', 'raise'}, optional
+            Which temperature to return when several match, as for
+            inverse_CmV.
+        out : ndarray, optional
+            Array of the same shape as emf to write the result into, which is
+            then returned.
+        dtype : floating point dtype, optional
+            Type of the returned temperatures, by default out.dtype if out
+            is given, else float64.
+
+        Returns
+        -------
+        T : float or array_like
+            Junction temperature (in Tunit), such that:
+              emf == convert(T) - convert(Tref)    (to within Vtol)
+        """
+        func = self.func.in_units(Tunit, Vunit)
+        if Tref is None:
+            Tref = self._mats_Tunits_to[Tunit][0][1]
+        if Vtol is None:
+            Vtol = 1e-6*Vunits_scale['mV']['to'][Vunit]
+        if out is None and dtype is None and (
+                isinstance(emf, _scalar_types) and np.ndim(Tref) == 0 or
+                np.broadcast(emf, Tref).size <= _block_size):
+            return func.inverse(np.add(emf, self._reference_emf(func, Tref)),
+                    Tstart=Tstart, Vtol=Vtol, branch=branch)
+        # Compensate voltages block by block, to avoid full-size temporary
+        # arrays of reference emfs or of compensated voltages.
+        shape = np.broadcast(emf, Tref).shape
+        emf = np.broadcast_to(emf, shape)
+        if np.ndim(Tref):
+            Tref = np.broadcast_to(Tref, shape)
+        if np.ndim(Tstart):
+            Tstart = np.broadcast_to(Tstart, shape)
+        out, dtype = _prepare_out(shape, out, dtype)
+        return _blockwise(lambda emf, Tref, Tstart: func.inverse(
+                    emf + self._reference_emf(func, Tref), Tstart=Tstart,
+                    Vtol=Vtol, branch=branch), out, emf, Tref, Tstart)
+
+    def _reference_emf(self, func, Tref, out_of_range="raise"):
+        """\
+        Emf of func (self.func in some units) at reference junction
+        temperature(s) Tref. Values are remembered, so a reference
+        temperature shared by many calls or by many readings in an array is
+        only evaluated once.
+        """
+        if isinstance(Tref, _scalar_types) or np.ndim(Tref) == 0:
+            return self._reference_emf_scalar(func, float(Tref), out_of_range)
+        Tref = np.asarray(Tref)
+        flat = Tref.reshape(-1)
+        # Cold junction temperatures are sampled per reading but change
+        # slowly, so look up each run of equal values once. If they change
+        # too often for that to pay off, just evaluate them all.
+        starts = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        if starts.size >= flat.size // 8:
+            return func(Tref,out_of_range=out_of_range)
+        starts = np.concatenate(([0], starts))
+        values = [self._reference_emf_scalar(func, t, out_of_range)
+                  for t in flat[starts].tolist()]
+        counts = np.diff(np.append(starts, flat.size))
+        return np.repeat(values, counts).reshape(Tref.shape)
+
+    def _reference_emf_scalar(self, func, Tref, out_of_range):
+        """ _reference_emf for a single float Tref. """
+        key = (func.Tunits, func.Vunits, Tref)
+        memo = self._ref_memo
+        try:
+            return memo[key]
+        except KeyError:
+            pass
+        f_ref = func.eval_scalar(Tref,out_of_range=out_of_range)
+        # Only in-range values are kept, as only those don't depend on
+        # out_of_range.
+        if func.minT <= Tref <= func.maxT:
+            if len(memo) >= _ref_memo_size:
+                memo.clear()
+            memo[key] = f_ref
+        return f_ref
+
+    @doc_emf('C','mV')
+    def emf_mVC(self,T,Tref=0.,derivative=0,out_of_range="raise",out=None,dtype=None):
+        return self.convert(T,'C','mV',Tref,derivative,out_of_range,out,dtype)
     
     @doc_emf('F','mV')
-    def emf_mVF(self,T,Tref=32.,derivative=0,out_of_range="raise"):
-        mul,add = self._mats_Tunits_from['F'][0]
-        T = T*mul + add
-        f_T   = self.func(T   ,derivative=derivative,out_of_range=out_of_range)
-        if derivative != 0:
-            return f_T * (mul**derivative)
-        Tref = Tref*mul + add
-        f_ref = self.func(Tref,derivative=derivative,out_of_range=out_of_range)
-        return f_T - f_ref
+    def emf_mVF(self,T,Tref=32.,derivative=0,out_of_range="raise",out=None,dtype=None):
+        return self.convert(T,'F','mV',Tref,derivative,out_of_range,out,dtype)
     
     @doc_emf('K','mV')
-    def emf_mVK(self,T,Tref=273.15,derivative=0,out_of_range="raise"):
-        mul, add = self._mats_Tunits_from['K'][0]
-        T = T*mul + add
-        f_T   = self.func(T   ,derivative=derivative,out_of_range=out_of_range)
-        if derivative != 0:
-            return f_T * (mul**derivative)
-        Tref = Tref*mul + add
-        f_ref = self.func(Tref,derivative=derivative,out_of_range=out_of_range)
-        return f_T - f_ref
+    def emf_mVK(self,T,Tref=273.15,derivative=0,out_of_range="raise",out=None,dtype=None):
+        return self.convert(T,'K','mV',Tref,derivative,out_of_range,out,dtype)
     
     @doc_emf('R','mV')
-    def emf_mVR(self,T,Tref=491.67,derivative=0,out_of_range="raise"):
-        mul, add = self._mats_Tunits_from['R'][0]
-        T = T*mul + add
-        f_T   = self.func(T   ,derivative=derivative,out_of_range=out_of_range)
-        if derivative != 0:
-            return f_T * (mul**derivative)
-        Tref = Tref*mul + add
-        f_ref = self.func(Tref,derivative=derivative,out_of_range=out_of_range)
-        return f_T - f_ref
+    def emf_mVR(self,T,Tref=491.67,derivative=0,out_of_range="raise",out=None,dtype=None):
+        return self.convert(T,'R','mV',Tref,derivative,out_of_range,out,dtype)
     
     
     @doc_inverse('C','mV')
-    def inverse_CmV(self,emf,Tref=0.,Tstart=None,Vtol=1e-6):
-        #mul, add = self._mats_Tunits_from['C'][0]
-        #Tref = Tref*mul + add
-        f_ref = self.func(Tref)
-        #if Tstart != None: Tstart = Tstart*mul + add
-        T = self.func.inverse(emf+f_ref,
-                    Tstart=Tstart, Vtol=Vtol)
-        #imul, iadd = self._mats_Tunits_to['C'][0]
-        #T = T*imul + iadd
-        return T
+    def inverse_CmV(self,emf,Tref=0.,Tstart=None,Vtol=1e-6,branch="high",out=None,dtype=None):
+        return self.inverse(emf,'C','mV',Tref,Tstart,Vtol,branch,out,dtype)
     
     @doc_inverse('F','mV')
-    def inverse_FmV(self,emf,Tref=32.,Tstart=None,Vtol=1e-6):
-        mul, add = self._mats_Tunits_from['F'][0]
-        Tref = Tref*mul + add
-        f_ref = self.func(Tref)
-        if Tstart != None: Tstart = Tstart*mul + add
-        T = self.func.inverse(emf+f_ref,
-                    Tstart=Tstart, Vtol=Vtol)
-        imul, iadd = self._mats_Tunits_to['F'][0]
-        T = T*imul + iadd
-        return T
+    def inverse_FmV(self,emf,Tref=32.,Tstart=None,Vtol=1e-6,branch="high",out=None,dtype=None):
+        return self.inverse(emf,'F','mV',Tref,Tstart,Vtol,branch,out,dtype)
     
     @doc_inverse('K','mV')
-    def inverse_KmV(self,emf,Tref=273.15,Tstart=None,Vtol=1e-6):
-        mul, add = self._mats_Tunits_from['K'][0]
-        Tref = Tref*mul + add
-        f_ref = self.func(Tref)
-        if Tstart != None: Tstart = Tstart*mul + add
-        T = self.func.inverse(emf+f_ref,
-                    Tstart=Tstart, Vtol=Vtol)
-        imul, iadd = self._mats_Tunits_to['K'][0]
-        T = T*imul + iadd
-        return T
+    def inverse_KmV(self,emf,Tref=273.15,Tstart=None,Vtol=1e-6,branch="high",out=None,dtype=None):
+        return self.inverse(emf,'K','mV',Tref,Tstart,Vtol,branch,out,dtype)
     
     @doc_inverse('R','mV')
-    def inverse_RmV(self,emf,Tref=491.67,Tstart=None,Vtol=1e-6):
-        mul, add = self._mats_Tunits_from['R'][0]
-        Tref = Tref*mul + add
-        f_ref = self.func(Tref)
-        if Tstart != None: Tstart = Tstart*mul + add
-        T = self.func.inverse(emf+f_ref,
-                    Tstart=Tstart, Vtol=Vtol)
-        imul, iadd = self._mats_Tunits_to['R'][0]
-        T = T*imul + iadd
-        return T
+    def inverse_RmV(self,emf,Tref=491.67,Tstart=None,Vtol=1e-6,branch="high",out=None,dtype=None):
+        return self.inverse(emf,'R','mV',Tref,Tstart,Vtol,branch,out,dtype)
+
+class Thermocouple_Registry(MutableMapping):
+    """\
+    Dictionary of thermocouple names to Thermocouple_Reference objects, that
+    builds each object only when it is first looked up.
+
+    Entries are added with .register(name, factory), where factory() returns
+    the Thermocouple_Reference, or with .include(other_registry). Listing
+    the names (keys(), iteration, len(), `in`) builds nothing; values() and
+    items() of course build everything. Otherwise this behaves like a dict,
+    including assignment of ready-made objects.
+    """
+    def __init__(self, factories=()):
+        self._factories = dict(factories)
+        self._built = {}
+
+    def register(self, name, factory):
+        """ Add a thermocouple, to be built by calling factory(). """
+        self._factories[name] = factory
+        self._built.pop(name, None)
+
+    def include(self, other):
+        """\
+        Add all entries of another Thermocouple_Registry, without building
+        them. Objects are then shared between the two registries.
+        """
+        for name in other:
+            self.register(name, lambda name=name: other[name])
+
+    def __getitem__(self, name):
+        try:
+            return self._built[name]
+        except KeyError:
+            pass
+        tc = self._factories[name]()
+        # setdefault: if threads race to build, all get the same object.
+        return self._built.setdefault(name, tc)
+
+    def __setitem__(self, name, tc):
+        self._factories[name] = lambda: tc
+        self._built[name] = tc
+
+    def __delitem__(self, name):
+        del self._factories[name]
+        self._built.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+    def __repr__(self):
+        return "<thermocouple registry: %s>"%(", ".join(
+            repr(name) for name in sorted(self._factories)))
+
+def load_coefficient_store(resource):
+    """\
+    Load a coefficient store: a .npy file of this package, as written by
+    store_tables.py (see there for the format) from the create_tables_*.py
+    scripts. The file is memory mapped if possible (so that processes share
+    it), or else read in one go. A Thermocouple_Registry is returned, whose
+    entries are built from that data when first used.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), resource)
+    if os.path.isfile(path):
+        store = np.load(path, mmap_mode='r', allow_pickle=False)
+    else:
+        # e.g. in a zipped package
+        import io, pkgutil
+        data = pkgutil.get_data(__name__.rpartition('.')[0], resource)
+        store = np.load(io.BytesIO(data), allow_pickle=False)
+    names = store['name'].tolist()
+    registry = Thermocouple_Registry()
+    first = 0
+    for last in range(1, len(names) + 1):
+        if last == len(names) or names[last] != names[first]:
+            registry.register(names[first], lambda pieces=store[first:last]:
+                              _thermocouple_from_store(pieces))
+            first = last
+    return registry
+
+def _thermocouple_from_store(pieces):
+    """ Build a thermocouple from its records in a coefficient store. """
+    table = []
+    for r in pieces:
+        pc = np.array(r['coefs'][-1-int(r['degree']):])
+        ec = None if np.isnan(r['gauss'][0]) else r['gauss'].tolist()
+        table.append([float(r['tmin']), float(r['tmax']), pc, ec])
+    r = pieces[0]
+    func = Polynomial_Gaussian_Piecewise_Function(table, str(r['Tunits']),
+                str(r['Vunits']), calibration=str(r['calibration']),
+                source=str(r['source']))
+    return Thermocouple_Reference(func, ttype=str(r['ttype']),
+                                  composition=str(r['composition']))
 
 #end of module
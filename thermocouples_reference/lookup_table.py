@@ -0,0 +1,182 @@
+"""
+Python module for fast inverse thermocouple lookups by interpolation in a
+precomputed table.
+
+The inverse of the emf function and its derivative (one over the Seebeck
+coefficient) are tabulated, and inverse lookups are done by piecewise cubic
+Hermite interpolation in that table. Forward lookups are not tabulated:
+interpolating costs about as much as evaluating the emf polynomials exactly.
+Usually you would get these objects from Thermocouple_Reference.lookup_table().
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+from .function_types import (_block_size, _blockwise, _prepare_out,
+                             _out_of_range_msg)
+
+class _Uniform_Hermite(object):
+    """\
+    Cubic Hermite interpolant of y(x), given values and slopes on a uniform
+    grid of x from x0 to x1 with n intervals. The cubic coefficients of each
+    interval are stored as a row (c3, c2, c1, c0) of .coefs, for evaluation
+    as ((c3*t + c2)*t + c1)*t + c0 with t the fractional position in the
+    interval, so that one gather fetches all four.
+    """
+    def __init__(self, x0, x1, y, dydx):
+        n = len(y) - 1
+        self.x0 = x0
+        self.x1 = x1
+        self.n = n
+        self.invh = n/(x1 - x0)
+        self.offset = -x0*self.invh
+        h = (x1 - x0)/n
+        m0 = dydx[:-1]*h
+        m1 = dydx[1:]*h
+        dy = np.diff(y)
+        self.coefs = np.column_stack([-2.*dy + m0 + m1, 3.*dy - 2.*m0 - m1,
+                                      m0, y[:-1]])
+
+    @property
+    def nbytes(self):
+        return self.coefs.nbytes
+
+    def __call__(self, x):
+        # Interval index and fractional position, clipped to the end
+        # intervals (so that outside the grid we extrapolate).
+        t = np.multiply(x, self.invh)
+        t += self.offset
+        i = t.astype(np.intp)
+        np.clip(i, 0, self.n - 1, out=i)
+        t -= i
+        c = self.coefs.take(i, axis=0)
+        y = c[..., 0] * t
+        y += c[..., 1]
+        y *= t
+        y += c[..., 2]
+        y *= t
+        y += c[..., 3]
+        return y
+
+    def out_of_range(self, x):
+        """ Boolean mask of x outside [x0, x1] (NaN counts as outside). """
+        return ~((x >= self.x0) & (x <= self.x1))
+
+    def any_out_of_range(self, x):
+        """ Whether any of x is outside [x0, x1], or NaN. """
+        return x.size > 0 and not (np.min(x) >= self.x0 and np.max(x) <= self.x1)
+
+class Hermite_Lookup_Table(object):
+    """\
+    Lookup table engine for a thermocouple, answering inverse queries by
+    piecewise cubic Hermite interpolation.
+
+    Main method:
+     table.inverse_CmV(emf, Tref) # inverse lookup
+
+    The table holds temperature and its derivative 1/Seebeck on a uniform
+    grid of emfs, spanning the increasing part of the function. For type B
+    that starts a little above 21 degC, where the emf function has its
+    minimum and the slope of the inverse is infinite: the voltages below the
+    table (from the minimum up to the emf at about 22.8 degC) are solved
+    exactly instead, on the high temperature branch. The uniform grid lets
+    each lookup find its interval directly, without a search, so an inverse
+    lookup costs about as much as an exact forward evaluation.
+
+    The grid spacing is halved until the interpolation error, measured as
+    |emf(T) - emf| at three points in every interval, is below max_error
+    (in mV). The achieved error is in .inverse_error, and the memory used by
+    the table is reported by .nbytes.
+    """
+    def __init__(self, tc, max_error=1e-4, max_nodes=2**22):
+        """
+        tc is the Thermocouple_Reference to tabulate, and max_error is the
+        desired maximum emf error (in mV). A ValueError is raised if that
+        needs a grid of more than max_nodes intervals.
+        """
+        func = tc.func
+        self.tc = tc
+        self.max_error = max_error
+        self.minT = float(func.minT)
+        self.maxT = float(func.maxT)
+        t = np.array([0.25, 0.5, 0.75])
+
+        # Tabulate on the increasing chain of monotonic pieces.
+        Tinv = self.minT
+        for tlo, thi, vlo, vhi, increasing in func.branches:
+            if not increasing:
+                Tinv = thi
+        if Tinv > self.minT:
+            # Start a little above the minimum, where the slope is finite.
+            Tinv += 1e-3*(self.maxT - self.minT)
+        self.minV = float(func(Tinv))
+        self.maxV = float(func(self.maxT))
+        # Voltages from the minimum of the function up to minV are solved
+        # exactly.
+        self.exactV = min(vlo for tlo, thi, vlo, vhi, increasing in func.branches)
+        n = 64
+        while True:
+            V = np.linspace(self.minV, self.maxV, n+1)
+            T = func.inverse_approx(V, newton=True)
+            T[0] = Tinv
+            T[-1] = self.maxT
+            S = func(T, derivative=1)
+            self._inv = _Uniform_Hermite(self.minV, self.maxV, T, 1./S)
+            Vc = (V[:-1, None] + (V[1]-V[0])*t).ravel()
+            self.inverse_error = float(np.max(np.abs(
+                func(self._inv(Vc), out_of_range="extrapolate") - Vc)))
+            if self.inverse_error <= max_error:
+                break
+            if 2*n > max_nodes:
+                raise ValueError("max_error is not reachable within max_nodes: "
+                                 "%d intervals give %.2g mV"%(
+                                 n, self.inverse_error), max_error)
+            n *= 2
+
+    @property
+    def nbytes(self):
+        """ Memory used by the table, in bytes. """
+        return self._inv.nbytes
+
+    def __repr__(self):
+        return "<Hermite lookup table for %s, %d nodes, %.1f kB, max error %.2g mV>"%(
+            self.tc.type, self._inv.n+1, self.nbytes/1024., self.inverse_error)
+
+    def inverse_CmV(self, emf, Tref=0., out_of_range="raise", out=None,
+                    dtype=None):
+        """\
+        Interpolated measurement junction temperature (in degrees Celsius)
+        for measured voltage emf (in mV) and reference junctions temperature
+        Tref (in degrees Celsius). The reference emf is computed exactly.
+        out_of_range is 'raise' or 'nan'. out and dtype are as for
+        Thermocouple_Reference.inverse: large arrays are worked on in small
+        blocks.
+        """
+        if out_of_range not in ["raise", "nan"]:
+            raise ValueError("invalid out_of_range parameter",out_of_range)
+        emf = np.asarray(emf, dtype=float)
+        f_ref = self.tc.func(Tref)
+
+        def lookup(emf, f_ref):
+            V = np.add(emf, f_ref)
+            T = self._inv(V)
+            outside = self._inv.out_of_range(V)
+            if not outside.any():
+                return T
+            exact = outside & (V >= self.exactV) & (V < self.minV)
+            if exact.any():
+                T[exact] = self.tc.func.inverse(V[exact])
+                outside &= ~exact
+            if out_of_range == "raise" and outside.any():
+                raise ValueError(_out_of_range_msg, np.extract(outside, V))
+            T[outside] = np.nan
+            return T
+
+        shape = np.broadcast(emf, f_ref).shape
+        if out is None and dtype is None and np.prod(shape) <= _block_size:
+            return lookup(emf, f_ref)[()]
+        out, dtype = _prepare_out(shape, out, dtype)
+        return _blockwise(lookup, out, emf, f_ref)
+
+#end of module
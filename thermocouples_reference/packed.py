@@ -0,0 +1,277 @@
+"""
+Python module packing the reference functions of many thermocouple types
+into flat arrays, so that a stream of readings where every element has its
+own type is converted in a single vectorized pass, rather than one call per
+type.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+
+from .function_types import (Thermocouple_Reference, _prepare_out,
+                             _blockwise, _block_size)
+from .units import Tunits_short
+
+class Packed_Curves(object):
+    """\
+    The piecewise polynomial+gaussian functions of several thermocouples,
+    packed together for evaluating mixed-type arrays in one pass:
+
+     packed = Packed_Curves(['K', 'J', 'T'])
+     types = packed.curve_index(['K', 'T', 'T', 'J'])  # -> array([0, 2, 2, 1])
+     emf = packed.emf_mVC([100., 20., 25., 300.], types, Tref=23.)
+
+    Each element's segment is found from its curve's breakpoints, its
+    polynomial coefficients are gathered by segment index, and a single
+    Horner pass (plus the gaussian term) evaluates all of them, whatever
+    their types. The cost does not depend on how many types are mixed.
+
+    The entries of the curve list are keys into thermocouples_reference.
+    thermocouples (or into the registry given as thermocouples=), or
+    Thermocouple_Reference objects; the default is all of thermocouples,
+    sorted by key.
+
+    Attributes (nc curves with ns segments in all, of at most nb breakpoints
+    and nk polynomial coefficients each):
+     .keys           # the curve list, as given
+     .thermocouples  # Thermocouple_Reference of each curve
+     .breaks         # (nc, nb) interior breakpoints of each curve, padded
+                     # with +inf
+     .first_segment  # (nc,) index of each curve's first segment
+     .segment_curve  # (ns,) curve of each segment
+     .coefs          # (ns, nk) polynomial coefficients of each segment, in
+                     # np.polyval order, zero-padded on the left
+     .gauss          # (3, ns) gaussian term ec[0]*exp(ec[1]*(T - ec[2])**2)
+                     # of each segment, zero where there is none
+     .minT, .maxT    # (nc,) range of each curve
+    """
+    def __init__(self, keys=None, thermocouples=None):
+        if thermocouples is None:
+            from . import thermocouples
+        if keys is None:
+            keys = sorted(thermocouples)
+        self.keys = list(keys)
+        self.thermocouples = [k if isinstance(k, Thermocouple_Reference)
+                              else thermocouples[k] for k in self.keys]
+        if not self.thermocouples:
+            raise ValueError("Packed_Curves needs at least one curve.")
+        funcs = [tc.func for tc in self.thermocouples]
+        self.Tunits = funcs[0].Tunits
+        self.Vunits = funcs[0].Vunits
+        for func in funcs:
+            if (func.Tunits, func.Vunits) != (self.Tunits, self.Vunits):
+                raise ValueError("all curves must have the same units",
+                                 (func.Tunits, func.Vunits))
+        self._index = dict((k, i) for i, k in enumerate(self.keys)
+                           if not isinstance(k, Thermocouple_Reference))
+
+        nb = max(len(func.table) for func in funcs) - 1
+        nk = max(len(pc) for func in funcs for tmin,tmax,pc,ec in func.table)
+        ns = sum(len(func.table) for func in funcs)
+        self.breaks = np.full((len(funcs), nb), np.inf)
+        self.first_segment = np.zeros(len(funcs), dtype=np.intp)
+        self.segment_curve = np.zeros(ns, dtype=np.intp)
+        # Coefficients of the function and its derivatives up to order 3,
+        # each padded on the left to nk columns.
+        self._dcoefs = np.zeros((4, ns, nk))
+        self.gauss = np.zeros((3, ns))
+        s = 0
+        for c, func in enumerate(funcs):
+            self.breaks[c, :len(func._breaks)] = func._breaks
+            self.first_segment[c] = s
+            for i, (tmin, tmax, pc, ec) in enumerate(func.table):
+                self.segment_curve[s] = c
+                for d, dc in enumerate(func._dcoefs[i]):
+                    if len(dc):
+                        self._dcoefs[d, s, nk-len(dc):] = dc
+                if ec:
+                    self.gauss[:, s] = ec
+                s += 1
+        self.coefs = self._dcoefs[0]
+        self.minT = np.array([func.minT for func in funcs], dtype=float)
+        self.maxT = np.array([func.maxT for func in funcs], dtype=float)
+
+        self._break_columns = [np.ascontiguousarray(col) for col in self.breaks.T]
+
+        # Coefficient columns, for gathering by segment index, and the number
+        # of leading zero columns of each segment, which a block need not
+        # go through if all its segments have them.
+        self._columns = [[np.ascontiguousarray(dc[:, j]) for j in range(nk)]
+                         for dc in self._dcoefs]
+        self._leading_zeros = [np.argmax(dc != 0., axis=1) for dc in self._dcoefs]
+        self._gauss_segment = self.gauss[0] != 0.
+
+    def __repr__(self):
+        return "<Packed_Curves of %d curves, %d segments: %s>"%(
+            len(self.keys), len(self.segment_curve),
+            ", ".join(tc.type for tc in self.thermocouples))
+
+    def curve_index(self, keys):
+        """ Array of the curve indices of the given keys. """
+        try:
+            return np.array([self._index[k] for k in keys], dtype=np.intp)
+        except KeyError as e:
+            raise ValueError("no such curve", e.args[0])
+
+    def segments(self, T, curve):
+        """\
+        Index of the segment of each temperature of 1-d array T on its curve
+        (1-d integer array), as np.searchsorted on the curve's own
+        breakpoints would find it. Out of range temperatures get the first
+        or last segment of their curve.
+        """
+        seg = self.first_segment.take(curve)
+        for col in self._break_columns:
+            seg += col.take(curve) < T
+        return seg
+
+    def __call__(self, T, curve, derivative=0, out_of_range="raise", out=None,
+                 dtype=None):
+        """\
+        Evaluate each element of T on its own curve.
+
+        Parameters
+        ----------
+        T : array_like
+            Temperatures, in the units of the curves (degC for the standard
+            ones).
+        curve : array_like of int
+            Index into .keys of the curve of each temperature, broadcast
+            against T (see curve_index).
+        derivative : int, optional
+            Derivative order, 0 to 3.
+        out_of_range : {'raise', 'nan', 'extrapolate'}, optional
+            As for Polynomial_Gaussian_Piecewise_Function.__call__, with
+            each temperature checked against its own curve's range.
+        out, dtype : optional
+            As for Polynomial_Gaussian_Piecewise_Function.__call__.
+
+        Returns
+        -------
+        emf : float or array_like
+            The emfs, in the units of the curves (mV for the standard ones).
+        """
+        return self._run(T, curve, derivative, out_of_range, out, dtype)
+
+    def _run(self, T, curve, derivative, out_of_range, out, dtype, Tref=None):
+        """\
+        __call__, less the emf at Tref (if not None) of each element's curve,
+        subtracted block by block.
+        """
+        if out_of_range not in ["raise", "nan", "extrapolate"]:
+            raise ValueError("invalid out_of_range parameter",out_of_range)
+        if not 0 <= derivative <= 3:
+            raise ValueError("derivative must be from 0 to 3", derivative)
+        if np.ndim(Tref):
+            T, curve, Tref = np.broadcast_arrays(np.asarray(T, dtype=float),
+                                                 np.asarray(curve, dtype=np.intp),
+                                                 np.asarray(Tref, dtype=float))
+        else:
+            T, curve = np.broadcast_arrays(np.asarray(T, dtype=float),
+                                           np.asarray(curve, dtype=np.intp))
+        if curve.size and not (0 <= curve.min() and curve.max() < len(self.keys)):
+            raise ValueError("curve index out of range")
+        if out_of_range == "raise":
+            self._check_range(T, curve)
+            if np.ndim(Tref):
+                self._check_range(Tref, curve)
+
+        if Tref is None:
+            evaluate = lambda T, curve, Tref: self._evaluate(T, curve,
+                                                derivative, out_of_range)
+        elif not np.ndim(Tref):
+            ref = self._reference_emf(Tref, curve, out_of_range)
+            def evaluate(T, curve, Tref):
+                E = self._evaluate(T, curve, derivative, out_of_range)
+                E -= ref.take(curve)
+                return E
+        else:
+            def evaluate(T, curve, Tref):
+                E = self._evaluate(T, curve, derivative, out_of_range)
+                E -= self._evaluate(Tref, curve, 0, out_of_range)
+                return E
+        if out is None and dtype is None and T.size <= _block_size:
+            return evaluate(T.reshape(-1), curve.reshape(-1),
+                            Tref.reshape(-1) if np.ndim(Tref) else Tref
+                            ).reshape(T.shape)[()]
+        out, dtype = _prepare_out(T.shape, out, dtype)
+        return _blockwise(evaluate, out, T, curve, Tref)
+
+    def emf_mVC(self, T, curve, Tref=0., derivative=0, out_of_range="raise",
+                out=None, dtype=None):
+        """\
+        Emf in mV of each element of T (in degC) on its own curve, with the
+        reference junctions at Tref (a scalar, or an array broadcast against
+        T), as Thermocouple_Reference.emf_mVC does for one type; as there,
+        out_of_range applies to Tref as well. The curves must be in degC and
+        mV.
+        """
+        if (self.Tunits, self.Vunits) != ('C', 'mV'):
+            raise ValueError("curves are not in degC and mV", (self.Tunits, self.Vunits))
+        if derivative:
+            return self(T, curve, derivative, out_of_range, out, dtype)
+        return self._run(T, curve, 0, out_of_range, out, dtype, Tref)
+
+    def _reference_emf(self, Tref, curve, out_of_range="raise"):
+        """\
+        Emf at scalar Tref of each curve, indexed as .keys, with out_of_range
+        as for __call__. Only the curves that appear in curve are evaluated,
+        once each; the others are left at zero.
+        """
+        present = np.flatnonzero(np.bincount(curve.reshape(-1),
+                                             minlength=len(self.keys)))
+        ref = np.zeros(len(self.keys))
+        ref[present] = self(np.full(present.size, float(Tref)), present,
+                            out_of_range=out_of_range)
+        return ref
+
+    def _check_range(self, T, curve):
+        """ Raise ValueError if any temperature is out of its curve's range. """
+        minT = self.minT.take(curve)
+        maxT = self.maxT.take(curve)
+        # NaN temperatures are reported as under range.
+        unders = ~(T >= minT)
+        overs = T > maxT
+        if np.any(unders) or np.any(overs):
+            u_temps = np.extract(unders,T)
+            o_temps = np.extract(overs,T)
+            if u_temps.size == 0: u_temps = None
+            if o_temps.size == 0: o_temps = None
+            msg = "Temperatures ("+Tunits_short[self.Tunits]+") under or over range:"
+            raise ValueError(msg, u_temps, o_temps)
+
+    def _evaluate(self, T, curve, derivative, out_of_range):
+        """ One pass over 1-d arrays T and curve. Returns a new array. """
+        seg = self.segments(T, curve)
+        # Horner's scheme, with each element's coefficients gathered from
+        # the columns by segment index.
+        columns = self._columns[derivative]
+        first = self._leading_zeros[derivative].take(seg).min() if seg.size else 0
+        emf = columns[first].take(seg)
+        for col in columns[first+1:]:
+            emf *= T
+            emf += col.take(seg)
+
+        g = np.flatnonzero(self._gauss_segment.take(seg))
+        if g.size:
+            # Only on the elements of segments with a gaussian term.
+            gseg = seg.take(g)
+            a, b, c = [p.take(gseg) for p in self.gauss]
+            dT = T.take(g) - c
+            gauss = a * np.exp(b * dT**2)
+            if derivative == 0:
+                emf[g] += gauss
+            elif derivative == 1:
+                emf[g] += 2. * b * gauss * dT
+            elif derivative == 2:
+                emf[g] += 2. * b * gauss * (2. * b * dT**2 + 1.)
+            else:
+                emf[g] += 4. * b * b * gauss * dT * (2. * b * dT**2 + 3.)
+
+        if out_of_range == "nan":
+            emf[~((T >= self.minT.take(curve)) & (T <= self.maxT.take(curve)))] = np.nan
+        return emf
+
+#end of module
@@ -0,0 +1,242 @@
+"""
+Python module for converting very large arrays in parallel, in a pool of
+worker processes that share the data through shared memory.
+
+This module needs Python 3.8 or later (multiprocessing.shared_memory),
+unlike the rest of the package.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .function_types import Thermocouple_Reference
+
+class Parallel_Converter(object):
+    """\
+    Parallel front-end to Thermocouple_Reference.convert and inverse, for
+    arrays of many millions of values:
+
+     with Parallel_Converter('K', workers=8) as conv:
+         T = conv.inverse(emf, Tref=23.0)
+
+    The input (and an array Tref) is split into shards of chunk_size
+    values, and the shards are converted by a pool of worker processes,
+    which read the input in shared memory, in its own dtype (float32 stays
+    float32), and write straight into a shared output array. No array data
+    is pickled: the workers only receive the names of the shared memory
+    blocks and the bounds of their shards.
+
+    For the largest arrays, allocate the input and out= with .empty(), so
+    that nothing is copied at all:
+
+     emf = conv.empty(n, np.float32)   # then fill it, e.g. from a file
+     T = conv.empty(n, np.float32)
+     conv.inverse(emf, Tref=23.0, out=T)
+
+    Other arrays are copied into shared memory for the call, and out= is
+    copied back from it. Results returned without out= are shared memory
+    arrays, as from .empty().
+
+    tc is a key into thermocouples_reference.thermocouples, or a
+    Thermocouple_Reference (which is sent to each worker once). workers
+    defaults to the number of CPUs. The pool is started when the converter
+    is created; call close(), or use a with block, to stop it.
+    """
+    def __init__(self, tc, workers=None, chunk_size=1<<20):
+        if not isinstance(tc, (str, Thermocouple_Reference)):
+            raise TypeError("tc must be a thermocouple key or a Thermocouple_Reference")
+        if chunk_size < 1:
+            raise ValueError("invalid chunk_size", chunk_size)
+        self.tc = tc
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        # Workers must share our resource tracker (which frees shared memory
+        # left behind), instead of each starting its own that would free the
+        # blocks they attach to when they exit.
+        resource_tracker.ensure_running()
+        self._pool = multiprocessing.Pool(self.workers, _init_worker, (tc,))
+
+    def __repr__(self):
+        return "<parallel converter for %r, %d workers, chunks of %d>"%(
+                self.tc, self.workers, self.chunk_size)
+
+    def close(self):
+        """ Stop the worker processes. """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def convert(self,T,Tunit='C',Vunit='mV',Tref=None,out_of_range="raise",
+                out=None,dtype=None):
+        """\
+        As Thermocouple_Reference.convert (without derivatives), computed in
+        parallel. Tref is a scalar or an array of the same shape as T.
+        """
+        return self._run('convert', T, Tref, out, dtype,
+                         (Tunit, Vunit, out_of_range))
+
+    def inverse(self,emf,Tunit='C',Vunit='mV',Tref=None,Vtol=None,
+                branch="high",out=None,dtype=None):
+        """\
+        As Thermocouple_Reference.inverse, computed in parallel. Tref is a
+        scalar or an array of the same shape as emf.
+        """
+        return self._run('inverse', emf, Tref, out, dtype,
+                         (Tunit, Vunit, Vtol, branch))
+
+    def empty(self, shape, dtype=np.float64):
+        """\
+        New uninitialized array of the given shape and dtype, in shared
+        memory. Inputs, Tref arrays and out= arrays made with this are
+        used by the workers where they are, without being copied: fill one
+        with the raw data (from a file, say), and convert it into another.
+        The shared memory is freed when the array and all its views are
+        gone, whether the converter is still open or not.
+        """
+        return _shared_array(shape, dtype)
+
+    def _run(self, op, X, Tref, out, dtype, args):
+        if self._pool is None:
+            raise ValueError("the converter is closed")
+        X = np.asarray(X)
+        if X.dtype.kind not in 'fiu':
+            X = X.astype(float)
+        if dtype is None:
+            dtype = np.float64 if out is None else out.dtype
+        dtype = np.dtype(dtype)
+        if dtype.kind != 'f':
+            raise ValueError("dtype must be a floating point type", dtype)
+        if out is not None and (out.shape != X.shape or out.dtype != dtype):
+            raise ValueError("out has the wrong shape or dtype", out.shape, out.dtype)
+        if Tref is not None and np.ndim(Tref):
+            Tref = np.broadcast_to(np.asarray(Tref), X.shape)
+
+        # Arrays that are not already in shared memory are copied there (in
+        # their own dtype), and out is copied back from it.
+        X_sh = _shared_operand(X)
+        Tref_sh = _shared_operand(Tref) if np.ndim(Tref) else None
+        if out is None:
+            out = result = _shared_array(X.shape, dtype)
+        else:
+            result = out if _shared_block(out) is not None else _shared_array(X.shape, dtype)
+        tasks = [(op, _describe(X_sh), None if Tref_sh is None else
+                  _describe(Tref_sh), None if np.ndim(Tref) else Tref,
+                  _describe(result), X.size, start,
+                  min(start + self.chunk_size, X.size), args)
+                 for start in range(0, X.size, self.chunk_size)]
+        results = [self._pool.apply_async(_work, (task,)) for task in tasks]
+        # Wait for every shard, even after an error, so that no worker still
+        # uses the blocks when they are freed.
+        for r in results:
+            r.wait()
+        for r in results:
+            r.get()
+        if result is not out:
+            out[...] = result
+        return out
+
+class _Shared_Block(object):
+    """\
+    Owner of a shared memory block, and the base of the arrays made in it
+    (through __array_interface__), so that the block stays mapped as long
+    as any of them exists; it is unlinked and unmapped when they are all
+    gone.
+    """
+    def __init__(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=max(size*dtype.itemsize, 1))
+        view = np.ndarray(shape, dtype, buffer=self.shm.buf)
+        self.__array_interface__ = view.__array_interface__
+        self.address = view.ctypes.data
+
+    def __del__(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def _shared_array(shape, dtype):
+    """ New array of shape and dtype, in its own shared memory block. """
+    return np.asarray(_Shared_Block(shape, dtype))
+
+def _shared_block(A):
+    """ The _Shared_Block that A is a contiguous part of, or None. """
+    if not A.flags.c_contiguous:
+        return None
+    base = A
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return base if isinstance(base, _Shared_Block) else None
+
+def _shared_operand(A):
+    """ A itself if it is a contiguous array in shared memory, else a copy there. """
+    if _shared_block(A) is not None:
+        return A
+    shared = _shared_array(A.shape, A.dtype)
+    shared[...] = A
+    return shared
+
+def _describe(A):
+    """\
+    (block name, byte offset, dtype) of contiguous shared memory array A,
+    for a worker to find it.
+    """
+    block = _shared_block(A)
+    return block.shm.name, A.ctypes.data - block.address, A.dtype.str
+
+# The thermocouple of a worker process, set by _init_worker.
+_worker_tc = None
+
+def _init_worker(tc):
+    global _worker_tc
+    if isinstance(tc, str):
+        from . import thermocouples
+        tc = thermocouples[tc]
+    _worker_tc = tc
+
+def _work(task):
+    """ Convert one shard, in a worker process. """
+    attached = []
+    try:
+        _convert_shard(task, attached)
+    finally:
+        for shm in attached:
+            try:
+                shm.close()
+            except BufferError:
+                pass # views still referenced by an exception being raised
+    return task[-2] - task[-3]
+
+def _convert_shard(task, attached):
+    op, X, Tref_sh, Tref, out, size, start, stop, args = task
+    X = _attach(X, size, attached)[start:stop]
+    if Tref_sh is not None:
+        Tref = _attach(Tref_sh, size, attached)[start:stop]
+    out = _attach(out, size, attached)[start:stop]
+    if op == 'inverse':
+        Tunit, Vunit, Vtol, branch = args
+        _worker_tc.inverse(X, Tunit, Vunit, Tref, None, Vtol, branch, out=out)
+    else:
+        Tunit, Vunit, out_of_range = args
+        _worker_tc.convert(X, Tunit, Vunit, Tref, 0, out_of_range, out=out)
+
+def _attach(description, size, attached):
+    """ Array of size values described by _describe, in a worker. """
+    name, offset, dtype = description
+    shm = shared_memory.SharedMemory(name=name)
+    attached.append(shm)
+    return np.ndarray((size,), dtype, buffer=shm.buf, offset=offset)
+
+#end of module
@@ -0,0 +1,147 @@
+"""
+Python module for converting raw voltage files from data loggers (flat
+binary ADC codes or voltages, or .npy files) to temperature files, out of
+core: the files are memory mapped and worked on in fixed-size chunks, so
+they may be bigger than the memory.
+
+From the command line:
+
+    thermocouples-convert-raw K log.bin temps.npy --dtype int16 \\
+        --scale 0.0025 --offset 0 --tref 23.5
+
+(or python -m thermocouples_reference.raw_files ...); see --help.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import os
+import sys
+import time
+
+import numpy as np
+
+def convert_raw_file(infile, outfile, tc, dtype='float32', scale=1.,
+                     offset=0., Tref=None, Tunit='C', out_dtype='float32',
+                     chunk_size=1<<20, progress=None):
+    """\
+    Convert a file of raw voltage readings to a file of temperatures, by
+    inverse lookup with thermocouple tc (a Thermocouple_Reference, or a key
+    into thermocouples_reference.thermocouples).
+
+    Parameters
+    ----------
+    infile : str
+        Input file: a .npy file (any shape), or else a flat binary file of
+        values of type dtype (e.g. 'int16', 'int32' ADC codes or 'float32'
+        volts).
+    outfile : str
+        Output file: a .npy file of the input's shape if the name ends with
+        .npy, else a flat binary file.
+    dtype : numpy dtype, optional
+        Type of the values in a flat binary input file, default float32.
+    scale, offset : float, optional
+        The emf in millivolts is value*scale + offset. For example, for
+        inputs in volts use scale=1000.
+    Tref : float, optional
+        Reference junction temperature (in Tunit), defaults to the freezing
+        point of water.
+    Tunit : {'C', 'F', 'K', 'R'}, optional
+        Temperature unit of Tref and of the output.
+    out_dtype : floating point dtype, optional
+        Type of the output values, default float32.
+    chunk_size : int, optional
+        Number of values converted at a time. Memory use is a few times
+        chunk_size values, whatever the size of the files.
+    progress : callable, optional
+        Called after each chunk as progress(done, total, seconds).
+
+    Returns
+    -------
+    stats : dict
+        'samples' converted, 'seconds' taken and 'samples_per_s'.
+    """
+    if isinstance(tc, str):
+        from . import thermocouples
+        tc = thermocouples[tc]
+    if str(infile).endswith('.npy'):
+        data = np.load(infile, mmap_mode='r')
+    elif os.path.getsize(infile) == 0:
+        # (an empty file cannot be memory mapped)
+        data = np.empty(0, dtype)
+    else:
+        data = np.memmap(infile, dtype=dtype, mode='r')
+    total = data.size
+    if total == 0:
+        # Nothing to convert, nor to map: write an empty output.
+        if str(outfile).endswith('.npy'):
+            np.save(outfile, np.empty(data.shape, out_dtype))
+        else:
+            open(outfile, 'wb').close()
+        return {'samples': 0, 'seconds': 0., 'samples_per_s': 0.}
+    # Work along the memory order of the input (a Fortran ordered .npy is
+    # written out in Fortran order too), so that flattening makes no copies.
+    fortran = data.flags.f_contiguous and not data.flags.c_contiguous
+    order = 'F' if fortran else 'C'
+    if str(outfile).endswith('.npy'):
+        result = np.lib.format.open_memmap(outfile, mode='w+',
+                        dtype=out_dtype, shape=data.shape, fortran_order=fortran)
+    else:
+        result = np.memmap(outfile, dtype=out_dtype, mode='w+', shape=(total,))
+    src = data.reshape(-1, order=order)
+    dst = result.reshape(-1, order=order)
+
+    buf = np.empty(min(chunk_size, total))
+    t0 = time.perf_counter()
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        emf = buf[:stop - start]
+        np.multiply(src[start:stop], scale, out=emf, casting='unsafe')
+        emf += offset
+        tc.inverse(emf, Tunit, 'mV', Tref, out=dst[start:stop])
+        if progress is not None:
+            progress(stop, total, time.perf_counter() - t0)
+    result.flush()
+    seconds = time.perf_counter() - t0
+    return {'samples': total, 'seconds': seconds,
+            'samples_per_s': total / seconds if seconds > 0 else 0.}
+
+def _print_progress(done, total, seconds):
+    sys.stderr.write("\r%5.1f%%  %d / %d samples  %.3g samples/s"%(
+        100.*done/total, done, total, done/seconds if seconds > 0 else 0.))
+    sys.stderr.flush()
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Convert a raw voltage file (flat binary or .npy) to "
+                    "temperatures, out of core.")
+    parser.add_argument('type', help="thermocouple type, e.g. K")
+    parser.add_argument('infile')
+    parser.add_argument('outfile', help="output file, .npy or flat binary")
+    parser.add_argument('--dtype', default='float32',
+                        help="type of flat binary input values (default float32)")
+    parser.add_argument('--scale', type=float, default=1.,
+                        help="millivolts per input unit (default 1)")
+    parser.add_argument('--offset', type=float, default=0.,
+                        help="millivolts added after scaling (default 0)")
+    parser.add_argument('--tref', type=float, default=None,
+                        help="reference junction temperature (default: ice point)")
+    parser.add_argument('--tunit', default='C', choices=['C', 'F', 'K', 'R'])
+    parser.add_argument('--out-dtype', default='float32',
+                        help="type of output values (default float32)")
+    parser.add_argument('--chunk-size', type=int, default=1<<20)
+    parser.add_argument('--quiet', action='store_true', help="no progress output")
+    args = parser.parse_args(argv)
+
+    stats = convert_raw_file(args.infile, args.outfile, args.type, args.dtype,
+                args.scale, args.offset, args.tref, args.tunit, args.out_dtype,
+                args.chunk_size, None if args.quiet else _print_progress)
+    if not args.quiet:
+        sys.stderr.write("\nconverted %d samples in %.2f s (%.3g samples/s)\n"%(
+            stats['samples'], stats['seconds'], stats['samples_per_s']))
+
+if __name__ == '__main__':
+    main()
+
+#end of module
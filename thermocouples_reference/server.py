@@ -0,0 +1,256 @@
+"""
+Python module for a thermocouple conversion service, over TCP or Unix
+sockets, that converts concurrent requests together in micro-batches.
+
+Run it with:
+
+    python -m thermocouples_reference.server --port 8765
+    python -m thermocouples_reference.server --unix /tmp/thermocouples.sock
+
+The protocol is one JSON object per line, in both directions. A request
+
+    {"id": 1, "op": "inverse", "type": "K", "values": [1.1, 1.2], "Tref": 23.0}
+
+is answered with
+
+    {"id": 1, "result": [49.90792803007577, 52.33107627320735]}
+
+or {"id": 1, "error": "..."}. "op" is "inverse" (voltages to temperatures)
+or "convert" (temperatures to voltages); "values" is a number or a list;
+"Tref" (a number, or a list like values), "Tunit" and "Vunit" are optional,
+as for Thermocouple_Reference.inverse and convert. The "id" is passed back
+unchanged, so that clients can have several requests in flight. A request
+{"op": "metrics"} returns the batching metrics (see Micro_Batcher.metrics).
+
+This module needs Python 3.7 or later (asyncio), unlike the rest of the
+package.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+class Micro_Batcher(object):
+    """\
+    Collects conversion requests for a short window of time, then converts
+    them with one vectorized call per thermocouple type, direction and
+    units, and hands each request its part of the result.
+
+     batcher = Micro_Batcher(window=0.002)
+     T = await batcher.submit('K', 'inverse', [1.1, 1.2], Tref=23.0)
+
+    Requests are flushed when the window has passed since the first pending
+    request, or at once when max_batch values are pending. With
+    window=None, every request is converted on its own, immediately.
+
+    If a batched call fails (for example, one request is out of range), the
+    requests of that group are converted one by one, so that only the
+    faulty ones get the error.
+    """
+    def __init__(self, thermocouples=None, window=0.002, max_batch=65536):
+        if thermocouples is None:
+            from . import thermocouples
+        self.thermocouples = thermocouples
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._pending_values = 0
+        self._timer = None
+        self.requests = 0
+        self.batches = 0
+        self.calls = 0
+        self.values = 0
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self):
+        """ Number of requests waiting for the next batch. """
+        return len(self._pending)
+
+    def metrics(self):
+        """\
+        Dict of metrics: current and maximum queue depth (requests waiting),
+        numbers of requests, batches, vectorized calls and values converted,
+        and mean and maximum batch size (in requests).
+        """
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'requests': self.requests,
+            'batches': self.batches,
+            'calls': self.calls,
+            'values': self.values,
+            'mean_batch_size': self.requests / float(self.batches) if self.batches else 0.,
+            'max_batch_size': self.max_batch_size,
+            }
+
+    def submit(self, ttype, op, values, Tref=None, Tunit='C', Vunit='mV'):
+        """\
+        Queue a request, returning an asyncio future of its result: a float
+        if values is a number, else an array. Must be called from within the
+        running event loop.
+        """
+        if op not in ["inverse", "convert"]:
+            raise ValueError("invalid op parameter", op)
+        future = asyncio.get_running_loop().create_future()
+        request = (ttype, op, Tunit, Vunit, values, Tref, future)
+        self.requests += 1
+        if self.window is None:
+            self.batches += 1
+            self.max_batch_size = max(self.max_batch_size, 1)
+            self._convert_group([request])
+            return future
+        self._pending.append(request)
+        self._pending_values += np.size(values)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+        if self._pending_values >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        """ Convert all pending requests now. """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        self._pending_values = 0
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, len(pending))
+        groups = {}
+        for request in pending:
+            groups.setdefault(request[:4], []).append(request)
+        for group in groups.values():
+            self._convert_group(group)
+
+    def _convert_group(self, group):
+        """ Convert requests of one type, op and units in one call. """
+        ttype, op, Tunit, Vunit = group[0][:4]
+        try:
+            tc = self.thermocouples[ttype]
+            # Default Tref: the freezing point of water.
+            Tref0 = tc._mats_Tunits_to[Tunit][0][1]
+            arrays = [np.asarray(request[4], dtype=float) for request in group]
+            X = np.concatenate([a.reshape(-1) for a in arrays])
+            Tref = np.concatenate([np.broadcast_to(
+                        Tref0 if request[5] is None else request[5],
+                        a.shape).reshape(-1)
+                        for a, request in zip(arrays, group)])
+            self.calls += 1
+            if op == "inverse":
+                Y = tc.inverse(X, Tunit, Vunit, Tref)
+            else:
+                Y = tc.convert(X, Tunit, Vunit, Tref)
+        except Exception as e:
+            if len(group) > 1:
+                for request in group:
+                    self._convert_group([request])
+            else:
+                future = group[0][-1]
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.values += X.size
+        start = 0
+        for a, request in zip(arrays, group):
+            future = request[-1]
+            part = Y[start:start + a.size]
+            start += a.size
+            if not future.done():
+                future.set_result(float(part[0]) if a.ndim == 0 else part.reshape(a.shape))
+
+async def _handle(batcher, reader, writer):
+    """ Serve one client connection. """
+    tasks = set()
+    async def answer(line):
+        request = {}
+        try:
+            request = json.loads(line)
+            if request.get('op') == 'metrics':
+                response = {'result': batcher.metrics()}
+            else:
+                result = await batcher.submit(request['type'], request['op'],
+                            request['values'], request.get('Tref'),
+                            request.get('Tunit', 'C'), request.get('Vunit', 'mV'))
+                response = {'result': result if isinstance(result, float)
+                                      else result.tolist()}
+        except Exception as e:
+            response = {'error': "%s: %s"%(type(e).__name__, e)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        writer.write((json.dumps(response) + '\n').encode())
+        await writer.drain()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                # Answer concurrently, so pipelined requests can share a batch.
+                task = asyncio.ensure_future(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+    except ConnectionError:
+        pass # client went away
+    finally:
+        writer.close()
+
+async def serve(host='127.0.0.1', port=8765, unix=None, window=0.002,
+                max_batch=65536, thermocouples=None):
+    """\
+    Start the conversion service, on a Unix socket if unix is given, else on
+    TCP host:port (port 0 picks a free port). Returns the asyncio server
+    and its Micro_Batcher.
+    """
+    batcher = Micro_Batcher(thermocouples, window, max_batch)
+    handler = lambda reader, writer: _handle(batcher, reader, writer)
+    if unix is not None:
+        server = await asyncio.start_unix_server(handler, path=unix)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    return server, batcher
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Thermocouple conversion service (JSON lines over TCP "
+                    "or a Unix socket) with micro-batching of requests.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH',
+                        help="listen on this Unix socket instead of TCP")
+    parser.add_argument('--window', type=float, default=2.,
+                        help="batching window in milliseconds (default 2); "
+                             "0 batches only requests that arrive together")
+    parser.add_argument('--max-batch', type=int, default=65536,
+                        help="flush a batch at once when this many values "
+                             "are pending")
+    args = parser.parse_args(argv)
+
+    async def run():
+        server, batcher = await serve(args.host, args.port, args.unix,
+                                      args.window*1e-3, args.max_batch)
+        for sock in server.sockets:
+            print("serving on %s"%(sock.getsockname(),))
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
+
+#end of module
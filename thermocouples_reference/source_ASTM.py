@@ -46,13 +46,14 @@ Disclaimers
 __copyright__ = "public domain"
 
 import numpy as np
-from .function_types import Thermocouple_Reference, Polynomial_Gaussian_Piecewise_Function
+from .function_types import Thermocouple_Reference, Polynomial_Gaussian_Piecewise_Function, Thermocouple_Registry
 
 _source = "ASTM E 1751-00"
 _cal = "ITS-90"
 
-thermocouples = {
-'G': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+# Each thermocouple is built when first looked up (see Thermocouple_Registry).
+thermocouples = Thermocouple_Registry({
+'G': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0., 630.615, np.array([
         -1.7089202e-15,
          4.3850022e-12,
@@ -76,7 +77,7 @@ thermocouples = {
     ttype='Type G',
     composition='W - 74W,26Re'),
 
-'P': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'P': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0, 746.6, np.array([
         -3.6375467e-15,
          1.4851327e-11,
@@ -98,7 +99,7 @@ thermocouples = {
     ttype='Type P (II)',
     composition='55Pd,31Pt,14Au - 65Au,35Pd'),
 
-'AuFe 0.07': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'AuFe 0.07': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [-273., 7., np.array([
          6.8263661580e-31,
          1.1010930596e-27,
@@ -120,7 +121,7 @@ thermocouples = {
     ttype='Chromel-AuFe0.07',
     composition='90Ni,10Cr - Au,0.07(atom%)Fe'),
 
-'PtMo 5-0.1': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'PtMo 5-0.1': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0., 491., np.array([
         -2.0186476e-19,
          3.3574252e-16,
@@ -146,7 +147,7 @@ thermocouples = {
     ttype='PtMo 5-0.1',
     composition='95Pt,5Mo - 99.9Pt,0.1Mo'),
 
-'PtRh 40-20': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'PtRh 40-20': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0, 951.7, np.array([
         -2.8497160e-22,
          1.0033974e-18,
@@ -171,7 +172,7 @@ thermocouples = {
     composition='60Pt,40Rh - 80Pt,20Rh'),
 # 
 
-'M': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'M': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [-50., 370.8, np.array([
         -3.394387900e-19,
         -9.738054601e-17,
@@ -198,7 +199,7 @@ thermocouples = {
     ttype='Type M',
     composition='82Ni,18Mo - 99.2Ni,0.8Co'),
 
-'IrRh 40-0': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'IrRh 40-0': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0., 630.615, np.array([
         -7.9634082e-23,
          1.5270867e-19,
@@ -223,7 +224,7 @@ thermocouples = {
     ttype='IrRh 40-0',
     composition='60Ir,40Rh - Ir'),
 
-'Au-Pt': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'Au-Pt': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0., 1000., 1e-3*np.array([ # coefs in microvolt
         -2.51672787e-24,
          1.42981590e-20,
@@ -240,7 +241,7 @@ thermocouples = {
     ttype='Au-Pt',
     composition='Au - Pt'),
 
-'Pt-Pd': Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
+'Pt-Pd': lambda: Thermocouple_Reference(Polynomial_Gaussian_Piecewise_Function([
   [0., 660.323, 1e-3*np.array([ # coefs in microvolt
         -8.510068e-21,
          2.257823e-17,
@@ -265,9 +266,6 @@ thermocouples = {
     ttype='Pt-Pd',
     composition='Pt - Pd'),
 
-}
-
-del _source
-del _cal
+})
 
 #end of module
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+This module contains thermocouple reference functions for types
+B,E,J,K,N,R,S,T.
+
+You can access the lookup table objects like so:
+    typeK = <this module>.thermocouples['K']
+
+This module contains the NIST ITS-90 thermocouple reference functions.
+
+Disclaimers
+-----------
+(Author) I make no warranties as to the accuracy of this module, and shall
+        not be liable for any damage that may result from errors or omissions.
+(NIST) The National Institute of Standards and Technology (NIST) uses its
+        best efforts to produce a Database of high quality and to verify that
+        the data contained therein have been selected on the basis of sound
+        scientific judgement. However, NIST makes no warranties to that effect,
+        and NIST shall not be liable for any damage that may result from errors
+        or omissions in the Database.
+
+(Note: The coefficients are loaded from source_NIST.npy, which is generated
+ by create_tables_NIST.py.)
+"""
+
+__copyright__ = "public domain"
+
+from .function_types import load_coefficient_store
+
+# Each thermocouple is built when first looked up (see Thermocouple_Registry).
+thermocouples = load_coefficient_store('source_NIST.npy')
+
+#end of module
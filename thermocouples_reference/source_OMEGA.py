@@ -0,0 +1,59 @@
+"""
+This module contains thermocouple reference functions for types C,D,G.
+
+You can access the lookup table objects like so:
+    typeC = <this module>.thermocouples['C']
+
+Thermocouple reference functions are polynomials taken from
+    "Tungsten-Rhenium Thermocouples Calibration Equivalents"
+    http://www.omega.com/temperature/z/pdf/z202.pdf
+
+Note on calibration
+-------------------
+Curves C, G are almost certainly calibrations to IPTS-68,
+as suggested by the source PDF.
+Observe that we can compare the type G curve here to
+the type G from ASTM functions:
+    from pylab import *
+    from thermocouples_reference import *
+    G90 = source_ASTM.thermocouples['G']
+    T90 = linspace(0,2310,1001)
+    G68 = source_OMEGA.thermocouples['G']
+    T68 = [G68.inverse_CmV(e) for e in G90.emf_mVC(T90)]
+    figure() ; plot(T90+273.15,T90-T68)
+    xlim(0,4000) ; ylim(-2.5,0.5)
+    xlabel('$T_{90}$ (K)')
+    ylabel('$T_{90} - T_{68}$ (K)')
+    show()
+The resulting graph appears similar to the published
+ITS-90 vs. IPTS-68 difference, see 
+http://www.bipm.org/en/publications/mep_kelvin/its-90_supplementary.html
+    Figure 5 of Introduction
+
+The difference between IPTS-68 and ITS-90 scales is at worst
+* 0.4 deg C over the range 0 to 1400 deg C;
+* At 1500 deg C, IPTS-68 reads 0.44 deg C higher
+* At 2000 deg C, IPTS-68 reads 0.72 deg C higher
+* At 2500 deg C, IPTS-68 reads 1.07 deg C higher
+Anyway at the manufacturing variations in WRe thermocouples
+are somewhere around +/-4 to +/-20 deg C.
+
+Curve D is also very probably IPTS68.
+
+Disclaimers
+-----------
+(Author) I make no warranties as to the accuracy of this module, and shall
+        not be liable for any damage that may result from errors or omissions.
+
+(Note: The coefficients are loaded from source_OMEGA.npy, which is generated
+ by create_tables_OMEGA.py.)
+"""
+
+__copyright__ = "public domain"
+
+from .function_types import load_coefficient_store
+
+# Each thermocouple is built when first looked up (see Thermocouple_Registry).
+thermocouples = load_coefficient_store('source_OMEGA.npy')
+
+#end of module
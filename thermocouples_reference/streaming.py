@@ -0,0 +1,115 @@
+"""
+Python module for converting unbounded streams of readings, chunk by chunk.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+
+from .channels import Channel_Map
+
+class Stream_Converter(object):
+    """\
+    Converter for a stream of reading chunks, such as the output of a data
+    logger or a socket feed, that is never held in memory as a whole:
+
+     stream = Stream_Converter(thermocouples['K'], Tref=23.0)
+     for T in stream.inverse(emf_chunks):
+         ...
+
+    inverse() and convert() take any iterable of chunks (arrays or single
+    numbers) and are generators, yielding the converted chunks one at a time,
+    so they can be chained lazily with other generator stages. A chunk may
+    also be a pair (values, Tref), to update the reference junction
+    temperature from then on.
+
+    The converter carries its state from one chunk to the next, and from one
+    call to the next:
+     .Tref   # the running reference junction (cold junction) temperature
+     .Tlast  # the last solved temperature (of each channel), which inverse()
+             # uses as the starting point of the next chunk's search
+     .count  # number of chunks converted
+    so an interrupted stream can be resumed by calling inverse() again. Call
+    reset() to forget the last solved temperature.
+
+    The conversion is done by tc, which may be a Thermocouple_Reference, a
+    key into thermocouples_reference.thermocouples, or a Channel_Map (with
+    chunks of shape (samples, channels)). The other arguments are as for
+    Thermocouple_Reference.inverse and convert, and are used for every
+    chunk.
+    """
+    def __init__(self,tc,Tunit='C',Vunit='mV',Tref=None,Vtol=None,
+                 branch="high",out_of_range="raise",dtype=None):
+        if isinstance(tc, str):
+            from . import thermocouples
+            tc = thermocouples[tc]
+        self.tc = tc
+        self.Tunit = Tunit
+        self.Vunit = Vunit
+        self.Tref = Tref
+        self.Vtol = Vtol
+        self.branch = branch
+        self.out_of_range = out_of_range
+        self.dtype = dtype
+        self.Tlast = None
+        self.count = 0
+
+    def __repr__(self):
+        return "<stream converter for %r, Tref=%r, %d chunks>"%(
+                self.tc, self.Tref, self.count)
+
+    def reset(self):
+        """ Forget the last solved temperature. """
+        self.Tlast = None
+
+    def _split(self, chunk):
+        """ Values of a chunk, updating the running Tref if it has one. """
+        if isinstance(chunk, tuple):
+            chunk, Tref = chunk
+            if Tref is not None:
+                self.Tref = Tref
+        return chunk
+
+    def inverse(self, chunks, warm_start=True):
+        """\
+        Generator of the temperatures (in Tunit) for each chunk of measured
+        voltages (in Vunit) in chunks.
+
+        With warm_start=True (default), the search for each chunk starts
+        from the last temperature solved in the previous chunk (for each
+        channel), which for slowly varying signals is a better guess than
+        the one inverse() finds by itself.
+        """
+        for chunk in chunks:
+            emf = self._split(chunk)
+            Tstart = self.Tlast if warm_start else None
+            T = self.tc.inverse(emf, self.Tunit, self.Vunit, self.Tref,
+                                Tstart, self.Vtol, self.branch,
+                                None, self.dtype)
+            if isinstance(self.tc, Channel_Map):
+                # Last sample of each channel; a 1-D chunk is one sample.
+                if np.size(T):
+                    self.Tlast = np.array(T[-1] if np.ndim(T) > 1 else T,
+                                          dtype=float)
+            elif np.ndim(T):
+                if np.size(T):
+                    self.Tlast = float(T[-1])
+            else:
+                self.Tlast = float(T)
+            self.count += 1
+            yield T
+
+    def convert(self, chunks):
+        """\
+        Generator of the emfs (in Vunit) for each chunk of temperatures (in
+        Tunit) in chunks.
+        """
+        for chunk in chunks:
+            T = self._split(chunk)
+            emf = self.tc.convert(T, self.Tunit, self.Vunit, self.Tref, 0,
+                                  self.out_of_range, None, self.dtype)
+            self.count += 1
+            yield emf
+
+#end of module
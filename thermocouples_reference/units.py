@@ -55,6 +55,21 @@ Tunits_mat = {
     },
   }
 
+# declare unit conversion factors for voltages
+Vunits_scale = {
+'mV': {'from': {
+            'V':  1e3,
+            'mV': 1.,
+            'uV': 1e-3,
+              },
+      'to':   {
+            'V':  1e-3,
+            'mV': 1.,
+            'uV': 1e3,
+              },
+    },
+  }
+
 #Tunits_mat_to_K = {
     #'K': np.array([[1.,0.],[0.,1.]]),
     #'C': np.array([[1.,273.15],[0.,1.]]),
@@ -0,0 +1,202 @@
+"""
+Python module for checking fast evaluation modes against the exact
+reference functions, before using them: the error each one introduces, in
+millivolts and in degrees Celsius, and its throughput.
+
+An evaluator is checked on a dense grid of temperatures spanning its
+thermocouple's range, in one vectorized call:
+
+    >>> from thermocouples_reference import thermocouples
+    >>> from thermocouples_reference.validation import check_evaluator
+    >>> tc = thermocouples['K']
+    >>> check_evaluator(tc, 'inverse', lambda V: tc.func.inverse_approx(V))
+
+From the command line, python -m thermocouples_reference.validation prints
+a table for the standard fast modes (see standard_evaluators) of all
+thermocouples; see --help.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import time
+
+import numpy as np
+
+def invertible_range(func):
+    """\
+    Temperature range (tmin, tmax) of the last monotonic run of branches of
+    func, on which inverse lookup with branch='high' gives back the
+    temperature. That is the whole range, except for type B below about
+    21 degC.
+    """
+    branches = func.branches
+    first = len(branches) - 1
+    while first > 0 and branches[first-1][4] == branches[-1][4]:
+        first -= 1
+    return branches[first][0], branches[-1][1]
+
+def _timed(fn, x):
+    """ Result of fn(x), and the seconds it took (after a small warm-up). """
+    fn(x[:16])
+    t0 = time.perf_counter()
+    y = fn(x)
+    return np.asarray(y, dtype=float), time.perf_counter() - t0
+
+def check_evaluator(tc, kind, evaluate, points=10**6):
+    """\
+    Compare an alternative evaluator of thermocouple tc with the exact
+    function tc.func, on a grid of points temperatures.
+
+    Parameters
+    ----------
+    tc : Thermocouple_Reference
+        The thermocouple.
+    kind : {'forward', 'inverse'}
+        A 'forward' evaluator takes an array of temperatures in degC and
+        returns emfs in mV, like tc.emf_mVC; an 'inverse' one takes emfs in
+        mV and returns temperatures in degC, like tc.inverse_CmV (both with
+        the reference junction at 0 degC).
+    evaluate : callable
+        The evaluator.
+    points : int, optional
+        Number of grid points, default 10**6.
+
+    Returns
+    -------
+    result : dict
+        'max_mV', 'rms_mV': maximum and RMS emf error.
+        'max_C', 'rms_C': maximum and RMS temperature error. For forward
+        evaluators, this is the emf error divided by the Seebeck
+        coefficient.
+        'values_per_s': throughput of the evaluator on the grid.
+        'seconds': time of the evaluator call.
+        'coverage': fraction of the grid where the evaluator gave a result.
+        It may return NaN where it does not apply; the errors are taken
+        over the other points.
+
+    Inverse evaluators are checked on the invertible range (see
+    invertible_range); forward ones on the whole range, except that the
+    temperature errors are only taken on the invertible range as well.
+    """
+    func = tc.func
+    tlo, thi = invertible_range(func)
+    if kind == 'forward':
+        T = np.linspace(func.minT, func.maxT, points)
+        E, seconds = _timed(evaluate, T)
+        dE = E - func(T)
+        inv = T >= tlo
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dT = dE[inv] / func(T[inv], derivative=1)
+    elif kind == 'inverse':
+        T = np.linspace(tlo, thi, points)
+        V = func(T)
+        Ti, seconds = _timed(evaluate, V)
+        dT = Ti - T
+        dE = func(Ti, out_of_range="extrapolate") - V
+    else:
+        raise ValueError("kind must be 'forward' or 'inverse'", kind)
+    answered = ~np.isnan(dE)
+    dE = np.abs(dE[answered])
+    dT = np.abs(dT[~np.isnan(dT)])
+    nan = float('nan')
+    return {'max_mV': float(dE.max()) if dE.size else nan,
+            'rms_mV': float(np.sqrt(np.mean(dE*dE))) if dE.size else nan,
+            'max_C': float(dT.max()) if dT.size else nan,
+            'rms_C': float(np.sqrt(np.mean(dT*dT))) if dT.size else nan,
+            'values_per_s': points/seconds if seconds > 0 else float('inf'),
+            'seconds': seconds,
+            'coverage': answered.mean()}
+
+def standard_evaluators(tc):
+    """\
+    List of (name, kind, evaluator) of the exact evaluation of thermocouple
+    tc and of its fast modes:
+
+    - exact: tc.emf_mVC and tc.inverse_CmV themselves, for reference
+    - float32: forward evaluation done in single precision
+    - lookup_table: Hermite interpolation table (inverse only), max_error=1e-4 mV
+    - inverse_approx: Chebyshev fits of the inverse, max_error=1e-3 degC,
+      with and without the final Newton step
+
+    Tables and fits are built here, so that their set-up is not timed.
+    """
+    func = tc.func
+    table = tc.lookup_table(1e-4)
+    func.approx_inverse(1e-3)
+    return [
+        ('exact', 'forward', lambda T: tc.emf_mVC(T)),
+        ('float32', 'forward', lambda T: tc.emf_mVC(T.astype(np.float32),
+                                                    dtype=np.float32)),
+        ('exact', 'inverse', lambda V: tc.inverse_CmV(V)),
+        ('lookup_table', 'inverse',
+         lambda V: table.inverse_CmV(V, out_of_range="nan")),
+        ('inverse_approx', 'inverse', lambda V: func.inverse_approx(V)),
+        ('inverse_approx+newton', 'inverse',
+         lambda V: func.inverse_approx(V, newton=True)),
+        ]
+
+def validate(keys=None, points=10**6, names=None, evaluators=standard_evaluators):
+    """\
+    Check the evaluators given by evaluators(tc) (by default, the standard
+    ones) for each thermocouple key (default: all), or only those with the
+    given names. Returns a list of result dicts as from check_evaluator,
+    with 'key', 'name' and 'kind' added, and 'speedup' over the exact
+    evaluator of the same kind, if there is one.
+    """
+    from . import thermocouples
+    if keys is None:
+        keys = sorted(thermocouples)
+    rows = []
+    for key in keys:
+        tc = thermocouples[key]
+        exact = {}
+        for name, kind, evaluate in evaluators(tc):
+            if names is not None and name not in names and name != 'exact':
+                continue
+            row = check_evaluator(tc, kind, evaluate, points)
+            row.update(key=key, name=name, kind=kind)
+            if name == 'exact':
+                exact[kind] = row['values_per_s']
+            if kind in exact:
+                row['speedup'] = row['values_per_s'] / exact[kind]
+            rows.append(row)
+    return rows
+
+def format_table(rows):
+    """ The results of validate as a text table. """
+    lines = ["%-12s %-22s %-8s %10s %10s %10s %10s %10s %8s %9s"%(
+                "type", "evaluator", "kind", "max mV", "rms mV", "max degC",
+                "rms degC", "Mvalues/s", "speedup", "coverage")]
+    for r in rows:
+        lines.append("%-12s %-22s %-8s %10.2e %10.2e %10.2e %10.2e %10.2f %8s %8.2f%%"%(
+            r['key'], r['name'], r['kind'], r['max_mV'], r['rms_mV'],
+            r['max_C'], r['rms_C'], r['values_per_s']/1e6,
+            "%.2fx"%r['speedup'] if 'speedup' in r else "",
+            100.*r['coverage']))
+    return "\n".join(lines)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Compare the fast evaluation modes with the exact "
+                    "reference functions: errors in mV and degC, and "
+                    "throughput.")
+    parser.add_argument('--keys', default=None,
+                        help="comma separated thermocouple keys (default: all)")
+    parser.add_argument('--points', type=float, default=1e6,
+                        help="grid points per curve (default 1e6)")
+    parser.add_argument('--evaluators', default=None,
+                        help="comma separated evaluator names (default: all)")
+    args = parser.parse_args(argv)
+    t0 = time.perf_counter()
+    rows = validate(args.keys.split(',') if args.keys else None,
+                    int(args.points),
+                    args.evaluators.split(',') if args.evaluators else None)
+    print(format_table(rows))
+    print("%d checks in %.1f s"%(len(rows), time.perf_counter() - t0))
+
+if __name__ == '__main__':
+    main()
+
+#end of module
@@ -0,0 +1,117 @@
+"""
+Python module for inverse lookup of slowly varying signals, warm started
+from the previous solution of each channel.
+"""
+
+__author__    = "User:Nanite @ wikipedia"
+__copyright__ = "public domain"
+
+import numpy as np
+
+from .units import Vunits_scale
+from .function_types import Thermocouple_Reference
+
+class Warm_Start_Inverse(object):
+    """\
+    Stateful inverse lookup, that remembers the last solution of each
+    channel and starts the next search from it:
+
+     inv = Warm_Start_Inverse(thermocouples['K'])
+     while True:
+         T = inv(read_channels(), Tref=cjc)   # one emf per channel
+     print(inv.mean_iterations)
+
+    For slowly varying signals, the last solution is an excellent starting
+    point, and the search typically converges in one or two iterations.
+    Channels are along the last axis of the voltages: a single number is one
+    channel, an array of shape (channels,) is one reading of each channel,
+    and a block of shape (samples, channels) is solved with every sample of
+    a channel starting from that channel's last solution. After each call,
+    the last sample of each channel is remembered (in .Tlast).
+
+    It is built from a Thermocouple_Reference, in which case calls are as
+    for Thermocouple_Reference.inverse (emfs in Vunit, temperatures and Tref
+    in Tunit), or from a raw reference function such as its .func, in which
+    case calls are as for func.inverse (in the function's own units, and
+    without Tref).
+
+    Statistics, to see what warm starting saves:
+     .solves           # number of values solved
+     .iterations       # total number of iterations of the search
+     .mean_iterations  # iterations per value
+    """
+    def __init__(self,tc,Tunit='C',Vunit='mV',Vtol=None,branch="high"):
+        if branch not in ["high", "low", "raise"]:
+            raise ValueError("invalid branch parameter",branch)
+        if isinstance(tc, Thermocouple_Reference):
+            self.tc = tc
+            self.func = tc.func.in_units(Tunit, Vunit)
+            if Vtol is None:
+                Vtol = 1e-6*Vunits_scale['mV']['to'][Vunit]
+        else:
+            self.tc = None
+            self.func = tc
+            if Vtol is None:
+                Vtol = 1e-6
+        self.Vtol = Vtol
+        self.branch = branch
+        self.Tlast = None
+        self.solves = 0
+        self.iterations = 0
+
+    def __repr__(self):
+        return "<warm started inverse of %r, %.2f iterations per value>"%(
+                self.tc if self.tc is not None else self.func,
+                self.mean_iterations)
+
+    @property
+    def mean_iterations(self):
+        return self.iterations / float(self.solves) if self.solves else 0.
+
+    def reset(self, stats=False):
+        """\
+        Forget the last solutions, so that the next search starts cold. With
+        stats=True, also zero the iteration statistics.
+        """
+        self.Tlast = None
+        if stats:
+            self.solves = 0
+            self.iterations = 0
+
+    def __call__(self, emf, Tref=None, out=None, dtype=None):
+        """\
+        Solve for the temperatures of emf, starting from the last solutions.
+        Tref (only for a Thermocouple_Reference) is broadcast against emf,
+        and defaults to the freezing point of water. out= and dtype= are as
+        for Thermocouple_Reference.inverse.
+        """
+        emf = np.asarray(emf, dtype=float)
+        if self.tc is not None:
+            if Tref is None:
+                Tref = self.tc._mats_Tunits_to[self.func.Tunits][0][1]
+            V = emf + self.tc._reference_emf(self.func, Tref)
+        elif Tref is not None:
+            raise ValueError("Tref needs a Thermocouple_Reference")
+        else:
+            V = emf
+        Tstart = self.Tlast
+        if Tstart is not None:
+            try:
+                Tstart = np.broadcast_to(Tstart, V.shape)
+            except ValueError:
+                raise ValueError("number of channels changed",
+                                 np.shape(self.Tlast), V.shape)
+
+        scalar = V.ndim == 0 and out is None and dtype is None
+        counts = {}
+        T = self.func.inverse(V, Tstart, self.Vtol, self.branch, out, dtype,
+                              counts=counts)
+
+        self.solves += V.size
+        self.iterations += counts.get('iterations', 0)
+        if V.size:
+            # the last sample of each channel
+            self.Tlast = np.array(np.asarray(T)[(-1,)*(V.ndim - 1)], dtype=float)
+        return float(T) if scalar else T
+
+#end of module